@@ -0,0 +1,102 @@
+'''
+Time-to-first-request for a cold worker versus a worker forked from a
+preloaded master (see gunicorn.conf.py and `main.boot.preload()`).
+
+The first request is `POST /logout/`, which runs the full DRF stack without
+touching the database.
+
+    python -m benchmarks.cold_start [runs]
+'''
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .utils import report
+
+FIRST_REQUEST = '''
+from django.test import Client
+Client(SERVER_NAME='localhost').post('/logout/')
+'''
+
+COLD_WORKER = (
+    '''
+import time
+start = time.perf_counter()
+import django
+django.setup()
+from main.wsgi import application
+'''
+    + FIRST_REQUEST
+    + '''
+print(time.perf_counter() - start)
+'''
+)
+
+
+def cold_worker():
+    result = subprocess.run(
+        [sys.executable, '-c', COLD_WORKER],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.split()[-1])
+
+
+def forked_worker():
+    '''Fork from this (preloaded) process and time the child's first request.'''
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        start = time.perf_counter()
+        exec(FIRST_REQUEST)
+        os.write(write_fd, str(time.perf_counter() - start).encode())
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        elapsed = float(pipe.read())
+    os.waitpid(pid, 0)
+    return elapsed
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+
+    cold = [cold_worker() for _ in range(runs)]
+
+    import django
+
+    django.setup()
+    from main.wsgi import application  # noqa: F401
+
+    forked_setup_only = [forked_worker() for _ in range(runs)]
+
+    from main.boot import preload
+
+    preload()
+    forked_preloaded = [forked_worker() for _ in range(runs)]
+
+    report(
+        f'time to first request, median of {runs} runs (ms)',
+        [
+            ('cold worker', f'{statistics.median(cold) * 1000:.0f}'),
+            (
+                'forked, django.setup() only',
+                f'{statistics.median(forked_setup_only) * 1000:.0f}',
+            ),
+            (
+                'forked, preloaded',
+                f'{statistics.median(forked_preloaded) * 1000:.0f}',
+            ),
+        ],
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+'''
+Time for the dashboard page to get its data, before and after
+`/api/scores/dashboard/`.
+
+Before, the page makes these requests one after another: `/jwt/verify/`
+(the auth check), `/users/me/`, and then the leaderboard. After, it makes
+one dashboard request. Each request is timed in-process, and a simulated
+network round trip is added for each, since the browser waits for every
+one of them.
+
+    python -m benchmarks.dashboard [page loads] [round trip ms] [players]
+'''
+
+import random
+import sys
+
+from .utils import percentile, report, setup, timed
+
+BEFORE = [
+    ('post', '/jwt/verify/'),
+    ('get', '/users/me/'),
+    ('get', '/api/scores/leaderboard/'),
+]
+AFTER = [('get', '/api/scores/dashboard/')]
+
+
+def load(client, requests):
+    '''Server time for one page load's requests, made in order.'''
+    total = 0
+    for method, path in requests:
+        response, elapsed = timed(getattr(client, method), path)
+        assert response.status_code == 200, response.content
+        total += elapsed
+    return total
+
+
+def main():
+    loads = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    round_trip = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.04
+    players = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from scores.models import Score
+
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(email=f'player{i}@example.com') for i in range(players)
+    )
+    Score.objects.bulk_create(
+        (
+            Score(user=user, score=random.randint(0, 100000))
+            for user in users
+            for _ in range(3)
+        ),
+        batch_size=5000,
+    )
+
+    with override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        RATE_LIMITS={},
+    ):
+        player = users[0]
+        player.set_password('password123')
+        player.save()
+        client = Client()
+        client.post(
+            '/jwt/create/',
+            {'email': player.email, 'password': 'password123'},
+        )
+
+        rows = []
+        for label, requests in (('before', BEFORE), ('after', AFTER)):
+            load(client, requests)  # warm up
+            samples = [
+                load(client, requests) + len(requests) * round_trip
+                for _ in range(loads)
+            ]
+            rows += [
+                (f'{label}: requests', len(requests)),
+                (f'{label}: p50 ms', f'{percentile(samples, 50) * 1e3:.1f}'),
+                (f'{label}: p99 ms', f'{percentile(samples, 99) * 1e3:.1f}'),
+            ]
+
+    report(
+        f'Dashboard data, {round_trip * 1e3:.0f} ms round trips, '
+        f'{players} players',
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
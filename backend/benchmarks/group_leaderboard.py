@@ -0,0 +1,116 @@
+'''
+Group leaderboard latency with thousands of groups.
+
+Creates players with several scores each, puts each player in a few of the
+small groups and a quarter of them in one large group, and compares
+reading a group's top 10 through the maintained `GroupHighScore` rows with
+ranking the members' scores per request (a join against group membership,
+grouped per player and sorted). Also times a score submission, which now
+updates the player's groups.
+
+    python -m benchmarks.group_leaderboard [groups] [players]
+'''
+
+import random
+import sys
+
+from .utils import percentile, report, setup, timed
+
+
+def main():
+    groups = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import Group
+    from django.db.models import Max
+    from django.test import Client
+
+    from scores import leaderboards
+    from scores.models import Score
+
+    User = get_user_model()
+    rng = random.Random(0)
+    Group.objects.bulk_create(Group(name=f'group {i}') for i in range(groups))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    User.objects.bulk_create(
+        User(email=f'player{i}@example.com') for i in range(players)
+    )
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    Score.objects.bulk_create(
+        Score(user_id=user_id, score=rng.randrange(10000))
+        for user_id in user_ids
+        for _ in range(3)
+    )
+    large = Group.objects.create(name='large group')
+    User.groups.through.objects.bulk_create(
+        [
+            User.groups.through(user_id=user_id, group_id=group_id)
+            for user_id in user_ids
+            for group_id in rng.sample(group_ids, 3)
+        ]
+        + [
+            User.groups.through(user_id=user_id, group_id=large.pk)
+            for user_id in user_ids[: players // 4]
+        ]
+    )
+    _, elapsed = timed(leaderboards.refresh_users, user_ids)
+    report(
+        f'{groups} groups of about {players * 3 // groups} players, one of '
+        f'{players // 4}',
+        [('initial refresh', f'{elapsed:.1f} s')],
+    )
+
+    def joined(group_id):
+        # The best score of each member, ranked per request
+        best = (
+            Score.objects.ranked()
+            .filter(user__groups=group_id)
+            .values('user')
+            .annotate(best=Max('score'))
+            .order_by('-best')[:10]
+        )
+        return list(
+            Score.objects.filter(
+                user__in=[row['user'] for row in best]
+            ).select_related('user')
+        )
+
+    client = Client()
+    for label, read in (
+        ('join per request', joined),
+        ('GroupHighScore', leaderboards.top),
+        (
+            'GET ?group=',
+            lambda group_id: client.get(
+                '/api/scores/leaderboard/', {'group': group_id}
+            ),
+        ),
+    ):
+        small = [timed(read, rng.choice(group_ids))[1] for _ in range(300)]
+        big = [timed(read, large.pk)[1] for _ in range(30)]
+        report(
+            label,
+            [
+                ('small group p50', f'{percentile(small, 50) * 1000:.2f} ms'),
+                ('large group p50', f'{percentile(big, 50) * 1000:.2f} ms'),
+            ],
+        )
+
+    samples = [
+        timed(
+            Score.objects.create,
+            user_id=rng.choice(user_ids),
+            score=rng.randrange(10000),
+        )[1]
+        for _ in range(500)
+    ]
+    report(
+        'score save, re-ranking the player',
+        [('p50', f'{percentile(samples, 50) * 1000:.2f} ms')],
+    )
+
+
+if __name__ == '__main__':
+    main()
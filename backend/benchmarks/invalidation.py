@@ -0,0 +1,163 @@
+'''
+Cache hit rate and staleness of the per-process leaderboard cache (see
+main/invalidation.py), with worker processes reading the global board
+while another process posts a new top score every so often.
+
+Each worker reads the board about once a millisecond. A write's lag is the
+time from its commit until a worker first returns it (or a later write),
+for each worker. The modes are:
+
+- no cache: every read queries the database
+- TTL only: entries kept for one second, no invalidation
+- invalidated: entries kept until an event evicts them, sent with NOTIFY
+  on PostgreSQL or polled every INVALIDATION_POLL_INTERVAL elsewhere
+
+    python -m benchmarks.invalidation [workers] [writes/s] [seconds]
+'''
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .utils import percentile, report, setup
+
+# settings overrides, whether workers run a listener
+MODES = [
+    ('no cache', {'SCORE_CACHE_SIZE': 0}, False),
+    ('TTL 1 s', {'SCORE_CACHE_TTL': 1}, False),
+    ('invalidated, poll 1 s', {'INVALIDATION_POLL_INTERVAL': 1}, True),
+    ('invalidated, poll 0.1 s', {'INVALIDATION_POLL_INTERVAL': 0.1}, True),
+]
+
+
+def worker(overrides, listen, seconds, pipe):
+    from django.test.utils import override_settings
+
+    from main.invalidation import bus
+    from scores import caches
+
+    with override_settings(**overrides):
+        if listen:
+            bus.start()
+        # Top score: when this worker first read it
+        seen = {}
+        reads = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            top = caches.leaderboard()[0]['score']
+            seen.setdefault(top, time.time())
+            reads += 1
+            time.sleep(0.001)
+    hits, misses = caches.boards.hits, caches.boards.misses
+    os.write(pipe, json.dumps([reads, hits, misses, seen]).encode())
+
+
+def run(overrides, listen, workers, rate, seconds, user, top):
+    from django.db import connections
+    from django.test.utils import override_settings
+
+    from scores.models import Score
+
+    connections.close_all()
+    pipes = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        if os.fork() == 0:
+            os.close(read)
+            try:
+                worker(overrides, listen, seconds, write)
+            finally:
+                os._exit(0)
+        os.close(write)
+        pipes.append(read)
+
+    # Written score: when its commit returned
+    written = {}
+    # Only the invalidated modes publish events
+    with override_settings(SCORE_CACHE_SIZE=100 if listen else 0):
+        time.sleep(min(1, seconds / 4))
+        deadline = time.perf_counter() + seconds - 2 * min(1, seconds / 4)
+        while time.perf_counter() < deadline:
+            top += 1
+            Score.objects.create(user=user, score=top)
+            written[top] = time.time()
+            time.sleep(1 / rate)
+
+    results = []
+    for read in pipes:
+        with os.fdopen(read) as file:
+            results.append(json.loads(file.read()))
+    for _ in range(workers):
+        os.wait()
+
+    lags = []
+    for _, _, _, seen in results:
+        seen = sorted((int(score), at) for score, at in seen.items())
+        for score, at in written.items():
+            # When it, or a later write that replaced it, was first read
+            first = min((t for s, t in seen if s >= score), default=None)
+            if first is not None:
+                lags.append(first - at)
+    reads = sum(result[0] for result in results)
+    hits = sum(result[1] for result in results)
+    lookups = hits + sum(result[2] for result in results)
+    return reads, hits / lookups if lookups else 0, lags, top
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    setup(database=False)
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from scores.models import Score
+
+    directory = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        # Workers share the database, so it cannot be in memory
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            directory, 'benchmark.sqlite3'
+        )
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    user = get_user_model().objects.create_user(email='writer@example.com')
+    Score.objects.bulk_create(
+        Score(user=user, score=points) for points in range(1000)
+    )
+
+    top = 1000
+    rows = []
+    for label, overrides, listen in MODES:
+        reads, hit_rate, lags, top = run(
+            overrides, listen, workers, rate, seconds, user, top
+        )
+        rows += [
+            (f'{label}: reads/s', f'{reads / seconds:,.0f}'),
+            (f'{label}: hit rate', f'{hit_rate:.1%}'),
+            (
+                f'{label}: lag p50 / p99 ms',
+                f'{percentile(lags, 50) * 1e3:.0f} / '
+                f'{percentile(lags, 99) * 1e3:.0f}',
+            ),
+        ]
+
+    connection.creation.destroy_test_db(
+        connection.settings_dict['NAME'], verbosity=0
+    )
+    os.rmdir(directory)
+    report(
+        f'Leaderboard reads by {workers} workers, {rate:g} new top scores/s '
+        f'({connection.vendor})',
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
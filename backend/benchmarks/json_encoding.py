@@ -0,0 +1,85 @@
+'''
+Encode time and bytes on the wire for leaderboard-shaped payloads.
+
+Compares DRF's stdlib `JSONRenderer` with `main.renderers.FastJSONRenderer`
+and reports the raw, gzip and (when installed) brotli sizes.
+
+    python -m benchmarks.json_encoding
+'''
+
+import datetime
+import timeit
+
+from .utils import report, setup
+
+
+def leaderboard(size):
+    created_at = datetime.datetime(2025, 4, 17, tzinfo=datetime.timezone.utc)
+    return [
+        {
+            'id': i,
+            'score': 100000 - i,
+            'time_played': 60 + i % 600,
+            'created_at': created_at + datetime.timedelta(seconds=i),
+            'username': f'player{i}@example.com',
+        }
+        for i in range(size)
+    ]
+
+
+def stats():
+    return {
+        'players': 125000,
+        'games': 2400000,
+        'average_score': 412.57,
+        'top_score': 99999,
+        'histogram': [
+            {'bucket': bucket * 100, 'count': 5000 - bucket}
+            for bucket in range(100)
+        ],
+    }
+
+
+def main():
+    setup(database=False)
+
+    from rest_framework.renderers import JSONRenderer
+
+    from main.middleware import brotli, compress
+    from main.renderers import FastJSONRenderer
+
+    payloads = [
+        ('top-10', leaderboard(10)),
+        ('top-1000', leaderboard(1000)),
+        ('stats', stats()),
+    ]
+    renderers = [
+        ('stdlib', JSONRenderer()),
+        ('fast', FastJSONRenderer()),
+    ]
+    codings = ['gzip', 'br'] if brotli else ['gzip']
+
+    for name, data in payloads:
+        rows = []
+        for label, renderer in renderers:
+            number = 2000 if name != 'top-1000' else 50
+            seconds = timeit.timeit(
+                lambda: renderer.render(data), number=number
+            )
+            rows.append(
+                (f'{label} encode µs', f'{seconds / number * 1e6:.1f}')
+            )
+
+        content = FastJSONRenderer().render(data)
+        rows.append(('raw bytes', len(content)))
+        for coding in codings:
+            seconds = timeit.timeit(
+                lambda: compress(content, coding), number=50
+            )
+            rows.append((f'{coding} bytes', len(compress(content, coding))))
+            rows.append((f'{coding} compress µs', f'{seconds / 50 * 1e6:.1f}'))
+        report(name, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+'''
+Cost of a log call to the thread making it.
+
+Logs the submission view's "new high score" line, with the same fields,
+through the old setup (an f-string message, formatted and written by a
+`StreamHandler` in the calling thread) and through `QueuedStreamHandler`
+with `JSONFormatter`, both writing to a temporary file. Also times the
+sampled leaderboard logger dropping records. Reports per-call latency in
+the calling thread and the time until everything is on disk.
+
+    python -m benchmarks.logging_overhead [records]
+'''
+
+import logging
+import sys
+import tempfile
+import time
+
+from .utils import percentile, report, setup
+
+
+def run(logger, handler, count, log):
+    logger.handlers = [handler]
+    samples = []
+    start = time.perf_counter()
+    for i in range(count):
+        begin = time.perf_counter()
+        log(logger, i)
+        samples.append(time.perf_counter() - begin)
+    handler.flush()
+    total = time.perf_counter() - start
+    logger.handlers = []
+    return [
+        ('p50 per call', f'{percentile(samples, 50) * 1e6:.1f} µs'),
+        ('p99 per call', f'{percentile(samples, 99) * 1e6:.1f} µs'),
+        ('until written', f'{total * 1000:.0f} ms'),
+    ]
+
+
+def old(logger, i):
+    logger.info(f'New high score submitted - User: {i}, Score: {i * 10}')
+
+
+def new(logger, i):
+    logger.info(
+        'New high score',
+        extra={'user_id': i, 'score': i * 10, 'status': 'unverified'},
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    setup(database=False)
+
+    from main.log import JSONFormatter, QueuedStreamHandler, SamplingFilter
+
+    logger = logging.getLogger('benchmarks.logging_overhead')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    with tempfile.TemporaryFile('w') as stream:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(
+            logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+        )
+        report(
+            f'StreamHandler, f-string ({count} records)',
+            run(logger, handler, count, old),
+        )
+
+        handler = QueuedStreamHandler(stream, queue_size=count)
+        handler.setFormatter(JSONFormatter())
+        report(
+            f'QueuedStreamHandler, JSON ({count} records)',
+            run(logger, handler, count, new),
+        )
+
+        logger.filters = [SamplingFilter(rate=0.01, per_second=10)]
+        report(
+            f'QueuedStreamHandler, 1% sampled ({count} records)',
+            run(logger, handler, count, new),
+        )
+        handler.close()
+
+
+if __name__ == '__main__':
+    main()
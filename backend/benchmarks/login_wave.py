@@ -0,0 +1,96 @@
+'''
+Login wave load test: leaderboard reads mixed with password logins.
+
+Compares leaderboard latency with no logins, with logins hashed on the
+default bounded pool, and with a pool as large as the login concurrency
+(equivalent to hashing inline in every request thread).
+
+    python -m benchmarks.login_wave [seconds]
+'''
+
+import sys
+import threading
+import time
+
+from .utils import percentile, report, setup
+
+READERS = 4
+LOGINS = 8
+
+
+def run(duration, logins):
+    from django.test import Client
+
+    stop = threading.Event()
+    read_latencies = []
+    login_statuses = []
+
+    def reader():
+        client = Client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/api/scores/leaderboard/')
+            read_latencies.append(time.perf_counter() - start)
+
+    def login():
+        client = Client()
+        while not stop.is_set():
+            response = client.post(
+                '/jwt/create/',
+                {'email': 'wave@example.com', 'password': 'password123'},
+            )
+            login_statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [threading.Thread(target=login) for _ in range(logins)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return read_latencies, login_statuses
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings
+
+    from scores.models import Score
+
+    user = get_user_model().objects.create_user(
+        email='wave@example.com', password='password123'
+    )
+    for score in range(50):
+        Score.objects.create(user=user, score=score)
+
+    scenarios = [
+        ('reads only', {}, 0),
+        ('bounded pool', {}, LOGINS),
+        (
+            'unbounded pool',
+            {'PASSWORD_HASHING_WORKERS': LOGINS},
+            LOGINS,
+        ),
+    ]
+    for title, overrides, logins in scenarios:
+        with override_settings(**overrides):
+            reads, statuses = run(duration, logins)
+        report(
+            f'{title} ({READERS} readers, {logins} login threads)',
+            [
+                ('leaderboard reads', len(reads)),
+                ('read p50 ms', f'{percentile(reads, 50) * 1000:.1f}'),
+                ('read p99 ms', f'{percentile(reads, 99) * 1000:.1f}'),
+                ('logins ok', statuses.count(200)),
+                ('logins shed (503)', statuses.count(503)),
+            ],
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+'''
+Per-request middleware overhead on API routes, full chain versus the lean
+profile (`LEAN_MIDDLEWARE_PATHS`), plus the cost of a CORS preflight.
+
+    python -m benchmarks.middleware_overhead [requests]
+'''
+
+import sys
+import time
+
+from .utils import report, setup
+
+
+def mean_us(client, method, path, number, **headers):
+    request = getattr(client, method)
+    request(path, **headers)  # warm up the handler and URL resolver
+    start = time.perf_counter()
+    for _ in range(number):
+        request(path, **headers)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    setup()
+
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    preflight = {
+        'HTTP_ORIGIN': 'http://localhost:3000',
+        'HTTP_ACCESS_CONTROL_REQUEST_METHOD': 'POST',
+    }
+    requests = [
+        (
+            'GET /api/scores/leaderboard/',
+            'get',
+            '/api/scores/leaderboard/',
+            {},
+        ),
+        ('POST /logout/', 'post', '/logout/', {}),
+        ('OPTIONS preflight', 'options', '/api/scores/submit/', preflight),
+    ]
+    profiles = [('full chain', {'LEAN_MIDDLEWARE_PATHS': ()}), ('lean', {})]
+
+    for title, overrides in profiles:
+        with override_settings(**overrides):
+            client = Client()
+            rows = [
+                (
+                    f'{label} µs',
+                    f'{mean_us(client, method, path, number, **headers):.0f}',
+                )
+                for label, method, path, headers in requests
+            ]
+        report(title, rows)
+
+
+if __name__ == '__main__':
+    main()
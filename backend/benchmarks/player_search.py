@@ -0,0 +1,86 @@
+'''
+Player search latency at a million players.
+
+Creates players with generated names and one or two scores each, builds
+the search index and times `GET /api/scores/search/` for random two- and
+three-letter prefixes of names, without rate limits. On SQLite this
+exercises the in-memory name list; on PostgreSQL the prefix indexes.
+
+    python -m benchmarks.player_search [players] [searches]
+'''
+
+import random
+import sys
+
+from .utils import percentile, report, setup, timed
+
+SYLLABLES = [
+    'ka', 'lo', 'mi', 'ra', 'to', 'ne', 'su', 'vi', 'da', 'el',
+    'an', 'jo', 'ri', 'sa', 'te', 'mo', 'li', 'ha', 'be', 'or',
+]  # fmt: skip
+
+
+def name(rng):
+    return ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).title()
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from scores import search
+    from scores.models import Score
+
+    User = get_user_model()
+    rng = random.Random(0)
+    batch = 50000
+    for start in range(0, players, batch):
+        users = User.objects.bulk_create(
+            User(
+                email=f'{name(rng).lower()}{i}@example.com',
+                first_name=name(rng),
+                last_name=name(rng),
+            )
+            for i in range(start, min(start + batch, players))
+        )
+        Score.objects.bulk_create(
+            Score(user=user, score=rng.randrange(0, 20000, 10))
+            for user in users
+            for _ in range(rng.randint(1, 2))
+        )
+
+    _, elapsed = timed(search.index.sync, force=True)
+    report(
+        f'{players} players, {Score.objects.count()} scores',
+        [('index build', f'{elapsed:.1f} s')],
+    )
+
+    client = Client()
+    samples = []
+    hits = 0
+    for _ in range(searches):
+        query = name(rng).lower()[: rng.randint(2, 3)]
+        with override_settings(RATE_LIMITS={}):
+            response, elapsed = timed(
+                client.get, '/api/scores/search/', {'q': query}
+            )
+        assert response.status_code == 200, response.content
+        hits += len(response.json())
+        samples.append(elapsed)
+    report(
+        f'GET /api/scores/search/ ({searches} searches)',
+        [
+            ('p50', f'{percentile(samples, 50) * 1000:.2f} ms'),
+            ('p99', f'{percentile(samples, 99) * 1000:.2f} ms'),
+            ('hits per search', f'{hits / searches:.1f}'),
+        ],
+    )
+
+
+if __name__ == '__main__':
+    main()
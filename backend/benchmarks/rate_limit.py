@@ -0,0 +1,63 @@
+'''
+Rate limiter overhead: the throttle check a scoped view pays per request,
+over many clients, and one background sync of their buckets.
+
+    python -m benchmarks.rate_limit [requests] [clients]
+'''
+
+import random
+import sys
+import time
+
+from .utils import percentile, report, setup, timed
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    setup()
+
+    from django.contrib.auth.models import AnonymousUser
+    from rest_framework.test import APIRequestFactory
+
+    from main.ratelimit import TokenBucketThrottle, limiter
+
+    class View:
+        throttle_scope = 'submit'
+
+    factory = APIRequestFactory()
+    requests = []
+    for i in range(clients):
+        request = factory.post('/api/scores/submit/')
+        request.META['REMOTE_ADDR'] = (
+            f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}'
+        )
+        request.user = AnonymousUser()
+        requests.append(request)
+
+    throttle, view = TokenBucketThrottle(), View()
+    samples = []
+    for _ in range(number):
+        request = random.choice(requests)
+        start = time.perf_counter_ns()
+        throttle.allow_request(request, view)
+        samples.append((time.perf_counter_ns() - start) / 1000)
+
+    _, elapsed = timed(limiter.sync)
+
+    report(
+        f'{number} throttle checks over {clients} client IPs',
+        [
+            ('mean µs', f'{sum(samples) / len(samples):.2f}'),
+            ('p50 µs', f'{percentile(samples, 50):.2f}'),
+            ('p99 µs', f'{percentile(samples, 99):.2f}'),
+            (
+                f'sync of {len(limiter.buckets)} buckets ms',
+                f'{elapsed * 1e3:.1f}',
+            ),
+        ],
+    )
+
+
+if __name__ == '__main__':
+    main()
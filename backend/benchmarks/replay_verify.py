@@ -0,0 +1,85 @@
+'''
+Replay verification throughput.
+
+Replays the games recorded in scores/tests/replays.json in this process,
+then runs `verify_scores` over that many pending scores on a process pool.
+
+    python -m benchmarks.replay_verify [games] [workers]
+'''
+
+import io
+import json
+import os
+import sys
+
+from .utils import report, setup, timed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from scores.models import Replay, Score
+    from scores.replay import verify_batch
+
+    path = os.path.join('scores', 'tests', 'replays.json')
+    with open(path) as file:
+        recorded = json.load(file)
+    games = [recorded[i % len(recorded)] for i in range(count)]
+    ticks = sum(game['ticks'] for game in games)
+
+    results, elapsed = timed(
+        verify_batch,
+        [
+            (i, game['seed'], game['ticks'], game['inputs'], game['score'])
+            for i, game in enumerate(games)
+        ],
+    )
+    assert not any(error for _, error in results)
+    report(
+        f'simulate ({count} games, {ticks / count:.0f} ticks on average)',
+        [
+            ('games/min per core', f'{count / elapsed * 60:,.0f}'),
+            ('ticks/s', f'{ticks / elapsed:,.0f}'),
+        ],
+    )
+
+    user = get_user_model().objects.create_user(email='bench@example.com')
+    scores = Score.objects.bulk_create(
+        Score(user=user, score=game['score'], status=Score.Status.PENDING)
+        for game in games
+    )
+    Replay.objects.bulk_create(
+        Replay(
+            score=score,
+            seed=game['seed'],
+            ticks=game['ticks'],
+            inputs=game['inputs'],
+        )
+        for score, game in zip(scores, games)
+    )
+
+    _, elapsed = timed(
+        call_command,
+        'verify_scores',
+        once=True,
+        workers=workers,
+        stdout=io.StringIO(),
+    )
+    verified = Score.objects.filter(status=Score.Status.VERIFIED).count()
+    assert verified == count, verified
+    report(
+        f'verify_scores ({workers} workers, including database updates)',
+        [
+            ('games/min', f'{count / elapsed * 60:,.0f}'),
+            ('games/min per worker', f'{count / elapsed * 60 / workers:,.0f}'),
+        ],
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+'''
+Memory and rank lookup throughput of the rank histogram with 1, 4 and 16
+worker processes: a copy in each process versus the shared rankings file
+(see scores/rankings.py).
+
+Each worker is forked, builds or maps its histogram, then looks up ranks
+for random scores for a few seconds. Memory is how much each worker's
+private dirty memory outside the shared file (from /proc/self/smaps) grew,
+summed over the workers, plus the shared file once: its pages are in
+memory once however many workers map it.
+
+    python -m benchmarks.shared_rankings [scores] [seconds per run]
+'''
+
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from .utils import report, setup, timed
+
+WORKERS = (1, 4, 16)
+
+
+def private_kb(shared_path):
+    '''Private dirty memory, not counting the shared file's pages.'''
+    total = 0
+    path = None
+    with open('/proc/self/smaps') as file:
+        for line in file:
+            fields = line.split()
+            if not fields[0].endswith(':'):
+                # A mapping: address range, perms, offset, dev, inode, path
+                path = fields[5] if len(fields) > 5 else None
+            elif fields[0] == 'Private_Dirty:' and path != shared_path:
+                total += int(fields[1])
+    return total
+
+
+def worker(load, lookup, seconds, highest, path, pipe):
+    # Keep the collector from copying the parent's pages
+    gc.disable()
+    private = private_kb(path)
+    load()
+    lookups = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            lookup(random.randint(0, highest))
+        lookups += 1000
+    os.write(pipe, json.dumps([lookups, private_kb(path) - private]).encode())
+
+
+def run(workers, load, lookup, seconds, highest, path):
+    gc.freeze()
+    pipes = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        if os.fork() == 0:
+            os.close(read)
+            try:
+                worker(load, lookup, seconds, highest, path, write)
+            finally:
+                os._exit(0)
+        os.close(write)
+        pipes.append(read)
+    results = []
+    for read in pipes:
+        with os.fdopen(read) as file:
+            results.append(json.loads(file.read()))
+    for _ in range(workers):
+        os.wait()
+    gc.unfreeze()
+    lookups = sum(result[0] for result in results)
+    private = sum(result[1] for result in results)
+    return lookups / seconds, private
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    setup()
+
+    from array import array
+
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from django.test.utils import override_settings
+
+    from scores import rankings
+    from scores.models import Score
+    from scores.search import SearchIndex
+
+    highest = count * 10
+    user = get_user_model().objects.create_user(email='ranked@example.com')
+    Score.objects.bulk_create(
+        (
+            Score(user=user, score=random.randint(0, highest))
+            for _ in range(count)
+        ),
+        batch_size=10000,
+    )
+    (values, at_or_below), refresh = timed(rankings.histogram)
+
+    directory = tempfile.mkdtemp(
+        dir='/dev/shm' if os.path.isdir('/dev/shm') else None
+    )
+    path = os.path.join(directory, 'rankings')
+    with override_settings(RANKINGS_FILE=path):
+        rankings.write(path)
+    # Forked workers must not share the parent's database socket
+    connections.close_all()
+
+    index = SearchIndex()
+
+    def copy():
+        # What each worker's own rebuild leaves in its memory
+        index.state = (array('q', values), array('q', at_or_below), [], [])
+
+    reader = rankings.Reader()
+
+    def mapped():
+        reader.read(lambda mapped, header: None)
+
+    shared_kb = os.path.getsize(path) / 1024
+    modes = [
+        ('copy per worker', copy, index.rank, 0),
+        ('shared file', mapped, reader.rank, shared_kb),
+    ]
+    rows = [
+        ('distinct scores', len(values)),
+        ('histogram refresh query ms', f'{refresh * 1e3:.0f}'),
+        ('file MB', f'{os.path.getsize(path) / 2**20:.1f}'),
+    ]
+    with override_settings(RANKINGS_FILE=path, RANKINGS_MAX_AGE=3600):
+        for label, load, lookup, shared in modes:
+            for workers in WORKERS:
+                throughput, private = run(
+                    workers, load, lookup, seconds, highest, path
+                )
+                prefix = f'{label}, {workers} workers:'
+                rows += [
+                    (f'{prefix} lookups/s', f'{throughput:,.0f}'),
+                    (
+                        f'{prefix} memory MB',
+                        f'{(private + shared) / 1024:.1f}',
+                    ),
+                ]
+    os.remove(path)
+    os.rmdir(directory)
+
+    report(f'Rank lookups over {count} scores ({os.cpu_count()} CPUs)', rows)
+
+
+if __name__ == '__main__':
+    main()
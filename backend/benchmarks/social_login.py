@@ -0,0 +1,93 @@
+'''
+Social login latency against a local stub OAuth2 provider.
+
+Each login goes through `ProviderAuthView` (token exchange plus profile
+lookup). The stub delays every new connection to approximate the TLS
+handshake to Google, so the difference between the two backends is the
+cost of connecting per request versus reusing pooled connections.
+
+    python -m benchmarks.social_login [logins] [handshake ms]
+'''
+
+import sys
+
+from .utils import percentile, report, setup, timed
+
+REDIRECT_URI = 'http://localhost:3000/auth/stub'
+
+
+def run(backend_name, logins):
+    from django.test import Client
+
+    latencies = []
+    for _ in range(logins):
+        client = Client()
+        response = client.get(
+            f'/o/{backend_name}/', {'redirect_uri': REDIRECT_URI}
+        )
+        state = response.json()['authorization_url'].split('state=')[1]
+        state = state.split('&')[0]
+        response, elapsed = timed(
+            client.post, f'/o/{backend_name}/?code=abc&state={state}'
+        )
+        assert response.status_code == 201, response.content
+        latencies.append(elapsed)
+    return latencies
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    handshake_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    setup()
+
+    from django.test.utils import override_settings
+    from social_core.backends.base import BaseAuth
+
+    from users.tests.stub_provider import StubOAuth2, StubProvider
+
+    # Module level, so AUTHENTICATION_BACKENDS can import it by path
+    global UnpooledStubOAuth2
+
+    class UnpooledStubOAuth2(StubOAuth2):
+        '''`social_core`'s own per-call `requests.request()`.'''
+
+        name = 'unpooled-stub-oauth2'
+        request = BaseAuth.request
+        get_json = BaseAuth.get_json
+
+    with StubProvider(handshake_delay=handshake_ms / 1000) as provider:
+        overrides = {
+            'AUTHENTICATION_BACKENDS': [
+                'users.tests.stub_provider.StubOAuth2',
+                f'{__name__}.UnpooledStubOAuth2',
+            ],
+            'DJOSER': {'SOCIAL_AUTH_ALLOWED_REDIRECT_URIS': [REDIRECT_URI]},
+        }
+        for prefix in ('STUB_OAUTH2', 'UNPOOLED_STUB_OAUTH2'):
+            overrides[f'SOCIAL_AUTH_{prefix}_URL'] = provider.url
+            overrides[f'SOCIAL_AUTH_{prefix}_KEY'] = 'client-id'
+            overrides[f'SOCIAL_AUTH_{prefix}_SECRET'] = 'client-secret'
+
+        with override_settings(**overrides):
+            for title, backend_name in (
+                ('connection per request', 'unpooled-stub-oauth2'),
+                ('pooled session', 'stub-oauth2'),
+            ):
+                connections = provider.connections
+                latencies = run(backend_name, logins)
+                report(
+                    f'{title} ({logins} logins, {handshake_ms:g} ms '
+                    'handshake)',
+                    [
+                        ('p50 ms', f'{percentile(latencies, 50) * 1000:.1f}'),
+                        ('p99 ms', f'{percentile(latencies, 99) * 1000:.1f}'),
+                        (
+                            'provider connections',
+                            provider.connections - connections,
+                        ),
+                    ],
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+'''
+Telemetry ingestion throughput for one worker.
+
+Measures parsing alone, then full requests to `/api/scores/telemetry/`
+with segments flushed to a temporary directory.
+
+    python -m benchmarks.telemetry_ingest [requests] [events per request]
+'''
+
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from .utils import percentile, report, setup, timed
+
+
+def batch(events):
+    from scores import telemetry
+
+    # One game per frame, as the client sends them
+    return telemetry.encode(
+        uuid.uuid4(),
+        [
+            (i * 68, random.randrange(5), i % 25, i // 25 % 25, 3 + i // 100)
+            for i in range(events)
+        ],
+    )
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    from scores import telemetry
+
+    body = batch(events)
+    _, elapsed = timed(
+        lambda: [list(telemetry.parse(body)) for _ in range(100)]
+    )
+    report(
+        f'parse ({events} events per batch)',
+        [('events/s', f'{100 * events / elapsed:,.0f}')],
+    )
+
+    user = get_user_model().objects.create_user(email='bench@example.com')
+    client = APIClient()
+    client.force_authenticate(user)
+
+    with tempfile.TemporaryDirectory() as location, override_settings(
+        STORAGES={
+            'telemetry': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': location},
+            }
+        }
+    ):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(requests):
+            response, elapsed = timed(
+                client.post,
+                '/api/scores/telemetry/',
+                body,
+                content_type='application/octet-stream',
+            )
+            assert response.status_code == 202, response.content
+            latencies.append(elapsed)
+        telemetry.buffer.flush()
+        total = time.perf_counter() - start
+
+    report(
+        f'requests ({requests} x {events} events, {len(body):,} bytes)',
+        [
+            ('events/s', f'{requests * events / total:,.0f}'),
+            ('request p50 ms', f'{percentile(latencies, 50) * 1000:.2f}'),
+            ('request p99 ms', f'{percentile(latencies, 99) * 1000:.2f}'),
+            ('segments written', telemetry.buffer.sequence),
+        ],
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+'''
+Refresh endpoint latency with a populated revocation table.
+
+Compares the Bloom filter check in `users.revocation.is_revoked()` with a
+database lookup on every refresh. Each refresh rotates the token, so both
+pay for one insert; the filter saves the lookup.
+
+    python -m benchmarks.token_refresh [refreshes] [revoked tokens]
+'''
+
+import contextlib
+import sys
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from .utils import percentile, report, setup, timed
+
+
+def run(client, refreshes):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    latencies = []
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(refreshes):
+            response, elapsed = timed(client.post, '/jwt/refresh/')
+            assert response.status_code == 200, response.content
+            latencies.append(elapsed)
+    return latencies, len(queries) / refreshes
+
+
+def main():
+    refreshes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    revoked = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.test.utils import override_settings
+    from django.utils import timezone
+
+    from users.models import RevokedToken
+    from users.revocation import revocations
+
+    expires_at = timezone.now() + timedelta(days=1)
+    RevokedToken.objects.bulk_create(
+        (
+            RevokedToken(jti=uuid.uuid4().hex, expires_at=expires_at)
+            for _ in range(revoked)
+        ),
+        batch_size=5000,
+    )
+    revocations.sync(force=True)
+
+    with override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+    ):
+        get_user_model().objects.create_user(
+            email='refresh@example.com', password='password123'
+        )
+        client = Client()
+        client.post(
+            '/jwt/create/',
+            {'email': 'refresh@example.com', 'password': 'password123'},
+        )
+
+    def lookup(jti):
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    scenarios = [
+        ('bloom filter', contextlib.nullcontext()),
+        (
+            'lookup per refresh',
+            mock.patch('users.serializers.is_revoked', lookup),
+        ),
+    ]
+    for title, patch in scenarios:
+        with patch:
+            latencies, queries = run(client, refreshes)
+        report(
+            f'{title} ({refreshes} refreshes, {revoked} revoked tokens)',
+            [
+                ('p50 ms', f'{percentile(latencies, 50) * 1000:.2f}'),
+                ('p99 ms', f'{percentile(latencies, 99) * 1000:.2f}'),
+                ('queries per refresh', f'{queries:.1f}'),
+            ],
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+'''
+Shared helpers for the benchmark scripts in this package.
+
+Benchmarks run in-process against a throwaway test database, so they need
+no server or seeded data. Run them from the backend directory, e.g.:
+    python -m benchmarks.login_wave
+'''
+
+import os
+import time
+
+
+def setup(database=True):
+    '''Configure Django and, optionally, create an empty test database.'''
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+    # Keep request logs out of the results
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    import django
+
+    django.setup()
+    if not database:
+        return
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def timed(fn, *args, **kwargs):
+    '''Return `(result, elapsed seconds)` for one call.'''
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def report(title, rows):
+    '''Print `(label, value)` rows as an aligned table.'''
+    print(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f'  {label.ljust(width)}  {value}')
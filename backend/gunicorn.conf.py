@@ -0,0 +1,64 @@
+'''
+Gunicorn configuration, read automatically when gunicorn is started from
+this directory:
+
+    gunicorn main.wsgi
+
+The application is loaded once in the master (`preload_app`) and warmed by
+`main.boot.preload()`, so forked workers start ready to serve instead of
+each importing and resolving everything on its first request. Each worker
+then runs the warmup phases in `main.warmup` before it accepts connections.
+
+Workers are threaded (`gthread`): each serves up to `GUNICORN_THREADS`
+requests at once, so a burst of sign-ins queues on the password hashing
+pool (see users/hashers.py) while other requests keep being served, and
+the pool's 503s have something to shed. Every thread keeps its own
+persistent database connection, so a host opens up to
+`workers * (GUNICORN_THREADS + DASHBOARD_THREADS)` of them, counting the
+dashboard's query pool (see scores/dashboard.py), plus the background
+threads'.
+'''
+
+import multiprocessing
+import os
+
+preload_app = True
+workers = int(
+    os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)
+)
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+
+def when_ready(server):
+    from main.boot import preload
+
+    preload()
+
+
+def post_fork(server, worker):
+    # Never share the master's database sockets with a worker
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    # Runs before the worker accepts connections; see main/warmup.py
+    from django.db import connections
+
+    from main import warmup
+    from main.invalidation import bus
+    from main.profiling import profiler
+    from scores.rankings import refresher
+
+    # Evicts what other workers' writes made stale; see main/invalidation.py.
+    # Started first, so the caches that warmup fills are kept fresh
+    bus.start()
+    warmup.run()
+    # Connections are per thread, and this one never serves a request
+    connections.close_all()
+    # Picks up profiling sessions started from the admin
+    profiler.start()
+    # One worker per host writes the shared rankings; see scores/rankings.py
+    refresher.start()
@@ -1,4 +1,22 @@
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin
 from django.contrib.admin import AdminSite as DefaultAdminSite
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import storages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from .models import ProfileArtifact, ProfilingSession
 
 
 class AdminSite(DefaultAdminSite):
@@ -6,3 +24,185 @@ class AdminSite(DefaultAdminSite):
 
 
 admin_site = AdminSite(name="cosmic_tracer_api_admin")
+
+
+class EstimatedCountPaginator(Paginator):
+    '''
+    Paginator that reads row counts from the PostgreSQL planner instead of
+    running `SELECT COUNT(*)` over the whole changelist queryset.
+
+    Unfiltered querysets use the table's `pg_class.reltuples` statistic and
+    filtered ones use the row estimate from `EXPLAIN`. Small estimates (and
+    every other database vendor) fall back to an exact count.
+    '''
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+
+        if query.where:
+            estimate = self._explain_estimate(connection)
+        else:
+            estimate = self._reltuples_estimate(connection)
+
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+    def _reltuples_estimate(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [self.object_list.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been analyzed
+        if row is None or row[0] < 0:
+            return None
+        return row[0]
+
+    def _explain_estimate(self, connection):
+        queryset = self.object_list.order_by()
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class PerformanceAdminMixin:
+    '''
+    Changelist defaults for tables too large to count exactly on every page.
+    '''
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class SuperuserOnlyMixin:
+    '''Hides a model admin from everyone but superusers.'''
+
+    def has_module_permission(self, request):
+        return request.user.is_active and request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return self.has_module_permission(request)
+
+    def has_add_permission(self, request, obj=None):
+        return self.has_module_permission(request)
+
+    def has_change_permission(self, request, obj=None):
+        return self.has_module_permission(request)
+
+    def has_delete_permission(self, request, obj=None):
+        return self.has_module_permission(request)
+
+
+class ProfileArtifactInline(SuperuserOnlyMixin, admin.TabularInline):
+    model = ProfileArtifact
+    fields = ('worker', 'kind', 'label', 'samples', 'created_at', 'download')
+    readonly_fields = fields
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='File')
+    def download(self, artifact):
+        url = reverse(
+            f'{admin_site.name}:main_profileartifact_download',
+            args=[artifact.pk],
+        )
+        return format_html('<a href="{}">{}</a>', url, artifact.name)
+
+
+@admin.register(ProfilingSession, site=admin_site)
+class ProfilingSessionAdmin(SuperuserOnlyMixin, admin.ModelAdmin):
+    '''
+    Starts profiling on every web worker (see main/profiling.py). Sessions
+    can't be edited once saved, only stopped.
+    '''
+
+    list_display = (
+        '__str__',
+        'path',
+        'requests',
+        'remaining',
+        'created_by',
+        'created_at',
+        'expires_at',
+        'active',
+    )
+    list_filter = ('kind',)
+    fields = (
+        'kind',
+        'path',
+        'requests',
+        'duration',
+        'interval',
+        'remaining',
+        'created_by',
+        'created_at',
+        'expires_at',
+    )
+    inlines = [ProfileArtifactInline]
+    actions = ['stop']
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return ('remaining', 'created_by', 'created_at', 'expires_at')
+        return self.fields
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+            obj.remaining = obj.requests or 0
+            obj.expires_at = timezone.now() + timedelta(seconds=obj.duration)
+        super().save_model(request, obj, form, change)
+
+    @admin.display(boolean=True)
+    def active(self, session):
+        return session.expires_at > timezone.now() and (
+            not session.per_request or session.remaining > 0
+        )
+
+    @admin.action(description='Stop selected sessions')
+    def stop(self, request, queryset):
+        now = timezone.now()
+        stopped = queryset.filter(expires_at__gt=now).update(expires_at=now)
+        self.message_user(
+            request,
+            f'Stopped {stopped} sessions; workers finish them on '
+            'their next poll.',
+        )
+
+    def get_urls(self):
+        return [
+            path(
+                'artifacts/<int:pk>/',
+                self.admin_site.admin_view(self.download_view),
+                name='main_profileartifact_download',
+            ),
+            *super().get_urls(),
+        ]
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        artifact = get_object_or_404(ProfileArtifact, pk=pk)
+        return FileResponse(
+            storages['profiles'].open(artifact.name, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(artifact.name),
+        )
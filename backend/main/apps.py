@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MainConfig(AppConfig):
+    name = 'main'
+
+    def ready(self):
+        from . import boot, warmup
+
+        warmup.register('modules', boot.preload)
@@ -0,0 +1,34 @@
+'''
+Work done once before a worker serves traffic.
+
+Under gunicorn with `preload_app` (see gunicorn.conf.py) `preload()` runs in
+the master, so every forked worker starts with the URLconf resolved and the
+lazily imported integrations already in memory, shared copy-on-write.
+'''
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def lazy_integration_paths():
+    '''Integrations Django imports on first use from dotted-path settings.'''
+    yield from (storage['BACKEND'] for storage in settings.STORAGES.values())
+    yield settings.EMAIL_BACKEND
+    yield from settings.AUTHENTICATION_BACKENDS
+
+
+def preload():
+    '''
+    Import everything a first request would otherwise import. Only modules
+    are loaded: clients and connections are not fork-safe and are created
+    per worker on first use.
+    '''
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    get_resolver().url_patterns
+    for path in lazy_integration_paths():
+        import_string(path)
+    api_settings.DEFAULT_RENDERER_CLASSES
+    api_settings.DEFAULT_PARSER_CLASSES
+    api_settings.DEFAULT_AUTHENTICATION_CLASSES
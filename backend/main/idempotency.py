@@ -0,0 +1,242 @@
+'''
+`Idempotency-Key` support for unsafe API views.
+
+The first request with a key claims it by inserting an `IdempotencyRecord`,
+runs, and stores its response in the same transaction as the view's
+writes. Repeats with the same key and payload get the stored response
+without running the view; a repeat that arrives while the first is still
+running gets a 409 and a retry hint. A claim left in progress for
+`IDEMPOTENCY_LEASE` seconds (its worker died) can be claimed again. Keys
+are scoped to the authenticated user and expire after
+`IDEMPOTENCY_KEY_TTL` seconds.
+
+Stored responses are also kept in a small per-process LRU, so the
+common replay (a client retrying against the same worker) costs no query.
+
+https://datatracker.ietf.org/doc/draft-ietf-httpapi-idempotency-key-header/
+'''
+
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class ResponseCache:
+    '''LRU of `(user id, key) -> (expires, fingerprint, status, data)`.'''
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope):
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[scope]
+                return None
+            self._entries.move_to_end(scope)
+            return entry[1:]
+
+    def set(self, scope, fingerprint, status_code, data, ttl):
+        with self._lock:
+            self._entries[scope] = (
+                time.monotonic() + ttl,
+                fingerprint,
+                status_code,
+                data,
+            )
+            self._entries.move_to_end(scope)
+            while len(self._entries) > settings.IDEMPOTENCY_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+responses = ResponseCache()
+
+
+def fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps(
+        [request.method, request.path, data], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay(status_code, data):
+    response = Response(data, status=status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def error(status_code, code, message):
+    return Response(
+        {'success': False, 'error': code, 'message': message},
+        status=status_code,
+    )
+
+
+def mismatch():
+    return error(
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        'idempotency_key_reused',
+        f'{HEADER} was already used for a different request',
+    )
+
+
+def remember(scope, record):
+    ttl = (record.expires_at - timezone.now()).total_seconds()
+    if ttl > 0:
+        responses.set(
+            scope, record.fingerprint, record.status_code, record.data, ttl
+        )
+
+
+def release(user, key):
+    IdempotencyRecord.objects.filter(
+        user=user, key=key, status_code__isnull=True
+    ).delete()
+
+
+def claim(user, key, request_fingerprint):
+    '''
+    Insert the in-progress record for `key`, or return the existing one.
+    '''
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    abandoned = now - timedelta(seconds=settings.IDEMPOTENCY_LEASE)
+    records = IdempotencyRecord.objects.filter(user=user, key=key)
+    for _ in range(2):
+        record = records.first()
+        if record is not None:
+            if record.expires_at > now and (
+                record.status_code is not None or record.created_at > abandoned
+            ):
+                return record
+            records.filter(
+                Q(expires_at__lte=now)
+                | Q(status_code__isnull=True, created_at__lte=abandoned)
+            ).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    user=user,
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    expires_at=expires_at,
+                )
+            return None
+        except IntegrityError:
+            continue  # Claimed concurrently: read the winner's record
+    # Still contended: report it as in progress
+    return IdempotencyRecord(
+        user=user, key=key, fingerprint=request_fingerprint
+    )
+
+
+def idempotent(view_method):
+    '''
+    Make an APIView handler honour the `Idempotency-Key` header. Requests
+    without the header, or from anonymous users, run as before.
+    '''
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return error(
+                status.HTTP_400_BAD_REQUEST,
+                'invalid_idempotency_key',
+                f'{HEADER} must be 1 to 255 characters',
+            )
+
+        scope = (request.user.pk, key)
+        request_fingerprint = fingerprint(request)
+
+        cached = responses.get(scope)
+        if cached is not None:
+            stored_fingerprint, status_code, data = cached
+            if stored_fingerprint != request_fingerprint:
+                return mismatch()
+            return replay(status_code, data)
+
+        record = claim(request.user, key, request_fingerprint)
+        if record is not None:
+            if record.fingerprint != request_fingerprint:
+                return mismatch()
+            if record.status_code is None:
+                response = error(
+                    status.HTTP_409_CONFLICT,
+                    'request_in_progress',
+                    'A request with this key is still being processed',
+                )
+                response['Retry-After'] = '1'
+                return response
+            remember(scope, record)
+            return replay(record.status_code, record.data)
+
+        try:
+            # Stored with the view's writes, so neither commits without
+            # the other
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    # Nor does a failed request leave writes behind
+                    transaction.set_rollback(True)
+                else:
+                    IdempotencyRecord.objects.filter(
+                        user=request.user, key=key
+                    ).update(
+                        status_code=response.status_code, data=response.data
+                    )
+        except BaseException:
+            release(request.user, key)
+            raise
+        if response.status_code >= 500:
+            # Not a result: let the client retry with the same key
+            release(request.user, key)
+            return response
+
+        responses.set(
+            scope,
+            request_fingerprint,
+            response.status_code,
+            response.data,
+            settings.IDEMPOTENCY_KEY_TTL,
+        )
+        return response
+
+    return wrapper
+
+
+def prune_expired(batch_size=10000):
+    '''Delete expired records in batches; return how many were removed.'''
+    expired = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now())
+    deleted = 0
+    while pks := list(expired.values_list('pk', flat=True)[:batch_size]):
+        deleted += IdempotencyRecord.objects.filter(pk__in=pks).delete()[0]
+    return deleted
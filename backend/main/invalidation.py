@@ -0,0 +1,348 @@
+'''
+Per-process caches of score-derived reads, kept fresh across workers and
+hosts by invalidation events.
+
+Cache entries carry tags such as `top`, `group:<id>` or `user:<id>`. A
+write calls `invalidate(*tags)`. Once its transaction commits, this
+process evicts every entry with one of those tags, and the `bus` sends the
+tags to every other worker, which evicts them too. Entries also expire
+after `SCORE_CACHE_TTL` seconds, in case an event is lost.
+
+On PostgreSQL, events are sent with NOTIFY on `INVALIDATION_CHANNEL`, and
+a listener thread in each worker keeps a LISTEN connection open. On other
+databases, events are `InvalidationEvent` rows, which the listener polls
+for every `INVALIDATION_POLL_INTERVAL` seconds. A listener that loses its
+connection evicts everything, since it may have missed events.
+
+Events are sent from a background thread, so writes do not wait for them.
+Tags invalidated while an event is being sent go out together in the next
+one, so a burst of writes costs a few events rather than one per write.
+A read that started before an eviction does not store its result, so a
+slow read cannot put an evicted value back.
+'''
+
+import atexit
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    close_old_connections,
+    connection,
+    connections,
+    router,
+    transaction,
+)
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import InvalidationEvent
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD = 7000
+
+# Polled events are deleted once they are this many seconds old
+EVENT_RETENTION = 60
+
+caches = []
+
+
+class LocalCache:
+    '''A tagged LRU cache in this process's memory.'''
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        # key: (expires, tags, value), least recently used first
+        self.entries = OrderedDict()
+        # tag: keys of the entries that carry it
+        self.tagged = {}
+        # Bumped by every eviction, to spot reads that overlapped one
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        caches.append(self)
+
+    def get(self, key, fill):
+        '''
+        The cached value for `key`, or the value from `fill()`, which
+        returns `(value, tags)`.
+        '''
+        # Reads in a transaction may see writes that are not committed
+        if not settings.SCORE_CACHE_SIZE or connection.in_atomic_block:
+            return fill()[0]
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            generation = self.generation
+        value, tags = fill()
+        with self.lock:
+            if self.generation == generation:
+                self._remove(key)
+                self.entries[key] = (
+                    now + settings.SCORE_CACHE_TTL,
+                    tuple(tags),
+                    value,
+                )
+                for tag in tags:
+                    self.tagged.setdefault(tag, set()).add(key)
+                while len(self.entries) > settings.SCORE_CACHE_SIZE:
+                    self._remove(next(iter(self.entries)))
+        return value
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self.tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self.tagged[tag]
+
+    def evict(self, tags):
+        '''Drop the entries carrying any of `tags`.'''
+        with self.lock:
+            self.generation += 1
+            for tag in tags:
+                for key in list(self.tagged.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.tagged.clear()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def user_tag(user_id):
+    '''The tag of entries that show this user's data.'''
+    return f'user:{user_id}'
+
+
+def evict(tags):
+    '''Evict `tags` from every cache in this process.'''
+    for cache in caches:
+        cache.evict(tags)
+
+
+def evict_all():
+    for cache in caches:
+        cache.clear()
+
+
+def invalidate(*tags, using=None):
+    '''Evict `tags` everywhere once the current transaction commits.'''
+    if not settings.SCORE_CACHE_SIZE or not tags:
+        return
+
+    def committed():
+        evict(tags)
+        bus.publish(tags)
+
+    transaction.on_commit(committed, using=using)
+
+
+def payloads(tags):
+    '''`tags` joined by spaces, split to fit in NOTIFY payloads.'''
+    payload = ''
+    for tag in sorted(tags):
+        if payload and len(payload) + 1 + len(tag) >= MAX_PAYLOAD:
+            yield payload
+            payload = ''
+        payload = f'{payload} {tag}' if payload else tag
+    if payload:
+        yield payload
+
+
+def sender_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class Bus:
+    '''Sends this process's invalidations and applies everyone else's.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.wakeup = threading.Event()
+        self.publisher = None
+        self.listener = None
+        # Set while the listener receives events
+        self.listening = threading.Event()
+        self.sender = sender_id()
+        self.pruned_at = 0
+
+    def publish(self, tags):
+        with self.lock:
+            self.pending.update(tags)
+            if self.publisher is None:
+                self.publisher = threading.Thread(
+                    target=self._publish_forever,
+                    name='cache-invalidation-publisher',
+                    daemon=True,
+                )
+                self.publisher.start()
+                # Commands exit soon after their last write
+                atexit.register(self.flush)
+        self.wakeup.set()
+
+    def _publish_forever(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception('Publishing cache invalidations failed')
+                connections.close_all()
+                time.sleep(settings.INVALIDATION_POLL_INTERVAL)
+
+    def flush(self):
+        '''Send the pending tags.'''
+        with self.lock:
+            tags, self.pending = self.pending, set()
+        if not tags:
+            return
+        try:
+            self.send(tags)
+        except Exception:
+            with self.lock:
+                self.pending.update(tags)
+            self.wakeup.set()
+            raise
+
+    def send(self, tags):
+        db = connections[router.db_for_write(InvalidationEvent)]
+        if db.vendor == 'postgresql':
+            with db.cursor() as cursor:
+                for payload in payloads(tags):
+                    cursor.execute(
+                        'SELECT pg_notify(%s, %s)',
+                        [
+                            settings.INVALIDATION_CHANNEL,
+                            f'{self.sender} {payload}',
+                        ],
+                    )
+            return
+        InvalidationEvent.objects.bulk_create(
+            InvalidationEvent(sender=self.sender, tags=payload)
+            for payload in payloads(tags)
+        )
+        if time.monotonic() - self.pruned_at > EVENT_RETENTION:
+            self.pruned_at = time.monotonic()
+            InvalidationEvent.objects.filter(
+                created_at__lt=timezone.now()
+                - timedelta(seconds=EVENT_RETENTION)
+            ).delete()
+
+    def receive(self, sender, tags):
+        # This process evicted its own tags when it sent them
+        if sender != self.sender:
+            evict(tags.split())
+
+    def start(self):
+        '''Start applying other processes' invalidations.'''
+        if not settings.SCORE_CACHE_SIZE or self.listener is not None:
+            return
+        self.listener = threading.Thread(
+            target=self._listen_forever,
+            name='cache-invalidation-listener',
+            daemon=True,
+        )
+        self.listener.start()
+
+    def _listen_forever(self):
+        while True:
+            db = connections[router.db_for_read(InvalidationEvent)]
+            try:
+                if db.vendor == 'postgresql':
+                    self.listen(db)
+                else:
+                    self.poll()
+            except Exception:
+                logger.exception('Cache invalidation listener failed')
+            finally:
+                self.listening.clear()
+                connections.close_all()
+            # Events sent while it was down are lost
+            evict_all()
+            time.sleep(settings.INVALIDATION_POLL_INTERVAL)
+
+    def listen(self, db):
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+        db.ensure_connection()
+        with db.cursor() as cursor:
+            cursor.execute(
+                f'LISTEN {db.ops.quote_name(settings.INVALIDATION_CHANNEL)}'
+            )
+        # Entries cached before the LISTEN may have missed events
+        evict_all()
+        self.listening.set()
+        raw = db.connection
+        if is_psycopg3:
+            for notify in raw.notifies():
+                self.receive(*notify.payload.split(' ', 1))
+            return
+        while True:
+            select.select([raw], [], [])
+            raw.poll()
+            while raw.notifies:
+                self.receive(*raw.notifies.pop(0).payload.split(' ', 1))
+
+    def poll(self):
+        last = InvalidationEvent.objects.aggregate(last=Max('pk'))['last']
+        evict_all()
+        self.listening.set()
+        while True:
+            time.sleep(settings.INVALIDATION_POLL_INTERVAL)
+            last = self.poll_once(last or 0)
+
+    def poll_once(self, last):
+        '''Apply the events after `last`; return the last one's pk.'''
+        for pk, sender, tags in (
+            InvalidationEvent.objects.filter(pk__gt=last)
+            .order_by('pk')
+            .values_list('pk', 'sender', 'tags')
+        ):
+            self.receive(sender, tags)
+            last = pk
+        return last
+
+
+bus = Bus()
+
+
+def _after_fork():
+    # Neither the threads nor their pending work are the child's
+    for cache in caches:
+        cache.lock = threading.Lock()
+    bus.lock = threading.Lock()
+    bus.wakeup = threading.Event()
+    bus.pending = set()
+    bus.publisher = None
+    bus.listener = None
+    bus.listening = threading.Event()
+    bus.sender = sender_id()
+
+
+os.register_at_fork(after_in_child=_after_fork)
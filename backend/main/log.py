@@ -0,0 +1,285 @@
+'''
+Logging that stays off the request path.
+
+`QueuedStreamHandler` puts records on a bounded in-memory queue and a
+writer thread formats and writes them; when the queue is full records are
+dropped (and counted) rather than blocking a request. `JSONFormatter`
+writes one JSON object per line with the record's `extra` fields. Only the
+message's `%` arguments are merged in the request thread, so a queued
+record holds no references to mutable or request-bound objects; nothing
+is serialized there, and `lazy()` defers computing a field until the
+writer gets to it.
+
+`SamplingFilter` keeps a fraction of a chatty logger's records and/or caps
+them per second, and `RequestIdFilter` stamps every record with the id
+`RequestIdMiddleware` gave the current request (from `X-Request-ID` when
+the proxy sends one).
+'''
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+import weakref
+from datetime import datetime, timezone
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every `LogRecord` has; anything else came from `extra`
+RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord('', 0, '', 0, '', (), None))
+) | {'message', 'asctime', 'request_id'}
+
+# Accepted incoming ids; anything else is replaced
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class lazy:
+    '''A log field computed by the writer thread, if the record is kept.'''
+
+    __slots__ = ('fn', 'args')
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def __call__(self):
+        return self.fn(*self.args)
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRS:
+                entry[key] = value() if isinstance(value, lazy) else value
+        if record.exc_info:
+            entry['exception'] = ''.join(
+                traceback.format_exception(*record.exc_info)
+            )
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return dumps(entry)
+
+
+def dumps(entry):
+    if orjson is not None:
+        return orjson.dumps(
+            entry, default=str, option=orjson.OPT_UTC_Z
+        ).decode()
+    return json.dumps(entry, default=str)
+
+
+class QueuedStreamHandler(logging.Handler):
+    '''
+    A `StreamHandler` whose formatting and writing happen on a background
+    thread. `emit()` only enqueues the record; up to `queue_size` records
+    wait, and the rest are dropped with a count reported by the writer.
+    '''
+
+    _instances = weakref.WeakSet()
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__()
+        self.stream = stream or sys.stderr
+        self.queue_size = queue_size
+        self._instances.add(self)
+        self._reset()
+
+    def _reset(self):
+        self.queue = queue.SimpleQueue()
+        self.pending = 0
+        self.dropped = 0
+        self.thread = None
+        self.stopped = False
+        self.counter_lock = threading.Lock()
+        self.flushed = threading.Condition(threading.Lock())
+
+    def emit(self, record):
+        with self.counter_lock:
+            if self.pending >= self.queue_size:
+                self.dropped += 1
+                return
+            self.pending += 1
+        try:
+            self.prepare(record)
+        except Exception:
+            with self.counter_lock:
+                self.pending -= 1
+            self.handleError(record)
+            return
+        self.queue.put(record)
+        if self.thread is None:
+            self._start()
+
+    def prepare(self, record):
+        '''
+        Detach `record` from objects that may change or stay alive while it
+        waits, as `logging.handlers.QueueHandler.prepare()` does.
+        '''
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # The traceback's frames hold their locals, requests included
+            record.exc_text = ''.join(
+                traceback.format_exception(*record.exc_info)
+            )
+            record.exc_info = None
+        # Added by Django's request loggers
+        record.__dict__.pop('request', None)
+
+    def _start(self):
+        with self.counter_lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self._write_forever, name='log-writer', daemon=True
+            )
+            self.thread.start()
+
+    def _write_forever(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                return
+            self.write(record)
+            with self.counter_lock:
+                self.pending -= 1
+                dropped, self.dropped = self.dropped, 0
+                idle = not self.pending
+            if dropped:
+                self.write(self._dropped_record(dropped))
+            if idle:
+                with self.flushed:
+                    self.flushed.notify_all()
+
+    def write(self, record):
+        try:
+            self.stream.write(self.format(record) + '\n')
+            self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def _dropped_record(self, count):
+        return logging.LogRecord(
+            __name__,
+            logging.WARNING,
+            __file__,
+            0,
+            'Dropped %d log records: the queue was full',
+            (count,),
+            None,
+        )
+
+    def flush(self, timeout=5):
+        '''Wait until every queued record has been written.'''
+        deadline = time.monotonic() + timeout
+        with self.flushed:
+            while self.pending and self.thread is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.thread.is_alive():
+                    break
+                self.flushed.wait(remaining)
+
+    def close(self):
+        if not self.stopped:
+            self.stopped = True
+            self.flush()
+            if self.thread is not None:
+                self.queue.put(None)
+        super().close()
+
+
+def _after_fork():
+    # The writer thread stays in the parent, which also writes the records
+    # it had queued
+    for handler in list(QueuedStreamHandler._instances):
+        handler._reset()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+@atexit.register
+def _flush_all():
+    for handler in list(QueuedStreamHandler._instances):
+        handler.flush()
+
+
+class SamplingFilter(logging.Filter):
+    '''
+    Keeps `rate` (0-1) of the records below `WARNING` and at most
+    `per_second` of them in any second; warnings and errors always pass.
+    '''
+
+    def __init__(self, rate=1.0, per_second=None):
+        super().__init__()
+        self.rate = rate
+        self.per_second = per_second
+        self.window = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.rate < 1 and random.random() >= self.rate:
+            return False
+        if self.per_second is None:
+            return True
+        window = int(time.monotonic())
+        with self.lock:
+            if window != self.window:
+                self.window, self.count = window, 0
+            self.count += 1
+            return self.count <= self.per_second
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class RequestIdMiddleware:
+    '''
+    Gives each request an id, taken from a well-formed `X-Request-ID` or
+    generated, for its log records and the response's `X-Request-ID`.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get('X-Request-ID', '')
+        value = incoming if REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        token = request_id.set(value)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response.headers['X-Request-ID'] = value
+        return response
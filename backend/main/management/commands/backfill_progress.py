@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main.models import BackfillProgress
+
+
+def describe(progress, now):
+    '''One line of the report for `progress`.'''
+    if progress.finished_at is not None:
+        state = f'done at {progress.finished_at:%Y-%m-%d %H:%M:%S}'
+        elapsed = (progress.finished_at - progress.started_at).total_seconds()
+    else:
+        elapsed = (now - progress.started_at).total_seconds()
+        idle = (now - progress.updated_at).total_seconds()
+        fraction = progress.fraction
+        if fraction and elapsed:
+            remaining = elapsed * (1 - fraction) / fraction
+            state = f'about {remaining:.0f}s left'
+        else:
+            state = 'starting'
+        if idle > 60:
+            state += f', idle for {idle:.0f}s'
+    rate = progress.scanned / elapsed if elapsed > 0 else 0
+    return (
+        f'{progress.name:<32} {progress.fraction:>6.1%} '
+        f'{progress.scanned:>12,} {progress.updated:>12,} '
+        f'{rate:>10,.0f}  {state}'
+    )
+
+
+class Command(BaseCommand):
+    help = 'Show how far each `Backfill` migration operation has got.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            type=float,
+            metavar='SECONDS',
+            help='Report again every SECONDS until every backfill is done.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            backfills = list(BackfillProgress.objects.order_by('started_at'))
+            if not backfills:
+                self.stdout.write('No backfills have run')
+                return
+            now = timezone.now()
+            self.stdout.write(
+                f'{"backfill":<32} {"done":>6} {"scanned":>12} '
+                f'{"updated":>12} {"rows/s":>10}  state'
+            )
+            for progress in backfills:
+                self.stdout.write(describe(progress, now))
+            if options['watch'] is None or all(
+                progress.finished_at is not None for progress in backfills
+            ):
+                return
+            time.sleep(options['watch'])
+            self.stdout.write('')
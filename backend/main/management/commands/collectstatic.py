@@ -0,0 +1,19 @@
+from django.contrib.staticfiles.management.commands import collectstatic
+
+from main.storages import PrecompressedManifestMixin
+
+
+class Command(collectstatic.Command):
+    def delete_file(self, path, prefixed_path, source_storage):
+        # These storages skip unchanged content by digest when it is saved,
+        # so every file is saved, instead of comparing modified times with
+        # one request per file
+        if not isinstance(self.storage, PrecompressedManifestMixin):
+            return super().delete_file(path, prefixed_path, source_storage)
+        if self.storage.exists(prefixed_path):
+            if self.dry_run:
+                self.log(f"Pretending to delete '{path}'")
+            else:
+                self.log(f"Deleting '{path}'")
+                self.storage.delete(prefixed_path)
+        return True
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+# What a gunicorn/uvicorn worker imports before it can serve a request
+BOOT = '''
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+from main.wsgi import application
+'''
+
+# Imported on first use; a boot that pulls these in has lost its laziness
+LAZY_MODULES = (
+    'boto3',
+    'botocore',
+    'django_ses',
+    'storages.backends.s3boto3',
+    'social_core.backends.google',
+)
+
+
+def parse_importtime(stderr):
+    '''Yield `(module, self_us, cumulative_us)` from `-X importtime`.'''
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, module = line[12:].split('|')
+        if not self_us.strip().isdigit():
+            continue  # the column header
+        yield module.strip(), int(self_us), int(cumulative_us)
+
+
+class Command(BaseCommand):
+    help = (
+        'Boot Django in a fresh interpreter with `-X importtime` and report '
+        'the most expensive imports.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=25,
+            help='Number of imports to list.',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=('cumulative', 'self'),
+            default='cumulative',
+            help='Rank by time including or excluding sub-imports.',
+        )
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'main.settings'
+            ),
+        }
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        imports = list(parse_importtime(result.stderr))
+        index = 1 if options['sort'] == 'self' else 2
+        imports.sort(key=lambda row: row[index], reverse=True)
+
+        self.stdout.write(f'{"self ms":>9} {"total ms":>9}  module')
+        for module, self_us, cumulative_us in imports[: options['limit']]:
+            self.stdout.write(
+                f'{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {module}'
+            )
+
+        imported = {module for module, _, _ in imports}
+        eager = [module for module in LAZY_MODULES if module in imported]
+        self.stdout.write(
+            f'\n{len(imports)} modules imported; boot took {elapsed:.2f}s '
+            '(including interpreter startup)'
+        )
+        if eager:
+            self.stdout.write(
+                self.style.WARNING(
+                    'Imported at boot but expected on first use: '
+                    + ', '.join(eager)
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS('No lazy integrations imported at boot')
+            )
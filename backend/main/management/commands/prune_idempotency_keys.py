@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from main.idempotency import prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete stored idempotent responses whose keys have expired.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows deleted per query.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_expired(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {deleted} expired idempotency keys')
+        )
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from main.purge import Purge, inactive_users, purge_scores, purge_users
+from scores.models import Score
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete accounts or rejected scores in small batches, pausing '
+        'between them to leave room for live traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            action='append',
+            default=[],
+            help='Delete this account (repeatable).',
+        )
+        parser.add_argument(
+            '--inactive-days',
+            type=int,
+            help='Delete non-staff accounts unused for this many days.',
+        )
+        parser.add_argument(
+            '--rejected-scores',
+            action='store_true',
+            help='Delete scores whose replay was rejected.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help='Rows deleted per transaction.',
+        )
+        parser.add_argument(
+            '--duty-cycle',
+            type=float,
+            default=settings.PURGE_DUTY_CYCLE,
+            help='Share of the time spent deleting (0-1]; 1 never pauses.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would be deleted without deleting it.',
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['duty_cycle'] <= 1:
+            raise CommandError('--duty-cycle must be in (0, 1].')
+
+        User = get_user_model()
+        targets = []
+        if options['email']:
+            targets.append(
+                (purge_users, User.objects.filter(email__in=options['email']))
+            )
+        if options['inactive_days'] is not None:
+            targets.append(
+                (purge_users, inactive_users(options['inactive_days']))
+            )
+        if options['rejected_scores']:
+            targets.append(
+                (
+                    purge_scores,
+                    Score.objects.filter(status=Score.Status.REJECTED),
+                )
+            )
+        if not targets:
+            raise CommandError(
+                'Pass --email, --inactive-days or --rejected-scores.'
+            )
+
+        purge_options = {
+            'batch_size': options['batch_size'],
+            'duty_cycle': options['duty_cycle'],
+        }
+        for purge, queryset in targets:
+            if options['dry_run']:
+                counts = Purge(**purge_options).count(queryset)
+                verb = 'Would delete'
+            else:
+                counts = purge(queryset, **purge_options)
+                verb = 'Deleted'
+            summary = ', '.join(
+                f'{count} {label}'
+                for label, count in sorted(counts.items())
+                if count
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f'{verb} {summary or "nothing"}')
+            )
@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.http import HttpResponse
+from django.middleware import clickjacking, csrf
+from django.utils.cache import get_max_age, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from users.hashers import PasswordHashingBusy
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def compress(content, coding):
+    if coding == 'br':
+        # Quality 5 keeps dynamic responses fast while beating gzip's ratio
+        return brotli.compress(content, quality=5)
+    return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+def negotiate_encoding(accept_encoding):
+    '''Return the best supported coding from an `Accept-Encoding` header.'''
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match[1])
+            except ValueError:
+                continue
+        accepted[coding.strip().lower()] = quality
+
+    supported = ('br', 'gzip') if brotli else ('gzip',)
+    candidates = [
+        coding
+        for coding in supported
+        if accepted.get(coding, accepted.get('*', 0)) > 0
+    ]
+    return candidates[0] if candidates else None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    '''
+    Brotli (when installed) or gzip compression for responses of at least
+    `COMPRESSION_MIN_SIZE` bytes.
+
+    Only responses to safe methods are compressed, which keeps
+    token-bearing login and refresh bodies out of reach of BREACH-style
+    attacks. Bodies of cacheable responses (a `Cache-Control` max-age) are
+    compressed once and reused from a small LRU keyed by content digest.
+
+    https://github.com/django/django/blob/main/django/middleware/gzip.py
+    '''
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or request.method not in ('GET', 'HEAD')
+            or response.has_header('Content-Encoding')
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        coding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if coding is None:
+            return response
+
+        if get_max_age(response):
+            compressed = self.cached_compress(response.content, coding)
+        else:
+            compressed = compress(response.content, coding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = coding
+
+        # Compressed bodies need a weak ETag (RFC 9110 Section 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        return response
+
+    @classmethod
+    def cached_compress(cls, content, coding):
+        key = (coding, hashlib.blake2b(content, digest_size=16).digest())
+        with cls._cache_lock:
+            compressed = cls._cache.get(key)
+            if compressed is not None:
+                cls._cache.move_to_end(key)
+                return compressed
+
+        compressed = compress(content, coding)
+        with cls._cache_lock:
+            cls._cache[key] = compressed
+            while len(cls._cache) > settings.COMPRESSION_CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return compressed
+
+
+class PasswordHashingBusyMiddleware(MiddlewareMixin):
+    '''
+    A 503 with `Retry-After` when a view outside DRF, such as the admin
+    login, finds the password hashing pool full (see users/hashers.py).
+    DRF views answer the same way through their own exception handler.
+    '''
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, PasswordHashingBusy):
+            return None
+        response = HttpResponse(
+            str(exception.detail),
+            status=exception.status_code,
+            content_type='text/plain; charset=utf-8',
+        )
+        response.headers['Retry-After'] = str(exception.wait)
+        return response
+
+
+def skip_on_lean_paths(middleware_class):
+    '''
+    Return a subclass of `middleware_class` that passes requests for
+    `LEAN_MIDDLEWARE_PATHS` straight through, so JWT-authenticated API
+    routes skip the session, CSRF and messages machinery while `/admin/`
+    keeps the full chain.
+    '''
+
+    def __call__(self, request):
+        if request.path_info.startswith(settings.LEAN_MIDDLEWARE_PATHS):
+            return self.get_response(request)
+        return middleware_class.__call__(self, request)
+
+    attrs = {'__call__': __call__, '__module__': __name__}
+
+    if hasattr(middleware_class, 'process_view'):
+
+        def process_view(self, request, *args, **kwargs):
+            if request.path_info.startswith(settings.LEAN_MIDDLEWARE_PATHS):
+                return None
+            return middleware_class.process_view(
+                self, request, *args, **kwargs
+            )
+
+        attrs['process_view'] = process_view
+
+    return type(middleware_class.__name__, (middleware_class,), attrs)
+
+
+SessionMiddleware = skip_on_lean_paths(sessions_middleware.SessionMiddleware)
+CsrfViewMiddleware = skip_on_lean_paths(csrf.CsrfViewMiddleware)
+AuthenticationMiddleware = skip_on_lean_paths(
+    auth_middleware.AuthenticationMiddleware
+)
+MessageMiddleware = skip_on_lean_paths(messages_middleware.MessageMiddleware)
+XFrameOptionsMiddleware = skip_on_lean_paths(
+    clickjacking.XFrameOptionsMiddleware
+)
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.3 on 2026-10-19 13:52
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilingSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cpu', 'CPU (sampling)'), ('memory', 'Memory (tracemalloc)')], default='cpu', max_length=16)),
+                ('path', models.CharField(blank=True, help_text='Only profile requests whose path starts with this', max_length=255)),
+                ('requests', models.PositiveIntegerField(blank=True, help_text='Profile this many requests, across all workers; leave empty to profile for the whole duration', null=True)),
+                ('remaining', models.PositiveIntegerField(default=0, editable=False)),
+                ('duration', models.PositiveIntegerField(default=60, help_text='Seconds until the session ends', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(3600)])),
+                ('interval', models.PositiveSmallIntegerField(default=5, help_text='Milliseconds between stack samples', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1000)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True, editable=False)),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProfileArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('collapsed', 'Collapsed stacks'), ('pstats', 'pstats'), ('snapshot', 'tracemalloc snapshot'), ('diff', 'Snapshot diff')], max_length=16)),
+                ('name', models.CharField(help_text='Storage path', max_length=255)),
+                ('worker', models.CharField(help_text='host-pid', max_length=255)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='main.profilingsession')),
+            ],
+            options={
+                'ordering': ['created_at', 'pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-19 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_rate_limit_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('first_pk', models.BigIntegerField(null=True)),
+                ('last_pk', models.BigIntegerField(help_text='The last primary key backfilled', null=True)),
+                ('max_pk', models.BigIntegerField(help_text='The highest primary key when the backfill began', null=True)),
+                ('scanned', models.BigIntegerField(default=0)),
+                ('updated', models.BigIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'backfill progress',
+            },
+        ),
+    ]
@@ -0,0 +1,204 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class IdempotencyRecord(models.Model):
+    '''
+    The stored response to a request sent with an `Idempotency-Key`.
+
+    A row without a `status_code` is a request still in progress.
+    '''
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(
+        max_length=64, help_text='SHA-256 of the method, path and body'
+    )
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'], name='unique_idempotency_key'
+            ),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class RateLimitCounter(models.Model):
+    '''
+    Requests charged to one rate-limit bucket during one period, summed
+    across processes (see main/ratelimit.py).
+    '''
+
+    key = models.CharField(max_length=255)
+    period = models.BigIntegerField(help_text='Unix time // RATE_LIMIT_PERIOD')
+    used = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'key'], name='unique_rate_limit_period_key'
+            ),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class BackfillProgress(models.Model):
+    '''
+    How far a `Backfill` migration operation has got (see
+    main/operations.py), so an interrupted backfill resumes where it
+    stopped.
+    '''
+
+    name = models.CharField(max_length=255, unique=True)
+    first_pk = models.BigIntegerField(null=True)
+    last_pk = models.BigIntegerField(
+        null=True, help_text='The last primary key backfilled'
+    )
+    max_pk = models.BigIntegerField(
+        null=True, help_text='The highest primary key when the backfill began'
+    )
+    scanned = models.BigIntegerField(default=0)
+    updated = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'backfill progress'
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def fraction(self):
+        '''How much of the primary key range is done, from 0 to 1.'''
+        if self.finished_at is not None:
+            return 1.0
+        if self.last_pk is None or self.max_pk is None:
+            return 0.0
+        span = self.max_pk - self.first_pk + 1
+        return min(1.0, (self.last_pk - self.first_pk + 1) / span)
+
+
+class InvalidationEvent(models.Model):
+    '''
+    Cache invalidation tags sent by one process, polled by every other
+    where PostgreSQL NOTIFY is not available (see main/invalidation.py).
+    '''
+
+    sender = models.CharField(max_length=255)
+    tags = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.tags
+
+
+class ProfilingSession(models.Model):
+    '''
+    A request to profile the web workers, picked up by each worker's
+    `main.profiling` poller.
+
+    CPU sessions sample stacks either for the next `requests` requests
+    under `path` or, without `requests`, in every thread until the session
+    expires. Memory sessions trace allocations with `tracemalloc` for the
+    session's duration and diff snapshots taken at its start and end.
+    '''
+
+    class Kind(models.TextChoices):
+        CPU = 'cpu', _('CPU (sampling)')
+        MEMORY = 'memory', _('Memory (tracemalloc)')
+
+    kind = models.CharField(
+        max_length=16, choices=Kind.choices, default=Kind.CPU
+    )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text='Only profile requests whose path starts with this',
+    )
+    requests = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Profile this many requests, across all workers; leave '
+        'empty to profile for the whole duration',
+    )
+    remaining = models.PositiveIntegerField(default=0, editable=False)
+    duration = models.PositiveIntegerField(
+        default=60,
+        validators=[MinValueValidator(1), MaxValueValidator(60 * 60)],
+        help_text='Seconds until the session ends',
+    )
+    interval = models.PositiveSmallIntegerField(
+        default=5,
+        validators=[MinValueValidator(1), MaxValueValidator(1000)],
+        help_text='Milliseconds between stack samples',
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.get_kind_display()} profile #{self.pk}'
+
+    def clean(self):
+        if self.kind == self.Kind.MEMORY and self.requests:
+            raise ValidationError(
+                {'requests': _('Memory profiles cover a time window.')}
+            )
+
+    @property
+    def per_request(self):
+        return self.kind == self.Kind.CPU and self.requests is not None
+
+
+class ProfileArtifact(models.Model):
+    '''A file one worker wrote to the `profiles` storage for a session.'''
+
+    class Kind(models.TextChoices):
+        COLLAPSED = 'collapsed', _('Collapsed stacks')
+        PSTATS = 'pstats', _('pstats')
+        SNAPSHOT = 'snapshot', _('tracemalloc snapshot')
+        DIFF = 'diff', _('Snapshot diff')
+
+    session = models.ForeignKey(
+        ProfilingSession, on_delete=models.CASCADE, related_name='artifacts'
+    )
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    name = models.CharField(max_length=255, help_text='Storage path')
+    worker = models.CharField(max_length=255, help_text='host-pid')
+    label = models.CharField(max_length=255, blank=True)
+    samples = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'pk']
+
+    def __str__(self):
+        return self.name
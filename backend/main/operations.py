@@ -0,0 +1,287 @@
+'''
+Migration operations for changing large tables without long locks.
+
+On PostgreSQL:
+
+- `AddIndexConcurrently` and `RemoveIndexConcurrently` build and drop
+  indexes without blocking writes. A build that failed part way leaves an
+  invalid index behind, which is dropped before trying again.
+- `Backfill` fills a new nullable column in batches of primary keys, one
+  short transaction per batch, pausing between batches so the database is
+  busy for at most `duty_cycle` of the time. Its `BackfillProgress` row
+  records the last primary key done, so running the migration again after
+  an interruption carries on from there. `python manage.py
+  backfill_progress` shows how far each backfill has got.
+- `AddConstraintNotValid` adds a check constraint that only applies to
+  new writes, and `ValidateConstraint` later checks existing rows while
+  allowing reads and writes.
+
+Elsewhere (SQLite in development and tests) they run as the plain
+operations: a regular index, an immediately validated constraint. Migrations
+that use the concurrent operations or `Backfill` must set `atomic = False`,
+and migrations that use `Backfill` must depend on
+`('main', '0004_backfill_progress')`.
+
+A column that must end up NOT NULL is added in steps, with code that
+writes it deployed before the backfill:
+
+    migrations.AddField('score', 'bonus', models.IntegerField(null=True)),
+    Backfill('score', 'bonus', Value(0)),
+    AddConstraintNotValid('score', models.CheckConstraint(
+        check=Q(bonus__isnull=False), name='score_bonus_not_null')),
+    ValidateConstraint('score', 'score_bonus_not_null'),
+
+after which PostgreSQL can `SET NOT NULL` without scanning the table.
+'''
+
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.postgres import operations as postgres
+from django.db import NotSupportedError, transaction
+from django.db.migrations.operations import (
+    AddConstraint,
+    AddIndex,
+    RemoveIndex,
+)
+from django.db.migrations.operations.base import Operation
+from django.db.models import Max, Min
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def drop_invalid_index(schema_editor, name):
+    '''Drop what a failed `CREATE INDEX CONCURRENTLY` left behind.'''
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = '
+            'pg_index.indexrelid WHERE relname = %s AND NOT indisvalid',
+            [name],
+        )
+        invalid = cursor.fetchone() is not None
+    if invalid:
+        logger.warning('Dropping invalid index %s', name)
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS '
+            f'{schema_editor.quote_name(name)}'
+        )
+
+
+class AddIndexConcurrently(postgres.AddIndexConcurrently):
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != 'postgresql':
+            return AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+        self._ensure_not_in_transaction(schema_editor)
+        drop_invalid_index(schema_editor, self.index.name)
+        super().database_forwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != 'postgresql':
+            return AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+        super().database_backwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+
+class RemoveIndexConcurrently(postgres.RemoveIndexConcurrently):
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != 'postgresql':
+            return RemoveIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+        super().database_forwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != 'postgresql':
+            return RemoveIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+        self._ensure_not_in_transaction(schema_editor)
+        drop_invalid_index(schema_editor, self.index.name)
+        super().database_backwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+
+class AddConstraintNotValid(postgres.AddConstraintNotValid):
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != 'postgresql':
+            return AddConstraint.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+        super().database_forwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+
+class ValidateConstraint(postgres.ValidateConstraint):
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        # Other databases validated it when it was added
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class Backfill(Operation):
+    '''
+    Set the nullable field `name` to `value` (a constant or an expression
+    such as `F('score')`) on every row where it is NULL.
+    '''
+
+    atomic = False
+    reversible = True
+    reduces_to_sql = False
+
+    def __init__(
+        self, model_name, name, value, batch_size=None, duty_cycle=None
+    ):
+        self.model_name = model_name
+        self.name = name
+        self.value = value
+        self.batch_size = batch_size
+        self.duty_cycle = duty_cycle
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'name': self.name,
+            'value': self.value,
+        }
+        if self.batch_size is not None:
+            kwargs['batch_size'] = self.batch_size
+        if self.duty_cycle is not None:
+            kwargs['duty_cycle'] = self.duty_cycle
+        return self.__class__.__name__, [], kwargs
+
+    def describe(self):
+        return f'Backfill {self.name} on {self.model_name} in batches'
+
+    @property
+    def migration_name_fragment(self):
+        return f'backfill_{self.model_name.lower()}_{self.name.lower()}'
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        connection = schema_editor.connection
+        if connection.in_atomic_block:
+            raise NotSupportedError(
+                'Backfill cannot run inside a transaction (set atomic = '
+                'False on the migration).'
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(connection.alias, model):
+            return
+        try:
+            progress = to_state.apps.get_model('main', 'BackfillProgress')
+        except LookupError:
+            raise ValueError(
+                "Migrations with a Backfill must depend on "
+                "('main', '0004_backfill_progress')."
+            )
+        backfill(
+            model,
+            self.name,
+            self.value,
+            progress,
+            using=connection.alias,
+            batch_size=self.batch_size or settings.BACKFILL_BATCH_SIZE,
+            duty_cycle=self.duty_cycle or settings.BACKFILL_DUTY_CYCLE,
+        )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        # Removing the column, earlier in the migration, undoes the values;
+        # forgetting the progress lets the migration backfill it again
+        connection = schema_editor.connection
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(connection.alias, model):
+            return
+        progress = from_state.apps.get_model('main', 'BackfillProgress')
+        progress._base_manager.using(connection.alias).filter(
+            name=f'{model._meta.label_lower}.{self.name}'
+        ).delete()
+
+
+def backfill(
+    model,
+    name,
+    value,
+    progress_model,
+    using,
+    batch_size,
+    duty_cycle,
+    sleep=time.sleep,
+):
+    '''Fill `model.name` with `value`; return the `BackfillProgress`.'''
+    rows = model._base_manager.using(using)
+    progress, _ = progress_model._base_manager.using(using).get_or_create(
+        name=f'{model._meta.label_lower}.{name}'
+    )
+    if progress.finished_at is not None:
+        return progress
+    if progress.max_pk is None:
+        bounds = rows.aggregate(first=Min('pk'), last=Max('pk'))
+        progress.first_pk = bounds['first'] or 0
+        progress.max_pk = bounds['last'] or 0
+        progress.last_pk = progress.first_pk - 1
+        progress.save()
+
+    # Rows added while it runs are filled too, up to the last batch
+    while pks := list(
+        rows.filter(pk__gt=progress.last_pk)
+        .order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    ):
+        start = time.perf_counter()
+        with transaction.atomic(using=using):
+            progress.updated += rows.filter(
+                pk__gt=progress.last_pk,
+                pk__lte=pks[-1],
+                **{f'{name}__isnull': True},
+            ).update(**{name: value})
+            progress.scanned += len(pks)
+            progress.last_pk = pks[-1]
+            progress.save(
+                update_fields=['last_pk', 'scanned', 'updated', 'updated_at']
+            )
+        logger.info(
+            'Backfilled %s to pk %d',
+            progress.name,
+            progress.last_pk,
+            extra={'updated': progress.updated, 'scanned': progress.scanned},
+        )
+        if duty_cycle < 1:
+            elapsed = time.perf_counter() - start
+            sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+
+    progress.finished_at = timezone.now()
+    progress.save(update_fields=['finished_at', 'updated_at'])
+    return progress
@@ -0,0 +1,393 @@
+'''
+On-demand profiling of live web workers, started from the admin.
+
+An admin creates a `ProfilingSession`, and every worker's poller thread
+(started from gunicorn's `post_worker_init`, see gunicorn.conf.py) picks it
+up within `PROFILING_POLL_INTERVAL` seconds:
+
+- CPU sessions sample thread stacks from a background thread every
+  `interval` ms. They either sample the threads serving the next
+  `requests` requests under `path`, claimed across workers with an atomic
+  decrement, or every thread until the session expires. Samples are
+  written as collapsed stacks (for flamegraph.pl or speedscope) and as a
+  pstats dump built from the samples (for `python -m pstats` or snakeviz).
+- Memory sessions start `tracemalloc` and snapshot it when the session
+  starts and when it ends. Both snapshots are written, plus a diff of the
+  two. Overlapping memory sessions share tracing, which stops when the
+  last one ends (unless it was on before the first started).
+
+Files go to the `profiles` storage and are listed on the session's admin
+page. With no session running, `ProfilingMiddleware` costs one attribute
+check per request; the poller's query runs off the request path.
+'''
+
+import itertools
+import logging
+import marshal
+import os
+import pickle
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ProfileArtifact, ProfilingSession
+
+logger = logging.getLogger(__name__)
+
+# The profiler's own threads, left out of whole-process samples
+_internal = set()
+
+
+def worker_name():
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+class Profile:
+    '''Stack samples, counted per stack (outermost frame first).'''
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+
+    def add(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        '''Folded stacks: one `frame;frame;frame count` line per stack.'''
+        return ''.join(
+            ';'.join(
+                f'{name} ({filename}:{line})' for filename, line, name in stack
+            )
+            + f' {count}\n'
+            for stack, count in self.stacks.most_common()
+        )
+
+    def pstats(self):
+        '''
+        A marshalled `pstats` table built from the samples. A function's
+        own time is the samples it was on top of the stack and its
+        cumulative time the samples it appears in, each multiplied by the
+        sampling interval; call counts are sample counts.
+        '''
+        own = Counter()
+        total = Counter()
+        callers = defaultdict(Counter)
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                total[function] += count
+            for caller, callee in set(zip(stack, stack[1:])):
+                callers[callee][caller] += count
+
+        stats = {
+            function: (
+                count,
+                count,
+                own[function] * self.interval,
+                count * self.interval,
+                {
+                    caller: (calls, calls, 0.0, calls * self.interval)
+                    for caller, calls in callers[function].items()
+                },
+            )
+            for function, count in total.items()
+        }
+        return marshal.dumps(stats)
+
+
+class Sampler:
+    '''
+    Samples registered threads (`None`: every thread but the profiler's)
+    from one background thread, which runs only while any are registered.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.targets = {}
+        self.thread = None
+
+    def add(self, profile, ident=None):
+        with self.lock:
+            self.targets[profile] = ident
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name='profiler-sampler', daemon=True
+                )
+                self.thread.start()
+
+    def remove(self, profile):
+        with self.lock:
+            self.targets.pop(profile, None)
+
+    def run(self):
+        _internal.add(threading.get_ident())
+        try:
+            while True:
+                with self.lock:
+                    if not self.targets:
+                        self.thread = None
+                        return
+                    targets = list(self.targets.items())
+
+                frames = sys._current_frames()
+                for profile, ident in targets:
+                    if ident is not None:
+                        if ident in frames:
+                            profile.add(frames[ident])
+                        continue
+                    for other, frame in frames.items():
+                        if other not in _internal:
+                            profile.add(frame)
+                del frames
+                time.sleep(min(profile.interval for profile, _ in targets))
+        finally:
+            _internal.discard(threading.get_ident())
+
+
+class Running:
+    '''A session this process has joined, with what it has collected.'''
+
+    def __init__(self, session, profile=None, snapshot=None):
+        self.session = session
+        self.profile = profile
+        self.snapshot = snapshot
+
+
+class Profiler:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.sampler = Sampler()
+        self.lock = threading.Lock()
+        self.running = {}
+        # Per-request sessions with requests left to claim
+        self.requests = ()
+        self.thread = None
+        self.counter = itertools.count(1)
+        # Memory sessions joined, and whether the first one started
+        # tracemalloc (so the last one stops it)
+        self.memory_sessions = 0
+        self.started_tracing = False
+
+    def start(self):
+        '''Poll for sessions on a background thread.'''
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._poll_forever, name='profiler-poller', daemon=True
+            )
+            self.thread.start()
+
+    def _poll_forever(self):
+        _internal.add(threading.get_ident())
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Profiler poll failed')
+            finally:
+                # Don't hold a connection between polls
+                connections.close_all()
+            time.sleep(self.wait())
+
+    def wait(self):
+        '''Seconds until the next poll or the end of a joined session.'''
+        wait = settings.PROFILING_POLL_INTERVAL
+        now = timezone.now()
+        for running in list(self.running.values()):
+            remaining = (running.session.expires_at - now).total_seconds()
+            wait = min(wait, remaining)
+        return max(wait, 0.1)
+
+    def poll(self):
+        '''Join new sessions and finish those that ended.'''
+        now = timezone.now()
+        active = {
+            session.pk: session
+            for session in ProfilingSession.objects.filter(expires_at__gt=now)
+        }
+        for pk in list(self.running):
+            if pk not in active:
+                self.finish(pk)
+        for pk, session in active.items():
+            if pk not in self.running:
+                self.join(session)
+        self.requests = tuple(
+            session
+            for session in active.values()
+            if session.per_request and session.remaining
+        )
+
+    def join(self, session):
+        running = Running(session)
+        if session.kind == ProfilingSession.Kind.MEMORY:
+            with self.lock:
+                if not self.memory_sessions and not tracemalloc.is_tracing():
+                    tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+                    self.started_tracing = True
+                self.memory_sessions += 1
+            running.snapshot = tracemalloc.take_snapshot()
+            self.save_snapshot(session, running.snapshot, 'start')
+        elif not session.per_request:
+            running.profile = Profile(session.interval / 1000)
+            self.sampler.add(running.profile)
+        with self.lock:
+            self.running[session.pk] = running
+        logger.info('Joined %s', session)
+
+    def finish(self, pk):
+        with self.lock:
+            running = self.running.pop(pk, None)
+        if running is None:
+            return
+        session = running.session
+        if running.profile is not None:
+            self.sampler.remove(running.profile)
+            self.save_profile(session, running.profile, 'all threads')
+        elif running.snapshot is not None:
+            snapshot = tracemalloc.take_snapshot()
+            with self.lock:
+                self.memory_sessions -= 1
+                if not self.memory_sessions and self.started_tracing:
+                    tracemalloc.stop()
+                    self.started_tracing = False
+            self.save_snapshot(session, snapshot, 'end')
+            self.save_diff(session, running.snapshot, snapshot)
+        logger.info('Finished %s', session)
+
+    def claim(self, path):
+        '''Return a per-request session that takes this request, if any.'''
+        for session in self.requests:
+            if not path.startswith(session.path):
+                continue
+            claimed = ProfilingSession.objects.filter(
+                pk=session.pk, remaining__gt=0, expires_at__gt=timezone.now()
+            ).update(remaining=F('remaining') - 1)
+            if claimed:
+                return session
+            # Used up by other workers
+            self.requests = tuple(
+                other for other in self.requests if other.pk != session.pk
+            )
+        return None
+
+    def save(self, session, kind, suffix, content, label='', samples=0):
+        worker = worker_name()
+        name = storages['profiles'].save(
+            f'{session.pk}/{worker}-{next(self.counter)}{suffix}',
+            ContentFile(content),
+        )
+        ProfileArtifact.objects.create(
+            session=session,
+            kind=kind,
+            name=name,
+            worker=worker,
+            label=label,
+            samples=samples,
+        )
+
+    def save_profile(self, session, profile, label):
+        for kind, suffix, content in (
+            (
+                ProfileArtifact.Kind.COLLAPSED,
+                '.collapsed',
+                profile.collapsed().encode(),
+            ),
+            (ProfileArtifact.Kind.PSTATS, '.pstats', profile.pstats()),
+        ):
+            self.save(session, kind, suffix, content, label, profile.samples)
+
+    def save_snapshot(self, session, snapshot, label):
+        # The format of `Snapshot.dump()`; read back with `Snapshot.load()`
+        content = pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL)
+        self.save(
+            session,
+            ProfileArtifact.Kind.SNAPSHOT,
+            f'-{label}.tracemalloc',
+            content,
+            label,
+            len(snapshot.traces),
+        )
+
+    def save_diff(self, session, start, end):
+        ignore = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        )
+        stats = end.filter_traces(ignore).compare_to(
+            start.filter_traces(ignore), 'lineno'
+        )
+        growth = sum(stat.size_diff for stat in stats)
+        lines = [
+            f'{worker_name()}: {growth / 1024:+.1f} KiB over '
+            f'{session.duration}s in {len(stats)} locations',
+            '',
+            *map(str, stats[: settings.PROFILING_DIFF_LIMIT]),
+        ]
+        self.save(
+            session,
+            ProfileArtifact.Kind.DIFF,
+            '.diff.txt',
+            '\n'.join(lines).encode(),
+            'end - start',
+            len(stats),
+        )
+
+
+profiler = Profiler()
+
+
+def _after_fork():
+    # Threads don't survive a fork, and sessions belong to the parent
+    _internal.clear()
+    profiler.reset()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+class ProfilingMiddleware:
+    '''Samples the requests claimed by per-request profiling sessions.'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiler.requests:
+            return self.get_response(request)
+
+        session = profiler.claim(request.path_info)
+        if session is None:
+            return self.get_response(request)
+
+        profile = Profile(session.interval / 1000)
+        profiler.sampler.add(profile, threading.get_ident())
+        try:
+            return self.get_response(request)
+        finally:
+            profiler.sampler.remove(profile)
+            try:
+                profiler.save_profile(
+                    session, profile, f'{request.method} {request.path_info}'
+                )
+            except Exception:
+                logger.exception('Saving the profile of %s failed', session)
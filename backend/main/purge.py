@@ -0,0 +1,163 @@
+'''
+Batched deletes for rows with large dependent sets, such as a player's
+scores.
+
+`Model.delete()` and `QuerySet.delete()` run Django's collector. It loads
+every row that cascades from the deleted ones (and sends signals for each)
+before deleting anything, all in one transaction. `Purge` follows the same
+`on_delete` rules, but only loads primary keys, at most `batch_size` at a
+time. Each batch is deleted with a plain `DELETE ... WHERE pk IN (...)`
+in its own transaction, deepest dependents first, so a crash leaves
+nothing that points at a deleted row. Between batches, it sleeps long
+enough to be busy only `duty_cycle` of the time. A slower database
+therefore slows the purge down too.
+
+No signals are sent. Derived rows are handled by what calls the purge:
+group high scores cascade with their scores, `purge_scores()` re-ranks
+the players whose scores it deleted, and both purges invalidate the cached
+boards that showed them.
+'''
+
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, router, transaction
+from django.db.models import Q
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+
+from scores.caches import players_changed
+from scores.leaderboards import refresh_users
+from scores.models import Score
+
+
+class Purge:
+    def __init__(self, batch_size=None, duty_cycle=None, sleep=time.sleep):
+        self.batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        self.duty_cycle = duty_cycle or settings.PURGE_DUTY_CYCLE
+        self.sleep = sleep
+        # Model label: rows deleted
+        self.deleted = Counter()
+
+    def relations(self, model):
+        for relation in get_candidate_relations_to_delete(model._meta):
+            on_delete = relation.on_delete
+            if on_delete not in (
+                models.CASCADE,
+                models.SET_NULL,
+                models.DO_NOTHING,
+            ):
+                raise ValueError(
+                    f'Cannot purge through {relation.field} '
+                    f'({on_delete.__name__})'
+                )
+            yield relation
+
+    def count(self, queryset):
+        '''Rows the purge would delete, per model label.'''
+        # A model can be reached by several paths (a group high score
+        # cascades from both its user and its score); each row counts once
+        paths = {}
+        self._paths(queryset.model, queryset.values('pk'), paths)
+        counts = Counter()
+        for model, filters in paths.values():
+            match = Q()
+            for pks in filters:
+                match |= Q(pk__in=pks)
+            if count := model._base_manager.filter(match).count():
+                counts[model._meta.label] = count
+        return counts
+
+    def _paths(self, model, pks, paths):
+        paths.setdefault(model._meta.label, (model, []))[1].append(pks)
+        for relation in self.relations(model):
+            if relation.on_delete is models.CASCADE:
+                child = relation.related_model
+                rows = child._base_manager.filter(
+                    **{f'{relation.field.name}__in': pks}
+                )
+                self._paths(child, rows.values('pk'), paths)
+
+    def delete(self, queryset):
+        '''Delete `queryset` and what cascades from it; return the counts.'''
+        model = queryset.model
+        queryset = queryset.order_by('pk')
+        while pks := list(
+            queryset.values_list('pk', flat=True)[: self.batch_size]
+        ):
+            self._delete_batch(model, pks)
+        return self.deleted
+
+    def _delete_batch(self, model, pks):
+        relations = list(self.relations(model))
+        for relation in relations:
+            if relation.on_delete is models.CASCADE:
+                child = relation.related_model
+                rows = child._base_manager.filter(
+                    **{f'{relation.field.name}__in': pks}
+                ).order_by('pk')
+                while child_pks := list(
+                    rows.values_list('pk', flat=True)[: self.batch_size]
+                ):
+                    self._delete_batch(child, child_pks)
+
+        start = time.perf_counter()
+        with transaction.atomic(using=router.db_for_write(model)):
+            for relation in relations:
+                if relation.on_delete is models.SET_NULL:
+                    relation.related_model._base_manager.filter(
+                        **{f'{relation.field.name}__in': pks}
+                    ).update(**{relation.field.name: None})
+            # A plain DELETE: what cascades is already gone
+            queryset = model._base_manager.filter(pk__in=pks)
+            self.deleted[model._meta.label] += queryset._raw_delete(
+                queryset.db
+            )
+        self.throttle(time.perf_counter() - start)
+
+    def throttle(self, elapsed):
+        if self.duty_cycle < 1:
+            self.sleep(elapsed * (1 - self.duty_cycle) / self.duty_cycle)
+
+
+def purge_users(queryset, **options):
+    '''Delete users with their scores, social logins and other rows.'''
+    purge = Purge(**options)
+    queryset = queryset.order_by('pk')
+    while pks := list(
+        queryset.values_list('pk', flat=True)[: purge.batch_size]
+    ):
+        purge.delete(queryset.model.objects.filter(pk__in=pks))
+        players_changed(pks)
+    return purge.deleted
+
+
+def purge_scores(queryset, **options):
+    '''Delete scores, re-ranking their players' group leaderboards.'''
+    purge = Purge(**options)
+    queryset = queryset.order_by('pk')
+    while rows := list(
+        queryset.values_list('pk', 'user_id')[: purge.batch_size]
+    ):
+        purge.delete(Score.objects.filter(pk__in=[pk for pk, _ in rows]))
+        user_ids = {user_id for _, user_id in rows}
+        refresh_users(user_ids)
+        players_changed(user_ids)
+    return purge.deleted
+
+
+def inactive_users(days):
+    '''
+    Users other than staff who have not logged in for `days` days (or
+    joined that long ago and never logged in).
+    '''
+    cutoff = timezone.now() - timedelta(days=days)
+    return get_user_model().objects.filter(
+        Q(last_login__lt=cutoff)
+        | Q(last_login__isnull=True, date_joined__lt=cutoff),
+        is_staff=False,
+        is_superuser=False,
+    )
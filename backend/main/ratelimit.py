@@ -0,0 +1,253 @@
+'''
+Token-bucket rate limits for API views, checked without a query.
+
+A view opts in with a `throttle_scope`, and `RATE_LIMITS[scope]` maps key
+kinds to DRF-style rates:
+
+- `ip`: the client address: `REMOTE_ADDR`, or the address `NUM_PROXIES`
+  from the end of `X-Forwarded-For` when that is set
+- `user`: the authenticated user
+- `username`: the username sent in the request body, for login
+
+A rate of `'60/min'` is a bucket of 60 tokens refilled at one a second, so
+a client can burst through a minute's worth and then keep to the rate. A
+request takes a token from each of its buckets, or from none of them if
+any is empty, in which case it gets a 429 with `Retry-After`.
+
+Each process keeps its buckets in memory. Every `RATE_LIMIT_SYNC_INTERVAL`
+seconds a background thread adds what this process charged to each bucket
+to its `RateLimitCounter` row for the current period, in one upsert, and
+takes what the other processes charged since the last sync out of its own
+buckets. The totals seen at the last sync are kept per key for the whole
+period, so a bucket dropped while idle and recreated is not charged again
+for usage already applied. Limits therefore hold across workers to within
+one sync interval's worth of requests.
+'''
+
+import functools
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+from rest_framework.throttling import BaseThrottle
+
+from .models import RateLimitCounter
+
+logger = logging.getLogger(__name__)
+
+# Buckets per upsert, three parameters each
+SYNC_BATCH_SIZE = 300
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+# Bucket fields, in a list for speed
+TOKENS, UPDATED, CAPACITY, REFILL, USED = range(5)
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    '''`'60/min'` -> `(60, 1.0)`: capacity and tokens per second.'''
+    count, _, period = rate.partition('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+class Limiter:
+    '''This process's token buckets and their sync state.'''
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        # Bucket key: [tokens, updated, capacity, refill, used]
+        self.buckets = {}
+        # Bucket key: total across processes at the last sync, this period
+        self.seen = {}
+        self.seen_period = None
+        self.synced_at = clock()
+        self.syncing = False
+
+    def take(self, limits):
+        '''
+        Take a token from each `(key, capacity, refill)` bucket; return 0,
+        or the seconds until all of them have one again.
+        '''
+        now = self.clock()
+        wait = 0.0
+        with self.lock:
+            buckets = []
+            for key, capacity, refill in limits:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    bucket = self.buckets[key] = [
+                        capacity,
+                        now,
+                        capacity,
+                        refill,
+                        0,
+                    ]
+                else:
+                    bucket[TOKENS] = min(
+                        capacity,
+                        bucket[TOKENS] + (now - bucket[UPDATED]) * refill,
+                    )
+                    bucket[UPDATED] = now
+                if bucket[TOKENS] < 1:
+                    wait = max(wait, (1 - bucket[TOKENS]) / refill)
+                buckets.append(bucket)
+            if not wait:
+                for bucket in buckets:
+                    bucket[TOKENS] -= 1
+                    bucket[USED] += 1
+        interval = settings.RATE_LIMIT_SYNC_INTERVAL
+        if interval and now - self.synced_at >= interval:
+            self.start_sync(now)
+        return wait
+
+    def start_sync(self, now):
+        with self.lock:
+            if self.syncing:
+                return
+            self.syncing = True
+            self.synced_at = now
+        threading.Thread(
+            target=self._sync_in_background,
+            name='rate-limit-sync',
+            daemon=True,
+        ).start()
+
+    def _sync_in_background(self):
+        try:
+            self.sync()
+        except Exception:
+            logger.exception('Rate limit sync failed')
+        finally:
+            self.syncing = False
+            connections.close_all()
+
+    def sync(self):
+        '''Share this process's usage and apply the other processes'.'''
+        now = self.clock()
+        period = int(time.time()) // settings.RATE_LIMIT_PERIOD
+        used = {}
+        with self.lock:
+            for key, bucket in list(self.buckets.items()):
+                tokens = min(
+                    bucket[CAPACITY],
+                    bucket[TOKENS] + (now - bucket[UPDATED]) * bucket[REFILL],
+                )
+                if bucket[USED]:
+                    used[key] = bucket[USED]
+                    bucket[USED] = 0
+                elif tokens >= bucket[CAPACITY]:
+                    # Full and idle: the same as a new bucket
+                    del self.buckets[key]
+                else:
+                    # Still refilling, so other processes may be using it
+                    used[key] = 0
+        if not used:
+            return
+
+        try:
+            totals = add_usage(period, used)
+        except Exception:
+            with self.lock:
+                for key, count in used.items():
+                    if key in self.buckets:
+                        self.buckets[key][USED] += count
+            raise
+
+        with self.lock:
+            if self.seen_period != period:
+                self.seen, self.seen_period = {}, period
+            for key, total in totals.items():
+                others = total - self.seen.get(key, 0) - used[key]
+                self.seen[key] = total
+                bucket = self.buckets.get(key)
+                if bucket is not None and others > 0:
+                    bucket[TOKENS] = max(0, bucket[TOKENS] - others)
+
+        RateLimitCounter.objects.filter(period__lt=period - 1).delete()
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+            self.seen.clear()
+
+
+def add_usage(period, used):
+    '''
+    Add `used` (bucket key: count) to the period's counters; return every
+    bucket's total across processes.
+    '''
+    db = router.db_for_write(RateLimitCounter)
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    table = quote(RateLimitCounter._meta.db_table)
+    key, period_column, used_column = (
+        quote(RateLimitCounter._meta.get_field(name).column)
+        for name in ('key', 'period', 'used')
+    )
+    totals = {}
+    items = list(used.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), SYNC_BATCH_SIZE):
+            batch = items[start : start + SYNC_BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {table} ({period_column}, {key}, {used_column}) '
+                f'VALUES {", ".join(["(%s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT ({period_column}, {key}) DO UPDATE '
+                f'SET {used_column} = {table}.{used_column} + '
+                f'excluded.{used_column} '
+                f'RETURNING {key}, {used_column}',
+                [value for item in batch for value in (period, *item)],
+            )
+            totals.update(cursor.fetchall())
+    return totals
+
+
+limiter = Limiter()
+
+
+def _after_fork():
+    # A lock held by another thread at fork would never be released
+    limiter.lock = threading.Lock()
+    limiter.syncing = False
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    '''Applies `RATE_LIMITS[view.throttle_scope]`, if the view has one.'''
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rates = settings.RATE_LIMITS.get(scope)
+        if not rates:
+            return True
+        limits = []
+        for kind, rate in rates.items():
+            value = self.identify(kind, request)
+            if value is not None:
+                limits.append((f'{scope}:{kind}:{value}', *parse_rate(rate)))
+        self.wait_time = limiter.take(limits)
+        return not self.wait_time
+
+    def identify(self, kind, request):
+        if kind == 'ip':
+            return self.get_ident(request)
+        if kind == 'user':
+            return request.user.pk if request.user.is_authenticated else None
+        if kind == 'username':
+            username = request.data.get(get_user_model().USERNAME_FIELD)
+            if not isinstance(username, str) or not username:
+                return None
+            return username.strip().lower()[:200]
+        raise ValueError(f'Unknown rate limit key: {kind}')
+
+    def wait(self):
+        return self.wait_time
@@ -0,0 +1,29 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''
+    JSON renderer backed by orjson when it is installed.
+
+    orjson encodes datetimes, UUIDs and dict/list subclasses natively and
+    falls back to DRF's encoder for anything else (Decimals, lazy strings,
+    querysets). Indented output, as requested by the browsable API, and
+    installs without orjson use the stdlib `JSONRenderer`.
+    '''
+
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or data is None or indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return orjson.dumps(data, default=self.default, option=self.options)
+
+    def default(self, obj):
+        return self.encoder_class().default(obj)
@@ -10,6 +10,7 @@ import sys
 from pathlib import Path
 
 import dj_database_url
+from corsheaders.defaults import default_headers
 from dotenv import dotenv_values
 
 
@@ -60,6 +61,9 @@ ALLOWED_HOSTS = split_env(config.get('ALLOWED_HOSTS'))
 SITE_NAME = 'Cosmic Tracer API'
 
 INSTALLED_APPS = [
+    # Before django.contrib.staticfiles, whose collectstatic command it
+    # overrides (see main/management/commands/collectstatic.py)
+    'main',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -77,22 +81,44 @@ INSTALLED_APPS = [
     # Cosmic Tracer apps
     'users',
     'scores',
+    'outbox',
 ]
 
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    #
     # https://pypi.org/project/django-cors-headers/#setup
+    # First, so preflight requests are answered before anything else runs
     'corsheaders.middleware.CorsMiddleware',
     #
+    # Correlates log records with the request (see main/log.py)
+    'main.log.RequestIdMiddleware',
+    # Samples requests picked by an admin profiling session; a no-op
+    # otherwise (see main/profiling.py)
+    'main.profiling.ProfilingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'main.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # The admin login's answer to a full password hashing pool
+    'main.middleware.PasswordHashingBusyMiddleware',
+    #
+    # Django's middleware, skipped for LEAN_MIDDLEWARE_PATHS
+    'main.middleware.SessionMiddleware',
+    'main.middleware.CsrfViewMiddleware',
+    'main.middleware.AuthenticationMiddleware',
+    'main.middleware.MessageMiddleware',
+    'main.middleware.XFrameOptionsMiddleware',
 ]
 
+# JWT-authenticated routes that need none of the session, CSRF, messages or
+# clickjacking middleware (see main/middleware.py)
+LEAN_MIDDLEWARE_PATHS = (
+    '/api/',
+    '/jwt/',
+    '/logout/',
+    '/users/',
+    '/healthz',
+    '/readyz',
+)
+
 ROOT_URLCONF = 'main.urls'
 
 TEMPLATES = [
@@ -134,7 +160,12 @@ elif (
 ):
     if os.getenv("DATABASE_URL", None) is None:
         raise Exception("DATABASE_URL environment variable not defined")
-    default_db = dj_database_url.parse(config.get("DATABASE_URL"))
+    # Persistent connections, opened by warmup before a worker takes traffic
+    default_db = dj_database_url.parse(
+        config.get("DATABASE_URL"),
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
 else:
     default_db = {
         "ENGINE": "django.db.backends.sqlite3",
@@ -156,14 +187,145 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
+    # orjson-backed when installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'main.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'main.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Views with a `throttle_scope` are limited by RATE_LIMITS
+    'DEFAULT_THROTTLE_CLASSES': ('main.ratelimit.TokenBucketThrottle',),
+    # Proxies that append to X-Forwarded-For in front of the app. With 0,
+    # clients are limited by REMOTE_ADDR, since they can forge the header
+    'NUM_PROXIES': int(config.get('NUM_PROXIES', 0)),
+}
+
+# Response compression (see main/middleware.py); brotli is used when the
+# optional `brotli` package is installed, gzip otherwise
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_CACHE_SIZE = 128
+
+
+# Responses to requests with an `Idempotency-Key` header are replayed for
+# this many seconds (see main/idempotency.py); the most recent CACHE_SIZE
+# are also kept in each process's memory. A request still in progress
+# after LEASE seconds, longer than gunicorn lets one run, is presumed dead
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # 1 day
+IDEMPOTENCY_LEASE = 60
+IDEMPOTENCY_CACHE_SIZE = int(config.get('IDEMPOTENCY_CACHE_SIZE', 1024))
+
+
+# Rate limits (see main/ratelimit.py): for each view `throttle_scope`, a
+# token bucket per client IP, authenticated user and/or submitted username.
+# A rate of N/period allows a burst of N requests. Each process syncs its
+# buckets with the others' every SYNC_INTERVAL seconds (never when 0)
+# through counters that start over every PERIOD seconds
+RATE_LIMITS = {
+    'submit': {'user': '60/min', 'ip': '300/min'},
+    'login': {'ip': '30/min', 'username': '20/hour'},
+    'refresh': {'ip': '60/min'},
+    'leaderboard': {'ip': '300/min'},
+    'search': {'ip': '60/min'},
+    'dashboard': {'user': '120/min'},
+    'telemetry': {'user': '60/min'},
 }
+RATE_LIMIT_SYNC_INTERVAL = int(config.get('RATE_LIMIT_SYNC_INTERVAL', 1))
+RATE_LIMIT_PERIOD = 10 * 60
+
+# Gameplay telemetry (see scores/telemetry.py): batches up to
+# MAX_BATCH_BYTES are buffered per process and written as one columnar
+# segment per FLUSH_EVENTS events, or once the oldest buffered event has
+# waited FLUSH_INTERVAL seconds
+TELEMETRY_MAX_BATCH_BYTES = 1024 * 1024
+TELEMETRY_FLUSH_EVENTS = int(config.get('TELEMETRY_FLUSH_EVENTS', 100000))
+TELEMETRY_FLUSH_INTERVAL = 60
+
+
+# Scores submitted with a replay stay pending until `verify_scores`
+# replays them (see scores/replay.py); replays longer than MAX_TICKS are
+# refused, and the verifier claims BATCH_SIZE pending scores at a time.
+# With REPLAY_REQUIRED, new high scores without a replay are refused, since
+# they would be ranked unverified
+REPLAY_REQUIRED = config.get('REPLAY_REQUIRED', 'True') == 'True'
+REPLAY_MAX_TICKS = int(config.get('REPLAY_MAX_TICKS', 250000))
+REPLAY_BATCH_SIZE = int(config.get('REPLAY_BATCH_SIZE', 1000))
+
+
+# Leaderboard snapshots (see scores/snapshots.py): `publish_leaderboards`
+# renders the top SIZE scores overall, today and this week every INTERVAL
+# seconds and the stats every STATS_INTERVAL seconds, and uploads the ones
+# that changed to the `leaderboards` storage. Each board's `latest.json` is
+# cached for MAX_AGE seconds, and versions are deleted RETENTION seconds
+# after a newer one replaced them
+LEADERBOARD_SNAPSHOT_SIZE = 100
+LEADERBOARD_SNAPSHOT_INTERVAL = 5
+LEADERBOARD_SNAPSHOT_STATS_INTERVAL = 60
+LEADERBOARD_SNAPSHOT_MAX_AGE = 10
+LEADERBOARD_SNAPSHOT_RETENTION = 300
+
+
+# Player search (see scores/search.py) returns the best RESULTS of up to
+# CANDIDATES matching players for a query of at least MIN_LENGTH
+# characters; each process rebuilds its rank histogram (and, off
+# PostgreSQL, name list) every REFRESH_INTERVAL seconds
+PLAYER_SEARCH_RESULTS = 10
+PLAYER_SEARCH_CANDIDATES = 100
+PLAYER_SEARCH_MIN_LENGTH = 2
+PLAYER_SEARCH_REFRESH_INTERVAL = int(
+    config.get('PLAYER_SEARCH_REFRESH_INTERVAL', 30)
+)
+
+
+# Shared rankings (see scores/rankings.py): on each host, one worker writes
+# the score histogram to FILE every REFRESH_INTERVAL seconds, and every
+# worker maps it read-only. Snapshots older than MAX_AGE are ignored. Empty
+# FILE turns this off
+RANKINGS_FILE = config.get(
+    'RANKINGS_FILE',
+    os.path.join(
+        '/dev/shm' if os.path.isdir('/dev/shm') else '/tmp',
+        'leaderboard-rankings',
+    ),
+)
+RANKINGS_REFRESH_INTERVAL = int(config.get('RANKINGS_REFRESH_INTERVAL', 5))
+RANKINGS_MAX_AGE = 60
+
+# Player dashboard (see scores/dashboard.py): the RECENT_SIZE latest scores
+# and the global leaderboard; its queries run on a pool of THREADS threads
+# per process
+DASHBOARD_RECENT_SIZE = 10
+DASHBOARD_THREADS = int(config.get('DASHBOARD_THREADS', 4))
+
+# Per-process caches of score-derived reads (see main/invalidation.py) hold
+# up to CACHE_SIZE entries each for at most CACHE_TTL seconds. Writes evict
+# entries in every worker through PostgreSQL NOTIFY on INVALIDATION_CHANNEL,
+# or elsewhere through events polled every INVALIDATION_POLL_INTERVAL
+# seconds. CACHE_SIZE 0 turns the caches off
+SCORE_CACHE_SIZE = int(config.get('SCORE_CACHE_SIZE', 10000))
+SCORE_CACHE_TTL = int(config.get('SCORE_CACHE_TTL', 300))
+INVALIDATION_CHANNEL = 'score_cache'
+INVALIDATION_POLL_INTERVAL = float(config.get('INVALIDATION_POLL_INTERVAL', 1))
+
+
+# Profiling sessions started from the admin (see main/profiling.py): each
+# gunicorn worker checks for them every POLL_INTERVAL seconds and writes
+# results to the `profiles` storage. Memory profiles record
+# TRACEMALLOC_FRAMES frames per allocation and report the DIFF_LIMIT
+# biggest changes
+PROFILING_POLL_INTERVAL = int(config.get('PROFILING_POLL_INTERVAL', 10))
+PROFILING_TRACEMALLOC_FRAMES = 10
+PROFILING_DIFF_LIMIT = 100
 
 
 # Authentication
 # https://docs.djangoproject.com/en/5.0/topics/auth/
 
 AUTHENTICATION_BACKENDS = (
-    'social_core.backends.google.GoogleOAuth2',
+    'users.social.GoogleOAuth2',
     'django.contrib.auth.backends.ModelBackend',
 )
 
@@ -189,6 +351,37 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing runs on a bounded thread pool (see users/hashers.py);
+# requests beyond WORKERS + QUEUE_SIZE are rejected with a 503. Keep the
+# sum below gunicorn's threads per worker (GUNICORN_THREADS), or a worker
+# never has enough requests in flight to reject one
+PASSWORD_HASHING_WORKERS = int(config.get('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE_SIZE = int(config.get('PASSWORD_HASHING_QUEUE_SIZE', 4))
+
+
+# Simple JWT
+# https://django-rest-framework-simplejwt.readthedocs.io/en/latest/settings.html
+
+SIMPLE_JWT = {
+    # Rotates refresh tokens, so each one works once
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'users.serializers.TokenVerifySerializer',
+}
+
+# Revoked tokens are mirrored in a per-process Bloom filter (see
+# users/revocation.py) sized for CAPACITY tokens at ERROR_RATE false
+# positives, which picks up other workers' revocations every SYNC_INTERVAL
+# seconds and is rebuilt every REBUILD_INTERVAL seconds
+TOKEN_REVOCATION_CAPACITY = int(
+    config.get('TOKEN_REVOCATION_CAPACITY', 100000)
+)
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_SYNC_INTERVAL = 5
+TOKEN_REVOCATION_REBUILD_INTERVAL = 60 * 60
+# A refresh token replaced by a refresh still works for this many seconds,
+# so two tabs, or a retry, refreshing at once aren't logged out
+TOKEN_ROTATION_GRACE = 10
+
 
 # Djoser
 # https://djoser.readthedocs.io/en/latest/settings.html
@@ -233,6 +426,10 @@ SOCIAL_AUTH_GOOGLE_OAUTH2_SCOPE = [
     'https://www.googleapis.com/auth/userinfo.profile',
     'openid',
 ]
+# Provider calls share a keep-alive connection pool per process (see
+# users/social.py); the timeout is (connect, read) seconds
+SOCIAL_AUTH_REQUESTS_TIMEOUT = (3.05, 10)
+SOCIAL_AUTH_HTTP_POOL_SIZE = int(config.get('SOCIAL_AUTH_HTTP_POOL_SIZE', 10))
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -248,19 +445,39 @@ USE_TZ = True
 
 CORS_ALLOWED_ORIGINS = split_env(config.get('CORS_ALLOWED_ORIGINS'))
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+# Browsers cap this (Chromium at 2 hours), but fewer preflights either way
+CORS_PREFLIGHT_MAX_AGE = 60 * 60 * 24  # 1 day
 
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
-STATICFILES_DIRS = (os.path.join(BASE_DIR, 'main/static/'),)
-
 if ENVIRONMENT == envs['DEV']:
     STATIC_URL = 'static/'
     STATIC_ROOT = BASE_DIR / '.static'
 
     MEDIA_URL = 'media/'
     MEDIA_ROOT = BASE_DIR / '.media'
+
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        },
+        'telemetry': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': BASE_DIR / '.telemetry'},
+        },
+        'profiles': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': BASE_DIR / '.profiles'},
+        },
+        'leaderboards': {
+            'BACKEND': 'main.storages.LocalSnapshotStorage',
+            'OPTIONS': {'location': BASE_DIR / '.leaderboards'},
+        },
+    }
 else:
     AWS_S3_ACCESS_KEY_ID = config.get('AWS_S3_ACCESS_KEY_ID')
     AWS_S3_SECRET_ACCESS_KEY = config.get('AWS_S3_SECRET_ACCESS_KEY')
@@ -269,6 +486,7 @@ else:
     AWS_S3_ENDPOINT_URL = (
         f'https://{AWS_S3_REGION_NAME}.digitaloceanspaces.com'
     )
+    # Hashed static files are uploaded with an immutable, one year max-age
     AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
     AWS_DEFAULT_ACL = 'public-read'
     AWS_LOCATION = 'static'
@@ -276,19 +494,45 @@ else:
     AWS_S3_CUSTOM_DOMAIN = config.get('AWS_S3_CUSTOM_DOMAIN')
     STORAGES = {
         'default': {'BACKEND': 'main.storages.S3Boto3Storage'},
-        'staticfiles': {
-            'BACKEND': 'storages.backends.s3boto3.S3StaticStorage'
+        'staticfiles': {'BACKEND': 'main.storages.StaticStorage'},
+        # Gameplay telemetry segments; never public
+        'telemetry': {
+            'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+            'OPTIONS': {'location': 'telemetry', 'default_acl': 'private'},
         },
+        # Profiler output from the admin; never public
+        'profiles': {
+            'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+            'OPTIONS': {'location': 'profiles', 'default_acl': 'private'},
+        },
+        # Public leaderboard snapshots, served from the CDN
+        'leaderboards': {'BACKEND': 'main.storages.SnapshotStorage'},
     }
 
 
 # Email
 # https://docs.djangoproject.com/en/5.0/topics/email
 
+# Requests only queue mail; `python manage.py send_queued_mail` sends it
+# through OUTBOX_BACKEND
+EMAIL_BACKEND = 'outbox.backends.QueuedEmailBackend'
+
+# Emails claimed by the worker per query
+OUTBOX_BATCH_SIZE = int(config.get('OUTBOX_BATCH_SIZE', 50))
+
+# Sends per second across one worker (new SES accounts allow 14); 0 is
+# unlimited
+OUTBOX_RATE_LIMIT = float(config.get('OUTBOX_RATE_LIMIT', 14))
+
+# Failed sends are retried after 30s, 60s, 120s, ... capped at an hour
+OUTBOX_MAX_ATTEMPTS = int(config.get('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_MAX_RETRY_DELAY = 3600
+
 if ENVIRONMENT == envs['DEV']:
-    EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+    OUTBOX_BACKEND = "django.core.mail.backends.console.EmailBackend"
 else:
-    EMAIL_BACKEND = 'django_ses.SESBackend'
+    OUTBOX_BACKEND = 'django_ses.SESBackend'
     USE_SES_V2 = True
 
     AWS_SES_ACCESS_KEY_ID = config.get('AWS_SES_ACCESS_KEY_ID')
@@ -301,6 +545,69 @@ else:
     DEFAULT_FROM_EMAIL = AWS_SES_FROM_EMAIL
 
 
+# Account and score purges (see main/purge.py) delete BATCH_SIZE rows per
+# transaction; bulk purges pause between batches so they keep the database
+# busy for at most DUTY_CYCLE of the time
+PURGE_BATCH_SIZE = int(config.get('PURGE_BATCH_SIZE', 1000))
+PURGE_DUTY_CYCLE = float(config.get('PURGE_DUTY_CYCLE', 0.5))
+
+
+# `Backfill` migration operations (see main/operations.py) update
+# BATCH_SIZE rows per transaction and keep the database busy for at most
+# DUTY_CYCLE of the time
+BACKFILL_BATCH_SIZE = int(config.get('BACKFILL_BATCH_SIZE', 5000))
+BACKFILL_DUTY_CYCLE = float(config.get('BACKFILL_DUTY_CYCLE', 0.5))
+
+
+# Admin
+
+# Changelists on PostgreSQL show planner estimates above this many rows
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.0/topics/logging/
+
+# JSON lines on stderr, written by a background thread (see main/log.py);
+# at most LOG_QUEUE_SIZE records wait per process before new ones are
+# dropped. Test runs write nothing below CRITICAL unless LOG_LEVEL says
+# otherwise, since tests provoke errors on purpose
+LOG_LEVEL = config.get(
+    'LOG_LEVEL', 'CRITICAL' if sys.argv[1:2] == ['test'] else 'INFO'
+)
+LOG_QUEUE_SIZE = int(config.get('LOG_QUEUE_SIZE', 10000))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'main.log.JSONFormatter'},
+    },
+    'filters': {
+        'request_id': {'()': 'main.log.RequestIdFilter'},
+        # 1% of leaderboard hits, at most 10 a second per process
+        'leaderboard_sample': {
+            '()': 'main.log.SamplingFilter',
+            'rate': 0.01,
+            'per_second': 10,
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'main.log.QueuedStreamHandler',
+            'queue_size': LOG_QUEUE_SIZE,
+            'level': LOG_LEVEL,
+            'formatter': 'json',
+            'filters': ['request_id'],
+        },
+    },
+    'root': {'handlers': ['console'], 'level': 'INFO'},
+    'loggers': {
+        'scores.views.leaderboard': {'filters': ['leaderboard_sample']},
+    },
+}
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -1,6 +1,247 @@
+import abc
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from django.conf import settings
-from storages.backends.s3boto3 import S3Boto3Storage as DefaultS3Boto3Storage
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from storages.backends.s3boto3 import (
+    S3Boto3Storage as DefaultS3Boto3Storage,
+    S3StaticStorage,
+)
+from storages.utils import clean_name
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# `ManifestFilesMixin.hashed_name()` inserts 12 hex digits before the suffix
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}(\.[^./]+)?$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
 
 
 class S3Boto3Storage(DefaultS3Boto3Storage):
-    location = settings.AWS_MEDIA_LOCATION
+    location = getattr(settings, 'AWS_MEDIA_LOCATION', 'media')
+
+
+class SnapshotStorage(S3Boto3Storage):
+    '''
+    Public leaderboard snapshots (see scores/snapshots.py). Versioned files
+    never change and are cached for a year; `latest.json` pointers are
+    overwritten in one PUT and cached for `LEADERBOARD_SNAPSHOT_MAX_AGE`.
+    '''
+
+    location = 'leaderboards'
+    file_overwrite = True
+
+    def get_object_parameters(self, name):
+        params = super().get_object_parameters(name)
+        params['ContentType'] = 'application/json'
+        if name.endswith('/latest.json'):
+            params['CacheControl'] = (
+                f'public, max-age={settings.LEADERBOARD_SNAPSHOT_MAX_AGE}'
+            )
+        else:
+            params['CacheControl'] = IMMUTABLE_CACHE_CONTROL
+        return params
+
+
+class LocalSnapshotStorage(FileSystemStorage):
+    '''
+    `SnapshotStorage` on local disk: saving overwrites the file with a
+    rename, so readers see the old or the new content, like an S3 PUT.
+    '''
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            for chunk in content.chunks():
+                file.write(chunk)
+        os.chmod(file.name, 0o644)
+        os.replace(file.name, path)
+        return name
+
+
+class PrecompressedManifestMixin(ManifestFilesMixin, metaclass=abc.ABCMeta):
+    '''
+    Manifest-hashed static files uploaded as immutable objects, each with
+    pre-compressed `.gz` and (when `brotli` is installed) `.br` variants.
+
+    `collectstatic` saves every file, without checking modified times (see
+    the `collectstatic` command in main), and the storage skips any object
+    whose content digest is unchanged in one listing of the target. The
+    remaining uploads run on a thread pool and are awaited at the end of
+    post-processing; until then, files are read back from memory. Backends
+    implement `list_digests()` and `put()`.
+    '''
+
+    upload_workers = 8
+    compress_min_size = 512
+    compressible_types = (
+        'text/',
+        'application/javascript',
+        'application/json',
+        'application/xml',
+        'image/svg+xml',
+    )
+
+    def __init__(self, *args, **kwargs):
+        self._digests = None
+        self._replaced = {}
+        self._uploads = []
+        # name: content of uploads that haven't finished
+        self._pending = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self.skipped = 0
+        super().__init__(*args, **kwargs)
+
+    @abc.abstractmethod
+    def list_digests(self):
+        '''Return `{name: md5 hex digest}` for every stored file.'''
+
+    @abc.abstractmethod
+    def put(self, name, content, cache_control=None):
+        '''Write `content` (bytes) to `name`, overwriting any object.'''
+
+    def digests(self):
+        with self._lock:
+            if self._digests is None:
+                self._digests = self.list_digests()
+            return self._digests
+
+    def exists(self, name):
+        return clean_name(name) in self.digests()
+
+    def delete(self, name):
+        # Deferred: collectstatic deletes before re-saving, and an identical
+        # re-save should not cost an upload
+        name = clean_name(name)
+        digests = self.digests()
+        with self._lock:
+            for variant in (name, name + '.gz', name + '.br'):
+                if variant in digests:
+                    self._replaced[variant] = digests.pop(variant)
+
+    def _open(self, name, mode='rb'):
+        # Post-processing reads files that may still be uploading
+        with self._lock:
+            data = self._pending.get(clean_name(name))
+        if data is not None:
+            return ContentFile(data, name=name)
+        return super()._open(name, mode)
+
+    def _save(self, name, content):
+        name = clean_name(name)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        data = content.read()
+        if isinstance(data, str):
+            data = data.encode()
+
+        cache_control = None
+        if HASHED_NAME_RE.search(name):
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        for variant, variant_data in self.variants(name, data):
+            self.schedule(variant, variant_data, cache_control)
+        return name
+
+    def variants(self, name, data):
+        yield name, data
+
+        content_type, _ = mimetypes.guess_type(name)
+        if (
+            name == self.manifest_name
+            or len(data) < self.compress_min_size
+            or not (content_type or '').startswith(self.compressible_types)
+        ):
+            return
+
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            yield name + '.gz', compressed
+        if brotli is not None:
+            compressed = brotli.compress(data)
+            if len(compressed) < len(data):
+                yield name + '.br', compressed
+
+    def schedule(self, name, data, cache_control):
+        digest = hashlib.md5(data, usedforsecurity=False).hexdigest()
+        digests = self.digests()
+        with self._lock:
+            previous = digests.get(name) or self._replaced.pop(name, None)
+            digests[name] = digest
+            if previous == digest:
+                self.skipped += 1
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.upload_workers, thread_name_prefix='static-upload'
+                )
+            self._pending[name] = data
+            self._uploads.append(
+                self._executor.submit(self.upload, name, data, cache_control)
+            )
+
+    def upload(self, name, data, cache_control):
+        self.put(name, data, cache_control)
+        with self._lock:
+            # Unless the file was saved again meanwhile
+            if self._pending.get(name) is data:
+                del self._pending[name]
+
+    def wait_for_uploads(self):
+        '''Finish pending uploads and deletes, raising the first error.'''
+        uploads, self._uploads = self._uploads, []
+        for future in uploads:
+            future.result()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        replaced, self._replaced = self._replaced, {}
+        for name in replaced:
+            super().delete(name)
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        self.wait_for_uploads()
+
+
+class StaticStorage(PrecompressedManifestMixin, S3StaticStorage):
+    def list_digests(self):
+        prefix = f'{self.location}/' if self.location else ''
+        paginator = self.connection.meta.client.get_paginator(
+            'list_objects_v2'
+        )
+        digests = {}
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for entry in page.get('Contents', ()):
+                # Single-part uploads use the content MD5 as their ETag
+                key = entry['Key'][len(prefix) :]
+                digests[key] = entry['ETag'].strip('"')
+        return digests
+
+    def put(self, name, content, cache_control=None):
+        key = self._normalize_name(name)
+        # Sets Content-Encoding for the `.gz` and `.br` variants
+        params = self._get_write_parameters(key)
+        if cache_control:
+            params['CacheControl'] = cache_control
+        # The client is thread-local, unlike the shared `bucket` resource
+        self.connection.meta.client.put_object(
+            Bucket=self.bucket_name, Key=key, Body=content, **params
+        )
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from main.boot import preload
+from main.management.commands.profile_imports import (
+    BOOT,
+    LAZY_MODULES,
+    parse_importtime,
+)
+
+
+class BootTests(SimpleTestCase):
+    def test_boot_does_not_import_lazy_integrations(self):
+        check = BOOT + (
+            'import sys\n'
+            f'print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', check],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), '')
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+    )
+    def test_preload_imports_lazy_integrations(self):
+        sys.modules.pop('django.core.mail.backends.locmem', None)
+        preload()
+        self.assertIn('django.core.mail.backends.locmem', sys.modules)
+
+    def test_parse_importtime(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   json.scanner\n'
+            'import time:       300 |       1420 | json\n'
+        )
+        self.assertEqual(
+            list(parse_importtime(stderr)),
+            [('json.scanner', 120, 120), ('json', 300, 1420)],
+        )
+
+    def test_profile_imports_command_reports_modules(self):
+        out = StringIO()
+        call_command('profile_imports', limit=3, stdout=out)
+        self.assertIn('modules imported', out.getvalue())
@@ -0,0 +1,173 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from main import invalidation
+from main.idempotency import responses
+from main.models import IdempotencyRecord
+from scores.models import Score
+
+User = get_user_model()
+
+
+class IdempotencyTestMixin:
+    def setUp(self):
+        super().setUp()
+        responses.clear()
+        self.addCleanup(responses.clear)
+        self.user = User.objects.create_user(
+            email='player@example.com', password='password123'
+        )
+
+    def submit(self, score=100, key='key-1', client=None):
+        client = client or APIClient()
+        client.force_authenticate(self.user)
+        headers = {'Idempotency-Key': key} if key else {}
+        return client.post(
+            '/api/scores/submit/',
+            {'score': score, 'time_played': 20},
+            headers=headers,
+        )
+
+
+@override_settings(REPLAY_REQUIRED=False)
+class IdempotencyKeyTests(IdempotencyTestMixin, TestCase):
+    def test_replay_returns_stored_response_without_scoring(self):
+        first = self.submit()
+
+        with self.assertNumQueries(0):
+            replayed = self.submit()
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replayed.status_code, 201)
+        self.assertEqual(replayed.json(), first.json())
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(Score.objects.count(), 1)
+
+    def test_replay_from_database_in_another_process(self):
+        first = self.submit()
+        responses.clear()
+
+        with self.assertNumQueries(1):
+            replayed = self.submit()
+
+        self.assertEqual(replayed.json(), first.json())
+
+    def test_key_reused_with_different_payload(self):
+        self.submit(score=100)
+        response = self.submit(score=200)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Score.objects.count(), 1)
+
+    def test_keys_are_scoped_to_the_user(self):
+        self.submit()
+        self.user = User.objects.create_user(
+            email='other@example.com', password='password123'
+        )
+
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Score.objects.count(), 2)
+
+    def test_server_errors_release_the_key(self):
+        with mock.patch.object(
+            Score.objects, 'create', side_effect=RuntimeError('db down')
+        ):
+            self.assertEqual(self.submit().status_code, 500)
+
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self.submit().status_code, 201)
+
+    def test_failed_requests_leave_no_writes(self):
+        # Fails after the score is created
+        with mock.patch(
+            'scores.views.logger.info', side_effect=RuntimeError('crash')
+        ):
+            self.assertEqual(self.submit().status_code, 500)
+
+        self.assertFalse(Score.objects.exists())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self.submit().status_code, 201)
+
+    def test_abandoned_claims_expire_after_the_lease(self):
+        # As if the first request's worker died mid-request
+        self.submit()
+        responses.clear()
+        Score.objects.all().delete()
+        IdempotencyRecord.objects.update(status_code=None, data=None)
+        self.assertEqual(self.submit().status_code, 409)
+
+        IdempotencyRecord.objects.update(
+            created_at=timezone.now() - timedelta(seconds=61)
+        )
+
+        self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(Score.objects.count(), 1)
+
+    def test_requests_without_a_key_are_unchanged(self):
+        self.submit(score=100, key=None)
+        self.submit(score=200, key=None)
+
+        self.assertEqual(Score.objects.count(), 2)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+@override_settings(REPLAY_REQUIRED=False, RATE_LIMIT_SYNC_INTERVAL=0)
+class ConcurrentIdempotencyTests(IdempotencyTestMixin, TransactionTestCase):
+    def setUp(self):
+        # Background writers would contend for SQLite's table locks
+        publish = mock.patch.object(invalidation.bus, 'publish')
+        publish.start()
+        self.addCleanup(publish.stop)
+        super().setUp()
+
+    def test_parallel_duplicates_execute_once(self):
+        threads = 8
+        barrier = threading.Barrier(threads)
+        entered = threading.Event()
+        release = threading.Event()
+        create = Score.objects.create
+        calls = []
+
+        def slow_create(**kwargs):
+            # Hold the first request inside the scoring path while its
+            # duplicates arrive
+            calls.append(kwargs)
+            entered.set()
+            release.wait(5)
+            return create(**kwargs)
+
+        statuses = []
+
+        def send():
+            barrier.wait()
+            try:
+                statuses.append(self.submit().status_code)
+            finally:
+                connection.close()
+
+        with mock.patch.object(Score.objects, 'create', slow_create):
+            workers = [threading.Thread(target=send) for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            entered.wait(5)
+            while len(statuses) < threads - 1:
+                release.wait(0.01)
+            release.set()
+            for worker in workers:
+                worker.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(Score.objects.count(), 1)
+        self.assertEqual(sorted(statuses), [201] + [409] * (threads - 1))
+        self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(Score.objects.count(), 1)
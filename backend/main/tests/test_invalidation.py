@@ -0,0 +1,182 @@
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from main import invalidation
+from main.invalidation import Bus, LocalCache, invalidate
+from main.models import InvalidationEvent
+
+
+@override_settings(SCORE_CACHE_SIZE=3, SCORE_CACHE_TTL=60)
+class LocalCacheTests(TestCase):
+    def setUp(self):
+        self.cache = LocalCache('test')
+        self.addCleanup(invalidation.caches.remove, self.cache)
+        self.fills = []
+
+    def get(self, key, *tags):
+        def fill():
+            self.fills.append(key)
+            return f'value of {key}', tags
+
+        # Outside the test's transaction, as a request would be
+        with mock.patch.object(
+            invalidation.connection, 'in_atomic_block', False
+        ):
+            return self.cache.get(key, fill)
+
+    def test_hits_until_a_tag_is_evicted(self):
+        self.assertEqual(self.get('a', 'top', 'user:1'), 'value of a')
+        self.get('b', 'user:2')
+        self.get('a')
+        self.get('b')
+
+        self.cache.evict(['user:1'])
+        self.get('a')
+        self.get('b')
+
+        self.assertEqual(self.fills, ['a', 'b', 'a'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 3))
+        self.assertEqual(self.cache.hit_rate(), 0.5)
+
+    def test_least_recently_used_entries_go_first(self):
+        for key in 'abc':
+            self.get(key, 'top')
+        self.get('a')
+        self.get('d', 'top')
+
+        self.assertEqual(list(self.cache.entries), ['c', 'a', 'd'])
+        self.cache.evict(['top'])
+        self.assertEqual(self.cache.tagged, {})
+
+    def test_entries_expire(self):
+        with override_settings(SCORE_CACHE_TTL=-1):
+            self.get('a')
+            self.get('a')
+        self.get('a')
+        self.get('a')
+
+        self.assertEqual(self.fills, ['a', 'a', 'a'])
+
+    def test_a_fill_overlapping_an_eviction_is_not_stored(self):
+        def fill():
+            # A write commits while the read is running
+            self.cache.evict(['top'])
+            return 'old', ['top']
+
+        with mock.patch.object(
+            invalidation.connection, 'in_atomic_block', False
+        ):
+            self.assertEqual(self.cache.get('a', fill), 'old')
+        self.assertEqual(self.cache.entries, {})
+
+    def test_not_cached_in_a_transaction(self):
+        self.cache.get('a', lambda: ('value', ['top']))
+        self.assertEqual(self.cache.entries, {})
+
+
+@override_settings(SCORE_CACHE_SIZE=10)
+class InvalidationTests(TestCase):
+    def setUp(self):
+        self.cache = LocalCache('test')
+        self.addCleanup(invalidation.caches.remove, self.cache)
+        with mock.patch.object(
+            invalidation.connection, 'in_atomic_block', False
+        ):
+            self.cache.get('a', lambda: ('value', ['top']))
+
+    def test_evicts_and_publishes_on_commit(self):
+        with mock.patch.object(invalidation.bus, 'publish') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                with transaction.atomic():
+                    invalidate('top', 'user:1')
+                self.assertIn('a', self.cache.entries)
+                publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(self.cache.entries, {})
+        publish.assert_called_once_with(('top', 'user:1'))
+
+    def test_other_processes_evict_polled_events(self):
+        sender, receiver = Bus(), Bus()
+        sender.sender, receiver.sender = 'web-1:10', 'web-2:20'
+        last = receiver.poll_once(0)
+
+        # The publisher thread is flushed by hand
+        with mock.patch.object(invalidation.threading, 'Thread'), mock.patch(
+            'atexit.register'
+        ):
+            sender.publish(['user:1'])
+            sender.publish(['top', 'user:1'])
+        # Events are rows, not NOTIFYs, off PostgreSQL
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            sender.flush()
+
+        self.assertEqual(
+            list(
+                InvalidationEvent.objects.filter(pk__gt=last).values_list(
+                    'sender', 'tags'
+                )
+            ),
+            [('web-1:10', 'top user:1')],
+        )
+        receiver.poll_once(last)
+        self.assertEqual(self.cache.entries, {})
+
+        # A process does not apply its own events
+        with mock.patch.object(invalidation, 'evict') as evict:
+            sender.poll_once(last)
+        evict.assert_not_called()
+
+    def test_payloads_fit_in_a_notify(self):
+        tags = {f'user:{i}' for i in range(2000)}
+
+        payloads = list(invalidation.payloads(tags))
+
+        self.assertEqual(len(payloads), 3)
+        self.assertTrue(
+            all(
+                len(payload) < invalidation.MAX_PAYLOAD for payload in payloads
+            )
+        )
+        self.assertEqual(
+            {tag for payload in payloads for tag in payload.split()}, tags
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'NOTIFY is PostgreSQL only')
+class NotifyTests(TransactionTestCase):
+    def test_flushed_events_reach_listeners(self):
+        # A second connection, as another worker's listener would have
+        listener = connection.copy()
+        self.addCleanup(listener.close)
+        with listener.cursor() as cursor:
+            channel = listener.ops.quote_name(settings.INVALIDATION_CHANNEL)
+            cursor.execute(f'LISTEN {channel}')
+        received = []
+        listener.connection.add_notify_handler(received.append)
+
+        sender = Bus()
+        sender.sender = 'web-1:10'
+        with mock.patch.object(invalidation.threading, 'Thread'), mock.patch(
+            'atexit.register'
+        ):
+            sender.publish(['top', 'user:1'])
+        sender.flush()
+
+        # Notifications are read along with the results of a query
+        for _ in range(50):
+            with listener.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if received:
+                break
+            time.sleep(0.1)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0].channel, settings.INVALIDATION_CHANNEL)
+        sender_id, tags = received[0].payload.split(' ', 1)
+        self.assertEqual(sender_id, 'web-1:10')
+        self.assertEqual(set(tags.split()), {'top', 'user:1'})
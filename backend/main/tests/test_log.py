@@ -0,0 +1,179 @@
+import io
+import json
+import logging
+import sys
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from main.log import (
+    JSONFormatter,
+    QueuedStreamHandler,
+    RequestIdFilter,
+    SamplingFilter,
+    lazy,
+    request_id,
+)
+
+
+def make_record(level=logging.INFO, msg='Hello %s', args=('world',), **extra):
+    record = logging.LogRecord('test', level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class JSONFormatterTests(SimpleTestCase):
+    def test_writes_extra_fields_and_evaluates_lazy_ones(self):
+        calls = []
+
+        def expensive(value):
+            calls.append(value)
+            return value * 2
+
+        record = make_record(user_id=7, total=lazy(expensive, 21))
+        self.assertEqual(calls, [])
+
+        entry = json.loads(JSONFormatter().format(record))
+
+        self.assertEqual(calls, [21])
+        self.assertEqual(entry['message'], 'Hello world')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'test')
+        self.assertEqual((entry['user_id'], entry['total']), (7, 42))
+        self.assertTrue(entry['time'].endswith('Z'))
+        self.assertNotIn('request_id', entry)
+
+    def test_includes_the_exception(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord(
+                'test',
+                logging.ERROR,
+                __file__,
+                1,
+                'Failed',
+                (),
+                sys.exc_info(),
+            )
+
+        entry = json.loads(JSONFormatter().format(record))
+
+        self.assertIn('ValueError: boom', entry['exception'])
+
+
+class SamplingFilterTests(SimpleTestCase):
+    def test_keeps_a_fraction_of_records(self):
+        sampler = SamplingFilter(rate=0.25)
+        with mock.patch('main.log.random.random', side_effect=[0.1, 0.3]):
+            self.assertTrue(sampler.filter(make_record()))
+            self.assertFalse(sampler.filter(make_record()))
+
+    def test_caps_records_per_second(self):
+        sampler = SamplingFilter(per_second=2)
+        with mock.patch('main.log.time.monotonic', return_value=100.5):
+            kept = [sampler.filter(make_record()) for _ in range(5)]
+        self.assertEqual(kept, [True, True, False, False, False])
+        with mock.patch('main.log.time.monotonic', return_value=101.0):
+            self.assertTrue(sampler.filter(make_record()))
+
+    def test_warnings_always_pass(self):
+        sampler = SamplingFilter(rate=0, per_second=0)
+        self.assertFalse(sampler.filter(make_record()))
+        self.assertTrue(sampler.filter(make_record(logging.WARNING)))
+
+
+class QueuedStreamHandlerTests(SimpleTestCase):
+    def handler(self, **kwargs):
+        stream = io.StringIO()
+        handler = QueuedStreamHandler(stream, **kwargs)
+        handler.setFormatter(JSONFormatter())
+        self.addCleanup(handler.close)
+        return handler, stream
+
+    def lines(self, stream):
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    def test_writes_on_a_background_thread(self):
+        handler, stream = self.handler()
+        threads = []
+        handler.format = lambda record: (
+            threads.append(threading.current_thread().name)
+            or JSONFormatter().format(record)
+        )
+
+        handler.handle(make_record())
+        handler.flush()
+
+        self.assertEqual(threads, ['log-writer'])
+        self.assertEqual(self.lines(stream)[0]['message'], 'Hello world')
+
+    def test_queued_records_keep_no_references(self):
+        handler, stream = self.handler()
+        args = ['world']
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = make_record(args=(args,), request=object())
+            record.exc_info = sys.exc_info()
+
+        handler.handle(record)
+        args.append('again')
+        handler.flush()
+
+        self.assertIsNone(record.args)
+        self.assertIsNone(record.exc_info)
+        self.assertNotIn('request', vars(record))
+        entry = self.lines(stream)[0]
+        self.assertEqual(entry['message'], "Hello ['world']")
+        self.assertIn('ValueError: boom', entry['exception'])
+
+    def test_drops_and_counts_records_when_full(self):
+        handler, stream = self.handler(queue_size=2)
+        blocked = threading.Event()
+        release = threading.Event()
+        write = handler.write
+
+        def slow_write(record):
+            blocked.set()
+            release.wait(5)
+            write(record)
+
+        handler.write = slow_write
+        handler.handle(make_record(args=(0,)))
+        blocked.wait(5)
+        # One record is being written and one waits: the rest are dropped
+        for i in range(1, 5):
+            handler.handle(make_record(args=(i,)))
+        handler.write = write
+        release.set()
+        handler.flush()
+
+        self.assertEqual(
+            [line['message'] for line in self.lines(stream)],
+            [
+                'Hello 0',
+                'Dropped 3 log records: the queue was full',
+                'Hello 1',
+            ],
+        )
+
+
+class RequestIdTests(SimpleTestCase):
+    def test_filter_stamps_the_current_request(self):
+        token = request_id.set('abc')
+        self.addCleanup(request_id.reset, token)
+        record = make_record()
+        RequestIdFilter().filter(record)
+        self.assertEqual(
+            json.loads(JSONFormatter().format(record))['request_id'], 'abc'
+        )
+
+    def test_middleware_uses_or_generates_the_header(self):
+        response = self.client.get('/healthz', HTTP_X_REQUEST_ID='lb-1234')
+        self.assertEqual(response['X-Request-ID'], 'lb-1234')
+
+        response = self.client.get('/healthz', HTTP_X_REQUEST_ID='bad id\n')
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+        self.assertIsNone(request_id.get())
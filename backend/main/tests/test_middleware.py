@@ -0,0 +1,79 @@
+import gzip
+
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+
+from main.middleware import CompressionMiddleware, negotiate_encoding
+
+BODY = b'{"score": 1000, "username": "player@example.com"}' * 50
+
+
+@override_settings(COMPRESSION_MIN_SIZE=512)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, body=BODY, method='get', **headers):
+        request = getattr(self.factory, method)(
+            '/api/scores/leaderboard/', **headers
+        )
+        middleware = CompressionMiddleware(lambda request: response)
+        response = HttpResponse(body)
+        return middleware(request)
+
+    def test_compresses_when_gzip_is_accepted(self):
+        response = self.process(HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_skips_small_unaccepted_and_unsafe_responses(self):
+        cases = [
+            self.process(body=b'{}', HTTP_ACCEPT_ENCODING='gzip'),
+            self.process(HTTP_ACCEPT_ENCODING='identity'),
+            self.process(method='post', HTTP_ACCEPT_ENCODING='gzip'),
+        ]
+        for response in cases:
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_negotiate_encoding_honours_quality_values(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, identity'))
+        self.assertIn(negotiate_encoding('*'), ('br', 'gzip'))
+
+
+@override_settings(CORS_ALLOWED_ORIGINS=['http://localhost:3000'])
+class LeanMiddlewareTests(TestCase):
+    def test_api_routes_skip_session_and_clickjacking_middleware(self):
+        response = self.client.get('/api/scores/leaderboard/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertFalse(response.has_header('X-Frame-Options'))
+
+    def test_admin_keeps_full_middleware_chain(self):
+        response = self.client.get('/admin/login/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_preflight_is_answered_with_long_max_age(self):
+        response = self.client.options(
+            '/api/scores/submit/',
+            HTTP_ORIGIN='http://localhost:3000',
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD='POST',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Access-Control-Max-Age'], '86400')
+        self.assertEqual(
+            response['Access-Control-Allow-Origin'], 'http://localhost:3000'
+        )
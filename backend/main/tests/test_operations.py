@@ -0,0 +1,180 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, NotSupportedError, connection, models
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations import AddField
+from django.db.models import F, Q
+from django.test import TransactionTestCase
+
+from main.models import BackfillProgress
+from main.operations import (
+    AddConstraintNotValid,
+    AddIndexConcurrently,
+    Backfill,
+    ValidateConstraint,
+    backfill,
+)
+from scores.models import Score
+
+User = get_user_model()
+
+ROWS = 20000
+
+
+class Interrupted(Exception):
+    pass
+
+
+class OnlineMigrationTests(TransactionTestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='seeded@example.com')
+        Score.objects.bulk_create(
+            (Score(user=user, score=i) for i in range(ROWS)),
+            batch_size=5000,
+        )
+        self.state = MigrationLoader(connection).project_state()
+        self.state = self.apply(
+            AddField('score', 'bonus', models.IntegerField(null=True))
+        )
+
+    def apply(self, operation):
+        '''Apply `operation` to the scores app; undo it after the test.'''
+        from_state, to_state = self.state, self.state.clone()
+        operation.state_forwards('scores', to_state)
+        with connection.schema_editor(atomic=operation.atomic) as editor:
+            operation.database_forwards('scores', editor, from_state, to_state)
+
+        def undo():
+            with connection.schema_editor(atomic=operation.atomic) as editor:
+                operation.database_backwards(
+                    'scores', editor, to_state, from_state
+                )
+
+        self.addCleanup(undo)
+        self.state = to_state
+        return to_state
+
+    def scores(self):
+        return self.state.apps.get_model('scores', 'Score').objects
+
+    def test_backfill_resumes_after_an_interruption(self):
+        progress_model = self.state.apps.get_model('main', 'BackfillProgress')
+        batches = []
+
+        def sleep(seconds):
+            batches.append(seconds)
+            if len(batches) == 3:
+                raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            backfill(
+                self.scores().model,
+                'bonus',
+                F('score') * 2,
+                progress_model,
+                using='default',
+                batch_size=3000,
+                duty_cycle=0.5,
+                sleep=sleep,
+            )
+        progress = BackfillProgress.objects.get()
+        self.assertEqual(progress.scanned, 9000)
+        self.assertAlmostEqual(progress.fraction, 9000 / ROWS)
+        self.assertIsNone(progress.finished_at)
+        self.assertEqual(
+            self.scores().filter(bonus__isnull=True).count(), 11000
+        )
+
+        # A row written by new code during the backfill is left alone
+        self.scores().filter(score=ROWS - 1).update(bonus=-1)
+        self.apply(Backfill('score', 'bonus', F('score') * 2, batch_size=3000))
+
+        progress.refresh_from_db()
+        self.assertEqual(progress.name, 'scores.score.bonus')
+        self.assertEqual(progress.scanned, ROWS)
+        self.assertEqual(progress.updated, ROWS - 1)
+        self.assertEqual(progress.fraction, 1)
+        self.assertIsNotNone(progress.finished_at)
+        self.assertFalse(
+            self.scores().exclude(bonus=F('score') * 2).exclude(bonus=-1)
+        )
+
+    def test_backfill_then_constrain_and_index(self):
+        self.apply(Backfill('score', 'bonus', F('score'), duty_cycle=1))
+        constraint = models.CheckConstraint(
+            check=Q(bonus__isnull=False), name='score_bonus_not_null'
+        )
+        self.apply(AddConstraintNotValid('score', constraint))
+        self.apply(ValidateConstraint('score', 'score_bonus_not_null'))
+        self.apply(
+            AddIndexConcurrently(
+                'score', models.Index(fields=['bonus'], name='score_bonus')
+            )
+        )
+
+        self.assertIn(
+            'score_bonus',
+            connection.introspection.get_constraints(
+                connection.cursor(), 'scores_score'
+            ),
+        )
+        with self.assertRaises(IntegrityError):
+            self.scores().filter(score=1).update(bonus=None)
+
+    def test_backfill_runs_again_after_being_reversed(self):
+        operation = Backfill('score', 'bonus', F('score'), duty_cycle=1)
+        to_state = self.state.clone()
+
+        def migrate(forwards):
+            with connection.schema_editor(atomic=False) as editor:
+                if forwards:
+                    operation.database_forwards(
+                        'scores', editor, self.state, to_state
+                    )
+                else:
+                    operation.database_backwards(
+                        'scores', editor, to_state, self.state
+                    )
+
+        migrate(forwards=True)
+        migrate(forwards=False)
+        self.assertFalse(BackfillProgress.objects.exists())
+
+        # As if the column had been dropped and added again
+        self.scores().update(bonus=None)
+        migrate(forwards=True)
+
+        self.assertFalse(self.scores().filter(bonus__isnull=True).exists())
+        self.assertIsNotNone(BackfillProgress.objects.get().finished_at)
+
+    def test_backfill_refuses_to_run_in_a_transaction(self):
+        operation = Backfill('score', 'bonus', 0)
+        to_state = self.state.clone()
+        with self.assertRaisesMessage(NotSupportedError, 'atomic = False'):
+            with connection.schema_editor() as editor:
+                operation.database_forwards(
+                    'scores', editor, self.state, to_state
+                )
+        self.assertFalse(BackfillProgress.objects.exists())
+
+    def test_progress_command(self):
+        out = StringIO()
+        call_command('backfill_progress', stdout=out)
+        self.assertEqual(out.getvalue(), 'No backfills have run\n')
+
+        self.apply(Backfill('score', 'bonus', 0, duty_cycle=1))
+        BackfillProgress.objects.create(
+            name='scores.score.other', first_pk=1, last_pk=50, max_pk=100
+        )
+
+        out = StringIO()
+        call_command('backfill_progress', stdout=out)
+        lines = out.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertRegex(
+            lines[1], r'^scores.score.bonus +100.0% +20,000 .*done'
+        )
+        self.assertRegex(lines[2], r'^scores.score.other +50.0% .*s left')
@@ -0,0 +1,246 @@
+import io
+import marshal
+import pickle
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import storages
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from main.models import ProfileArtifact, ProfilingSession
+from main.profiling import Profile, profiler
+
+User = get_user_model()
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class ProfileFormatTests(SimpleTestCase):
+    def test_collapsed_stacks_and_pstats(self):
+        profile = Profile(0.005)
+        for _ in range(3):
+            profile.add(sys._getframe())
+
+        collapsed = profile.collapsed().splitlines()
+        self.assertEqual(len(collapsed), 1)
+        self.assertTrue(
+            collapsed[0].endswith(
+                f'test_collapsed_stacks_and_pstats ({__file__}:30) 3'
+            )
+        )
+
+        stats = pstats.Stats(_StatsFile(profile.pstats()))
+        function = (__file__, 30, 'test_collapsed_stacks_and_pstats')
+        calls, _, own, cumulative, callers = stats.stats[function]
+        self.assertEqual((calls, own, cumulative), (3, 0.015, 0.015))
+        self.assertEqual(len(callers), 1)
+
+
+class _StatsFile:
+    # `pstats.Stats` accepts anything with `create_stats()` and `stats`
+    def __init__(self, data):
+        self.data = data
+
+    def create_stats(self):
+        self.stats = marshal.loads(self.data)
+
+
+class ProfilingSessionTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage = override_settings(
+            STORAGES={
+                'profiles': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': directory.name},
+                }
+            }
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+        profiler.reset()
+        self.addCleanup(profiler.reset)
+
+    def start(self, **fields):
+        session = ProfilingSession.objects.create(
+            expires_at=timezone.now() + timedelta(minutes=1),
+            remaining=fields.get('requests') or 0,
+            **fields,
+        )
+        profiler.poll()
+        return session
+
+    def stop(self, session):
+        ProfilingSession.objects.filter(pk=session.pk).update(
+            expires_at=timezone.now()
+        )
+        profiler.poll()
+
+    def read(self, artifact):
+        with storages['profiles'].open(artifact.name, 'rb') as file:
+            return file.read()
+
+    def test_middleware_is_inert_without_sessions(self):
+        profiler.poll()
+        with self.assertNumQueries(0):
+            self.client.get('/healthz')
+        self.assertFalse(ProfileArtifact.objects.exists())
+
+    def test_profiles_the_next_requests_under_a_path(self):
+        session = self.start(path='/healthz', requests=2, interval=1)
+
+        for _ in range(3):
+            self.client.get('/healthz')
+        self.client.get('/favicon.ico')
+
+        session.refresh_from_db()
+        self.assertEqual(session.remaining, 0)
+        artifacts = session.artifacts.all()
+        self.assertEqual(
+            [(a.kind, a.label) for a in artifacts],
+            [('collapsed', 'GET /healthz'), ('pstats', 'GET /healthz')] * 2,
+        )
+        # Exhausted sessions are dropped without another poll
+        self.assertEqual(profiler.requests, ())
+
+    def test_profiles_every_thread_for_a_window(self):
+        session = self.start(interval=1)
+        worker = threading.Thread(target=busy, args=(0.1,))
+        worker.start()
+        worker.join()
+        self.stop(session)
+
+        collapsed = session.artifacts.get(kind='collapsed')
+        self.assertGreater(collapsed.samples, 0)
+        self.assertIn(b'busy (', self.read(collapsed))
+        self.assertFalse(profiler.running)
+
+    def test_memory_session_diffs_snapshots(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        session = self.start(kind=ProfilingSession.Kind.MEMORY)
+        self.assertTrue(tracemalloc.is_tracing())
+
+        leak = [bytearray(1024) for _ in range(1000)]
+        self.stop(session)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        start, end = session.artifacts.filter(kind='snapshot')
+        self.assertEqual((start.label, end.label), ('start', 'end'))
+        snapshot = pickle.loads(self.read(end))
+        self.assertIsInstance(snapshot, tracemalloc.Snapshot)
+        diff = self.read(session.artifacts.get(kind='diff')).decode()
+        self.assertIn(f'{__file__}:', diff)
+        del leak
+
+    def test_overlapping_memory_sessions_share_tracing(self):
+        first = self.start(kind=ProfilingSession.Kind.MEMORY)
+        second = self.start(kind=ProfilingSession.Kind.MEMORY)
+
+        self.stop(first)
+        self.assertTrue(tracemalloc.is_tracing())
+        self.stop(second)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        for session in (first, second):
+            self.assertEqual(
+                [a.label for a in session.artifacts.filter(kind='snapshot')],
+                ['start', 'end'],
+            )
+            self.assertTrue(session.artifacts.filter(kind='diff').exists())
+
+
+class ProfilingAdminTests(TestCase):
+    # Management form of the (read-only) artifacts inline
+    inline = {'artifacts-TOTAL_FORMS': 0, 'artifacts-INITIAL_FORMS': 0}
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='profiler@example.com', password='adminpass'
+        )
+        self.client.force_login(self.admin)
+
+    def test_superuser_starts_and_stops_a_session(self):
+        response = self.client.post(
+            '/admin/main/profilingsession/add/',
+            {
+                'kind': 'cpu',
+                'path': '/api/scores/submit/',
+                'requests': 20,
+                'duration': 300,
+                'interval': 5,
+                **self.inline,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        session = ProfilingSession.objects.get()
+        self.assertEqual(session.remaining, 20)
+        self.assertEqual(session.created_by, self.admin)
+        self.assertGreater(session.expires_at, timezone.now())
+
+        self.client.post(
+            '/admin/main/profilingsession/',
+            {'action': 'stop', '_selected_action': [session.pk]},
+        )
+        session.refresh_from_db()
+        self.assertLessEqual(session.expires_at, timezone.now())
+
+    def test_memory_sessions_cover_a_window(self):
+        response = self.client.post(
+            '/admin/main/profilingsession/add/',
+            {
+                'kind': 'memory',
+                'requests': 5,
+                'duration': 60,
+                'interval': 5,
+                **self.inline,
+            },
+        )
+        self.assertContains(response, 'Memory profiles cover a time window.')
+        self.assertFalse(ProfilingSession.objects.exists())
+
+    def test_staff_without_superuser_cannot_see_sessions(self):
+        staff = User.objects.create_user(
+            email='staff@example.com', password='pass', is_staff=True
+        )
+        self.client.force_login(staff)
+        response = self.client.get('/admin/main/profilingsession/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_downloads_artifacts(self):
+        session = ProfilingSession.objects.create(expires_at=timezone.now())
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            STORAGES={
+                'profiles': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': location},
+                }
+            }
+        ):
+            name = storages['profiles'].save(
+                'profile.collapsed', io.BytesIO(b'main 1\n')
+            )
+            artifact = ProfileArtifact.objects.create(
+                session=session, kind='collapsed', name=name, worker='w-1'
+            )
+            change = self.client.get(
+                f'/admin/main/profilingsession/{session.pk}/change/'
+            )
+            response = self.client.get(
+                f'/admin/main/profilingsession/artifacts/{artifact.pk}/'
+            )
+            body = b''.join(response.streaming_content)
+
+        self.assertContains(change, 'profile.collapsed')
+        self.assertEqual(body, b'main 1\n')
@@ -0,0 +1,170 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django.utils import timezone
+from social_django.models import UserSocialAuth
+
+from main.models import IdempotencyRecord, ProfilingSession
+from main.purge import Purge, inactive_users, purge_scores, purge_users
+from scores.models import GroupHighScore, Replay, Score
+
+User = get_user_model()
+
+
+class PurgeTests(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name='Purged club')
+        self.heavy = self.player('heavy@example.com', scores=7)
+        self.other = self.player('other@example.com', scores=2)
+
+    def player(self, email, scores):
+        user = User.objects.create_user(email=email)
+        user.groups.add(self.group)
+        for i in range(scores):
+            score = Score.objects.create(user=user, score=(i + 1) * 10)
+            Replay.objects.create(score=score, seed=i, ticks=10)
+        UserSocialAuth.objects.create(user=user, provider='google', uid=email)
+        IdempotencyRecord.objects.create(
+            user=user, key='k', fingerprint='f', expires_at=timezone.now()
+        )
+        return user
+
+    def test_deletes_users_and_what_cascades_in_batches(self):
+        session = ProfilingSession.objects.create(
+            created_by=self.heavy, expires_at=timezone.now()
+        )
+        sleeps = []
+        purge = Purge(batch_size=3, duty_cycle=0.5, sleep=sleeps.append)
+
+        # Dependents are deleted by primary key, never loaded as objects
+        with mock.patch.object(Score, 'from_db', side_effect=AssertionError):
+            deleted = purge.delete(User.objects.filter(pk=self.heavy.pk))
+
+        self.assertEqual(deleted['users.User'], 1)
+        self.assertEqual(deleted['scores.Score'], 7)
+        self.assertEqual(deleted['scores.Replay'], 7)
+        self.assertEqual(deleted['social_django.UserSocialAuth'], 1)
+        self.assertFalse(User.objects.filter(pk=self.heavy.pk).exists())
+        self.assertEqual(Score.objects.count(), 2)
+        self.assertEqual(Replay.objects.count(), 2)
+        self.assertEqual(
+            list(GroupHighScore.objects.values_list('user', flat=True)),
+            [self.other.pk],
+        )
+        self.assertEqual(self.group.user_set.get(), self.other)
+        session.refresh_from_db()
+        self.assertIsNone(session.created_by)
+        # One pause per batch: 7 replays and 7 scores in 3s, and the rest
+        self.assertGreater(len(sleeps), 6)
+
+    def test_count_matches_what_is_deleted(self):
+        users = User.objects.filter(pk__in=[self.heavy.pk, self.other.pk])
+        counts = Purge().count(users)
+        deleted = purge_users(users, batch_size=2, duty_cycle=1)
+        self.maxDiff = None
+        self.assertEqual(sorted(deleted.items()), sorted(counts.items()))
+
+    def test_user_delete_is_atomic(self):
+        def fail(**kwargs):
+            raise RuntimeError
+
+        post_delete.connect(fail, sender=Score)
+        self.addCleanup(post_delete.disconnect, fail, sender=Score)
+        # (the collector's transaction joins the test's without a savepoint)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.heavy.delete()
+
+        self.assertTrue(User.objects.filter(pk=self.heavy.pk).exists())
+        self.assertEqual(Score.objects.filter(user=self.heavy).count(), 7)
+
+    def test_purging_scores_re_ranks_groups(self):
+        Score.objects.filter(user=self.heavy, score__gte=60).update(
+            status=Score.Status.REJECTED
+        )
+
+        purge_scores(
+            Score.objects.filter(status=Score.Status.REJECTED),
+            batch_size=1,
+            duty_cycle=1,
+        )
+
+        self.assertEqual(Score.objects.filter(user=self.heavy).count(), 5)
+        self.assertEqual(
+            GroupHighScore.objects.get(user=self.heavy).points, 50
+        )
+
+    def test_inactive_users(self):
+        old = timezone.now() - timedelta(days=400)
+        User.objects.filter(pk=self.heavy.pk).update(last_login=old)
+        User.objects.filter(pk=self.other.pk).update(date_joined=old)
+        User.objects.create_user(email='staff@example.com', is_staff=True)
+        User.objects.filter(email='staff@example.com').update(date_joined=old)
+
+        self.assertEqual(set(inactive_users(365)), {self.heavy, self.other})
+        self.assertFalse(inactive_users(500).exists())
+
+
+class PurgeCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='gone@example.com')
+        Score.objects.create(user=self.user, score=10)
+        Score.objects.create(user=self.user, score=20, status='rejected')
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command('purge', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_and_purge(self):
+        output = self.purge('--email', 'gone@example.com', '--dry-run')
+        self.assertIn('Would delete 2 scores.Score, 1 users.User', output)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+        output = self.purge('--rejected-scores', '--duty-cycle', '1')
+        self.assertIn('Deleted 1 scores.Score', output)
+
+        output = self.purge('--email', 'gone@example.com')
+        self.assertIn('Deleted 1 scores.Score, 1 users.User', output)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_requires_a_target(self):
+        with self.assertRaisesMessage(CommandError, 'Pass --email'):
+            self.purge()
+        with self.assertRaisesMessage(CommandError, '--duty-cycle'):
+            self.purge('--rejected-scores', '--duty-cycle', '0')
+
+
+class UserAdminDeleteTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='purger@example.com', password='pass'
+        )
+        self.client.force_login(self.admin)
+        self.user = User.objects.create_user(email='player@example.com')
+        for score in range(5):
+            Score.objects.create(user=self.user, score=score)
+
+    def test_confirmation_counts_related_rows(self):
+        response = self.client.get(f'/admin/users/user/{self.user.pk}/delete/')
+        self.assertContains(response, 'Scores: 5')
+        self.assertContains(response, 'player@example.com')
+
+    def test_delete_action_purges(self):
+        response = self.client.post(
+            '/admin/users/user/',
+            {
+                'action': 'delete_selected',
+                '_selected_action': [self.user.pk],
+                'post': 'yes',
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Score.objects.exists())
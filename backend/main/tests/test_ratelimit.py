@@ -0,0 +1,199 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from main.models import RateLimitCounter
+from main.ratelimit import Limiter, add_usage, limiter, parse_rate
+
+User = get_user_model()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LimiterTests(TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.limiter = Limiter(clock=self.clock)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('60/min'), (60, 1.0))
+        self.assertEqual(parse_rate('20/hour'), (20, 20 / 3600))
+        self.assertEqual(parse_rate('5/s'), (5, 5.0))
+
+    def test_burst_then_refill(self):
+        limits = [('a', 3, 0.5)]
+        for _ in range(3):
+            self.assertEqual(self.limiter.take(limits), 0)
+        self.assertEqual(self.limiter.take(limits), 2.0)
+
+        self.clock.now += 1
+        self.assertEqual(self.limiter.take(limits), 1.0)
+        self.clock.now += 1
+        self.assertEqual(self.limiter.take(limits), 0)
+
+    def test_refused_request_takes_no_tokens(self):
+        self.limiter.take([('empty', 1, 1)])
+
+        self.assertEqual(
+            self.limiter.take([('full', 2, 1), ('empty', 1, 1)]), 1
+        )
+        self.assertEqual(self.limiter.take([('full', 2, 1)]), 0)
+        self.assertEqual(self.limiter.take([('full', 2, 1)]), 0)
+
+    def test_sync_applies_other_processes_usage(self):
+        other = Limiter(clock=self.clock)
+        limits = [('shared', 10, 0.001)]
+        for _ in range(4):
+            self.limiter.take(limits)
+        for _ in range(5):
+            other.take(limits)
+
+        self.limiter.sync()
+        other.sync()
+        self.limiter.sync()
+
+        self.assertEqual(RateLimitCounter.objects.get(key='shared').used, 9)
+        # 10 - 4 taken here - 5 taken by the other process
+        self.assertEqual(self.limiter.take(limits), 0)
+        self.assertGreater(self.limiter.take(limits), 0)
+        # Until its next sync, the other process misses that last token
+        self.assertEqual(other.take(limits), 0)
+        self.assertGreater(other.take(limits), 0)
+
+    def test_sync_drops_idle_full_buckets(self):
+        self.limiter.take([('idle', 2, 1)])
+        self.limiter.sync()
+        self.clock.now += 5
+
+        with self.assertNumQueries(0):
+            self.limiter.sync()
+
+        self.assertEqual(self.limiter.buckets, {})
+
+    def test_recreated_bucket_is_not_charged_for_applied_usage(self):
+        limits = [('returning', 10, 1)]
+        for _ in range(3):
+            self.limiter.take(limits)
+        self.limiter.sync()
+        self.clock.now += 10
+        self.limiter.sync()
+        self.assertEqual(self.limiter.buckets, {})
+
+        self.limiter.take(limits)
+        self.limiter.sync()
+
+        self.assertEqual(self.limiter.buckets['returning'][0], 9)
+
+    def test_sync_prunes_old_periods(self):
+        RateLimitCounter.objects.create(key='old', period=1, used=3)
+        self.limiter.take([('new', 2, 1)])
+
+        self.limiter.sync()
+
+        # Requests in other tests may have been synced too
+        keys = set(RateLimitCounter.objects.values_list('key', flat=True))
+        self.assertNotIn('old', keys)
+        self.assertIn('new', keys)
+
+    def test_add_usage_returns_totals(self):
+        self.assertEqual(add_usage(7, {'a': 2, 'b': 0}), {'a': 2, 'b': 0})
+        self.assertEqual(add_usage(7, {'a': 3}), {'a': 5})
+
+
+@override_settings(
+    RATE_LIMITS={
+        'leaderboard': {'ip': '2/min'},
+        'submit': {'user': '1/min'},
+        'login': {'username': '2/hour'},
+    },
+    RATE_LIMIT_SYNC_INTERVAL=0,
+    REPLAY_REQUIRED=False,
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        limiter.clear()
+        self.addCleanup(limiter.clear)
+        self.client = APIClient()
+
+    def test_limited_by_ip(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.client.get('/api/scores/leaderboard/').status_code, 200
+            )
+
+        response = self.client.get('/api/scores/leaderboard/')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        other = self.client.get(
+            '/api/scores/leaderboard/', REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(other.status_code, 200)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for n in range(3):
+            response = self.client.get(
+                '/api/scores/leaderboard/', HTTP_X_FORWARDED_FOR=f'10.0.0.{n}'
+            )
+        self.assertEqual(response.status_code, 429)
+
+    def test_forwarded_for_is_read_behind_proxies(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with self.settings(REST_FRAMEWORK=rest_framework):
+            # Only the address the proxy appended counts
+            for n in range(3):
+                response = self.client.get(
+                    '/api/scores/leaderboard/',
+                    HTTP_X_FORWARDED_FOR=f'10.0.0.{n}, 192.0.2.1',
+                )
+            self.assertEqual(response.status_code, 429)
+            response = self.client.get(
+                '/api/scores/leaderboard/',
+                HTTP_X_FORWARDED_FOR='10.0.0.1, 192.0.2.2',
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_limited_by_user(self):
+        user = User.objects.create_user(
+            email='player@example.com', password='password123'
+        )
+        self.client.force_authenticate(user)
+        payload = {'score': 100, 'time_played': 20}
+        self.assertEqual(
+            self.client.post('/api/scores/submit/', payload).status_code, 201
+        )
+
+        response = self.client.post('/api/scores/submit/', payload)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+    def test_login_limited_by_username(self):
+        for _ in range(2):
+            response = self.client.post(
+                '/jwt/create/',
+                {'email': 'Someone@example.com', 'password': 'wrong'},
+            )
+            self.assertEqual(response.status_code, 401)
+
+        response = self.client.post(
+            '/jwt/create/',
+            {'email': 'someone@example.com ', 'password': 'wrong'},
+        )
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(
+            '/jwt/create/', {'email': 'other@example.com', 'password': 'x'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_scopes_without_rates_are_not_limited(self):
+        for _ in range(3):
+            response = self.client.get('/api/scores/search/?q=ab')
+            self.assertEqual(response.status_code, 200)
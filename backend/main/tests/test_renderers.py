@@ -0,0 +1,58 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+
+from main import parsers, renderers
+from main.parsers import FastJSONParser
+from main.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'created_at': datetime.datetime(
+            2025, 4, 17, 13, 34, tzinfo=datetime.timezone.utc
+        ),
+        'ratio': Decimal('1.5'),
+        'scores': [{'id': 1, 'score': 300}],
+        1: 'non-string key',
+    }
+
+    def test_encodes_datetimes_and_decimals(self):
+        rendered = json.loads(FastJSONRenderer().render(self.data))
+
+        self.assertEqual(rendered['created_at'], '2025-04-17T13:34:00Z')
+        self.assertEqual(rendered['ratio'], 1.5)
+        self.assertEqual(rendered['scores'], [{'id': 1, 'score': 300}])
+        self.assertEqual(rendered['1'], 'non-string key')
+
+    def test_matches_stdlib_fallback(self):
+        fast = FastJSONRenderer().render(self.data)
+        with mock.patch.object(renderers, 'orjson', None):
+            fallback = FastJSONRenderer().render(self.data)
+
+        self.assertEqual(json.loads(fast), json.loads(fallback))
+
+    def test_indented_output_uses_stdlib(self):
+        rendered = FastJSONRenderer().render(
+            {'score': 1}, 'application/json; indent=4'
+        )
+        self.assertIn(b'\n    "score"', rendered)
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def test_parses_json(self):
+        data = FastJSONParser().parse(io.BytesIO(b'{"score": 250}'))
+        self.assertEqual(data, {'score': 250})
+
+    def test_invalid_json_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"score": NaN}'))
+
+        with mock.patch.object(parsers, 'orjson', None):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(b'{"score": NaN}'))
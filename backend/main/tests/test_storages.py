@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from main.management.commands.collectstatic import Command as Collectstatic
+from main.storages import (
+    IMMUTABLE_CACHE_CONTROL,
+    LocalSnapshotStorage,
+    PrecompressedManifestMixin,
+    SnapshotStorage,
+    StaticStorage,
+)
+
+CSS = b'body { background: url("../img/logo.png"); }\n' * 40
+
+
+class LocalStaticStorage(PrecompressedManifestMixin, FileSystemStorage):
+    '''Filesystem stand-in for the S3 bucket that records every upload.'''
+
+    def __init__(self, *args, **kwargs):
+        self.puts = []
+        super().__init__(*args, **kwargs)
+
+    def list_digests(self):
+        digests = {}
+        for root, _, files in os.walk(self.location):
+            for file in files:
+                path = os.path.join(root, file)
+                with open(path, 'rb') as content:
+                    name = os.path.relpath(path, self.location)
+                    digests[name] = hashlib.md5(content.read()).hexdigest()
+        return digests
+
+    def put(self, name, content, cache_control=None):
+        self.puts.append((name, cache_control))
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+
+
+class PrecompressedManifestStorageTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = FileSystemStorage(os.path.join(tmp.name, 'source'))
+        self.target = os.path.join(tmp.name, 'target')
+        self.source.save('css/app.css', ContentFile(CSS))
+        self.source.save('img/logo.png', ContentFile(b'\x89PNG'))
+
+    def collectstatic(self):
+        '''Mimic collectstatic: delete and re-save originals, then hash.'''
+        storage = LocalStaticStorage(location=self.target)
+        paths = {}
+        for name in ('css/app.css', 'img/logo.png'):
+            if storage.exists(name):
+                storage.delete(name)
+            with self.source.open(name) as file:
+                storage.save(name, file)
+            paths[name] = (self.source, name)
+        list(storage.post_process(paths))
+        return storage
+
+    def test_uploads_hashed_immutable_files_with_compressed_variants(self):
+        storage = self.collectstatic()
+        puts = dict(storage.puts)
+
+        hashed_css = storage.stored_name('css/app.css')
+        self.assertEqual(puts[hashed_css], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(puts[hashed_css + '.gz'], IMMUTABLE_CACHE_CONTROL)
+        self.assertIsNone(puts['css/app.css'])
+        self.assertNotIn('img/logo.png.gz', puts)  # too small, not text
+
+        with storage.open(hashed_css + '.gz') as file:
+            content = gzip.decompress(file.read())
+        self.assertIn(storage.stored_name('img/logo.png').encode(), content)
+
+    def test_unchanged_files_are_not_uploaded_again(self):
+        self.collectstatic()
+        storage = self.collectstatic()
+
+        self.assertEqual(storage.puts, [])
+        self.assertGreater(storage.skipped, 0)
+
+    def test_files_are_read_from_memory_until_uploaded(self):
+        storage = LocalStaticStorage(location=self.target)
+        uploaded = threading.Event()
+        put = storage.put
+
+        def slow_put(*args):
+            uploaded.wait()
+            put(*args)
+
+        storage.put = slow_put
+
+        with self.source.open('img/logo.png') as file:
+            storage.save('img/logo.png', file)
+        # Opens the file to hash it, as post-processing does for
+        # referenced files
+        hashed = storage.hashed_name('img/logo.png')
+
+        uploaded.set()
+        storage.wait_for_uploads()
+        self.assertEqual(storage.puts, [('img/logo.png', None)])
+        self.assertEqual(hashed, storage.hashed_name('img/logo.png'))
+
+    def test_collectstatic_saves_files_without_checking_times(self):
+        self.collectstatic()
+        command = Collectstatic()
+        command.storage = LocalStaticStorage(location=self.target)
+        command.dry_run = False
+        command.verbosity = 0
+
+        with mock.patch.object(
+            LocalStaticStorage, 'get_modified_time'
+        ) as get_modified_time:
+            self.assertTrue(
+                command.delete_file('css/app.css', 'css/app.css', self.source)
+            )
+        get_modified_time.assert_not_called()
+
+    def test_backends_must_list_digests_and_put(self):
+        class IncompleteStorage(PrecompressedManifestMixin, FileSystemStorage):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteStorage(location=self.target)
+
+
+class StaticStorageTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            StaticStorage, 'load_manifest', return_value=({}, '')
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = mock.Mock()
+        patcher = mock.patch.object(
+            StaticStorage,
+            'connection',
+            new_callable=mock.PropertyMock,
+            return_value=mock.Mock(meta=mock.Mock(client=self.client)),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage = StaticStorage(bucket_name='static', location='static')
+
+    def test_put_sets_encoding_type_and_cache_headers(self):
+        self.storage.put(
+            'css/app.0123456789ab.css.br', b'...', IMMUTABLE_CACHE_CONTROL
+        )
+
+        params = self.client.put_object.call_args.kwargs
+        self.assertEqual(params['Key'], 'static/css/app.0123456789ab.css.br')
+        self.assertEqual(params['ContentType'], 'text/css')
+        self.assertEqual(params['ContentEncoding'], 'br')
+        self.assertEqual(params['CacheControl'], IMMUTABLE_CACHE_CONTROL)
+
+    def test_list_digests_reads_etags(self):
+        self.client.get_paginator.return_value.paginate.return_value = [
+            {'Contents': [{'Key': 'static/css/app.css', 'ETag': '"abc"'}]}
+        ]
+        self.assertEqual(self.storage.list_digests(), {'css/app.css': 'abc'})
+
+
+class SnapshotStorageTests(SimpleTestCase):
+    def test_latest_pointers_are_cached_briefly(self):
+        storage = SnapshotStorage(bucket_name='public')
+        with self.settings(LEADERBOARD_SNAPSHOT_MAX_AGE=10):
+            latest = storage.get_object_parameters('top/latest.json')
+        versioned = storage.get_object_parameters('top/0123456789abcdef.json')
+
+        self.assertEqual(latest['CacheControl'], 'public, max-age=10')
+        self.assertEqual(versioned['CacheControl'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(latest['ContentType'], 'application/json')
+
+    def test_local_stand_in_overwrites_in_place(self):
+        with tempfile.TemporaryDirectory() as location:
+            storage = LocalSnapshotStorage(location)
+            storage.save('top/latest.json', ContentFile(b'{"v":1}'))
+            name = storage.save('top/latest.json', ContentFile(b'{"v":2}'))
+
+            self.assertEqual(name, 'top/latest.json')
+            self.assertEqual(
+                os.listdir(os.path.join(location, 'top')), ['latest.json']
+            )
+            with storage.open(name) as file:
+                self.assertEqual(file.read(), b'{"v":2}')
@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from main import warmup
+
+
+class HealthAndReadinessTests(TestCase):
+    def setUp(self):
+        warmup.reset()
+        self.addCleanup(warmup.reset)
+
+    def test_healthz_does_not_touch_the_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/healthz')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_readyz_reports_ready_after_warmup(self):
+        with mock.patch.object(warmup, 'start') as start:
+            response = self.client.get('/readyz')
+        start.assert_called_once()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['status'], warmup.PENDING)
+
+        with self.assertLogs('main.warmup', 'INFO') as logs:
+            self.assertTrue(warmup.run())
+        self.assertIn('Warmup phase leaderboard finished', logs.output[2])
+
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.json()['phases']),
+            [
+                'modules',
+                'token revocations',
+                'leaderboard',
+                'player search',
+            ],
+        )
+
+    def test_failed_phase_is_not_ready(self):
+        failing = mock.Mock(side_effect=RuntimeError('database down'))
+        with mock.patch.dict(warmup._phases, {'leaderboard': failing}):
+            with self.assertLogs('main.warmup', 'ERROR'):
+                self.assertFalse(warmup.run())
+
+        self.assertEqual(warmup.status()['status'], warmup.FAILED)
+        with mock.patch.object(warmup, 'start'):
+            self.assertEqual(self.client.get('/readyz').status_code, 503)
@@ -19,12 +19,15 @@ from django.urls import path, include
 from django.views.generic.base import RedirectView
 
 from .admin import admin_site
+from .views import healthz, readyz
 
 urlpatterns = [
     path(
         "favicon.ico",
         RedirectView.as_view(url="/static/favicon.ico", permanent=True),
     ),
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
     path('admin/', admin_site.urls),
     path('', include('djoser.urls')),
     path('', include('users.urls')),
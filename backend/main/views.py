@@ -0,0 +1,16 @@
+from django.http import JsonResponse
+
+from . import warmup
+
+
+def healthz(request):
+    '''Liveness: the process is up. Never touches the database.'''
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    '''Readiness: 200 once warmup has finished, 503 (and starts it) before.'''
+    warmup.start()
+    state = warmup.status()
+    status = 200 if state['status'] == warmup.READY else 503
+    return JsonResponse(state, status=status)
@@ -0,0 +1,81 @@
+'''
+Worker warmup: prime caches and lazy imports before a worker takes traffic.
+
+Apps add phases with `register()` from `AppConfig.ready()`; phases run in
+registration order and each one's duration is logged. Under gunicorn the
+phases run in `post_worker_init` (see gunicorn.conf.py), before the worker
+accepts connections. Other servers start them in the background on the
+first `/readyz` probe, which reports ready once every phase has finished.
+'''
+
+import logging
+import threading
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+READY = 'ready'
+FAILED = 'failed'
+
+_phases = {}
+_lock = threading.Lock()
+_state = {'status': PENDING, 'phases': {}}
+
+
+def register(name, fn):
+    _phases[name] = fn
+
+
+def run():
+    '''Run every phase once; return whether the worker is ready.'''
+    with _lock:
+        if _state['status'] in (RUNNING, READY):
+            return _state['status'] == READY
+        _state.update(status=RUNNING, phases={})
+
+    start = time.perf_counter()
+    for name, fn in _phases.items():
+        phase_start = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            logger.exception('Warmup phase %s failed', name)
+            _state['status'] = FAILED
+            return False
+        elapsed = (time.perf_counter() - phase_start) * 1000
+        _state['phases'][name] = round(elapsed, 1)
+        logger.info('Warmup phase %s finished in %.1f ms', name, elapsed)
+
+    _state['status'] = READY
+    logger.info(
+        'Warmup finished in %.1f ms', (time.perf_counter() - start) * 1000
+    )
+    return True
+
+
+def _run_in_background():
+    try:
+        run()
+    finally:
+        connections.close_all()
+
+
+def start():
+    '''Run the phases on a background thread unless already started.'''
+    if _state['status'] in (PENDING, FAILED):
+        threading.Thread(
+            target=_run_in_background, name='warmup', daemon=True
+        ).start()
+
+
+def status():
+    return {'status': _state['status'], 'phases': dict(_state['phases'])}
+
+
+def reset():
+    with _lock:
+        _state.update(status=PENDING, phases={})
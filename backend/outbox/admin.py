@@ -0,0 +1,29 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from main.admin import admin_site, PerformanceAdminMixin
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail, site=admin_site)
+class OutboundEmailAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = (
+        'subject',
+        'to',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    date_hierarchy = 'created_at'
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ('retry_now',)
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        queryset.exclude(status=OutboundEmail.Status.SENT).update(
+            status=OutboundEmail.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
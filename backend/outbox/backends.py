@@ -0,0 +1,22 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .models import OutboundEmail
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    '''
+    Email backend that stores messages for the `send_queued_mail` worker
+    instead of sending them during the request.
+
+    Rows are written in the caller's transaction, so a registration that
+    rolls back queues nothing.
+    '''
+
+    def send_messages(self, email_messages):
+        emails = [
+            OutboundEmail.from_message(message)
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboundEmail.objects.bulk_create(emails)
+        return len(emails)
@@ -0,0 +1,124 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from outbox.models import OutboundEmail
+
+
+class Command(BaseCommand):
+    help = (
+        'Send queued emails through OUTBOX_BACKEND, rate limited and with '
+        'exponential backoff between retries.'
+    )
+
+    # Claimed mail is hidden from other workers for this long; a worker
+    # that dies mid-batch leaves its mail to be retried after it
+    lease = timedelta(minutes=5)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send the mail that is due, then exit.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.OUTBOX_BATCH_SIZE,
+            help='Emails claimed from the queue at a time.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait when the queue is empty.',
+        )
+
+    def handle(self, *args, **options):
+        self.next_send = time.monotonic()
+        # One connection (and SES client) for every message this worker sends
+        connection = get_connection(settings.OUTBOX_BACKEND)
+        connection.open()
+        try:
+            while True:
+                emails = self.claim(options['batch_size'])
+                if emails:
+                    self.send(connection, emails)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+    def claim(self, batch_size):
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=OutboundEmail.Status.PENDING,
+                    next_attempt_at__lte=now,
+                )
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            OutboundEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(next_attempt_at=now + self.lease)
+        return emails
+
+    def send(self, connection, emails):
+        sent = failed = 0
+        for email in emails:
+            self.throttle()
+            email.attempts += 1
+            try:
+                connection.send_messages([email.to_message()])
+            except Exception as exc:
+                self.schedule_retry(email, exc)
+                failed += 1
+            else:
+                email.status = OutboundEmail.Status.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+            email.save(
+                update_fields=[
+                    'status',
+                    'attempts',
+                    'next_attempt_at',
+                    'last_error',
+                    'sent_at',
+                ]
+            )
+        self.stdout.write(f'Sent {sent} emails ({failed} failed)')
+
+    def schedule_retry(self, email, exc):
+        email.last_error = f'{type(exc).__name__}: {exc}'
+        if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            email.status = OutboundEmail.Status.FAILED
+            return
+        delay = min(
+            settings.OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1),
+            settings.OUTBOX_MAX_RETRY_DELAY,
+        )
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+    def throttle(self):
+        '''Space sends to stay under OUTBOX_RATE_LIMIT messages a second.'''
+        if not settings.OUTBOX_RATE_LIMIT:
+            return
+        wait = self.next_send - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.next_send = (
+            max(self.next_send, time.monotonic())
+            + 1 / settings.OUTBOX_RATE_LIMIT
+        )
@@ -0,0 +1,90 @@
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboundEmail(models.Model):
+    '''
+    An email waiting for the `send_queued_mail` worker.
+
+    Only what djoser's templated mails use is stored: plain text and
+    alternative (HTML) bodies, recipients and extra headers.
+    '''
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        SENT = 'sent', _('Sent')
+        FAILED = 'failed', _('Failed')
+
+    subject = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=320, blank=True)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    alternatives = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='[content, mimetype] pairs, e.g. the HTML body',
+    )
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Outbound email'
+        verbose_name_plural = 'Outbound emails'
+        indexes = [
+            # The worker's only query: pending mail that is due
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=Q(status='pending'),
+                name='outbox_pending_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.to)}'
+
+    @classmethod
+    def from_message(cls, message):
+        if message.attachments:
+            raise ValueError('Queued emails cannot have attachments')
+        return cls(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email,
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+            headers=dict(message.extra_headers),
+            alternatives=[
+                list(alternative)
+                for alternative in getattr(message, 'alternatives', ())
+            ],
+        )
+
+    def to_message(self, connection=None):
+        return EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.to,
+            cc=self.cc,
+            bcc=self.bcc,
+            reply_to=self.reply_to,
+            headers=self.headers,
+            alternatives=[tuple(alt) for alt in self.alternatives],
+            connection=connection,
+        )
@@ -0,0 +1,46 @@
+from django.core import mail
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from outbox.models import OutboundEmail
+
+
+@override_settings(
+    EMAIL_BACKEND='outbox.backends.QueuedEmailBackend',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueuedEmailBackendTests(TestCase):
+    def test_registration_queues_activation_email(self):
+        response = APIClient().post(
+            '/users/',
+            {
+                'email': 'new@example.com',
+                'password': 'a-long-password-123',
+                're_password': 'a-long-password-123',
+            },
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.to, ['new@example.com'])
+        self.assertEqual(email.status, OutboundEmail.Status.PENDING)
+        self.assertEqual(email.alternatives[0][1], 'text/html')
+
+    def test_message_round_trip(self):
+        message = mail.EmailMultiAlternatives(
+            'Subject',
+            'Body',
+            'from@example.com',
+            ['to@example.com'],
+            reply_to=['reply@example.com'],
+            headers={'X-Tag': 'activation'},
+        )
+        message.attach_alternative('<p>Body</p>', 'text/html')
+        message.send()
+
+        restored = OutboundEmail.objects.get().to_message()
+        self.assertEqual(restored.extra_headers, {'X-Tag': 'activation'})
+        self.assertEqual(restored.recipients(), ['to@example.com'])
+        self.assertEqual(restored.reply_to, ['reply@example.com'])
+        self.assertEqual(restored.alternatives, message.alternatives)
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from outbox.models import OutboundEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SES unavailable')
+
+
+@override_settings(
+    OUTBOX_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_RATE_LIMIT=0,
+)
+class SendQueuedMailCommandTests(TestCase):
+    def queue(self, count=1, **fields):
+        OutboundEmail.objects.bulk_create(
+            OutboundEmail(
+                subject=f'Activate {i}',
+                body='...',
+                to=[f'player{i}@example.com'],
+                **fields,
+            )
+            for i in range(count)
+        )
+
+    def send_queued_mail(self, **options):
+        call_command(
+            'send_queued_mail', once=True, stdout=StringIO(), **options
+        )
+
+    def test_sends_due_mail_in_batches(self):
+        self.queue(5)
+        self.queue(next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        self.send_queued_mail(batch_size=2)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(
+            OutboundEmail.objects.filter(
+                status=OutboundEmail.Status.SENT, sent_at__isnull=False
+            ).count(),
+            5,
+        )
+        self.assertEqual(
+            OutboundEmail.objects.filter(
+                status=OutboundEmail.Status.PENDING
+            ).count(),
+            1,
+        )
+
+    @override_settings(
+        OUTBOX_BACKEND='outbox.tests.test_commands.FailingBackend'
+    )
+    def test_failed_sends_back_off_exponentially(self):
+        self.queue(attempts=2)
+        before = timezone.now()
+
+        self.send_queued_mail()
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.Status.PENDING)
+        self.assertEqual(email.attempts, 3)
+        self.assertIn('SES unavailable', email.last_error)
+        delay = email.next_attempt_at - before
+        self.assertGreaterEqual(delay, timedelta(seconds=120))
+        self.assertLess(delay, timedelta(seconds=130))
+
+    @override_settings(
+        OUTBOX_BACKEND='outbox.tests.test_commands.FailingBackend',
+        OUTBOX_MAX_ATTEMPTS=3,
+    )
+    def test_gives_up_after_max_attempts(self):
+        self.queue(attempts=2)
+
+        self.send_queued_mail()
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.Status.FAILED)
+        self.assertEqual(email.attempts, 3)
+
+    @override_settings(OUTBOX_RATE_LIMIT=50)
+    def test_rate_limit_spaces_sends(self):
+        self.queue(5)
+        start = timezone.now()
+
+        self.send_queued_mail()
+
+        # Four gaps of 20 ms after the first send
+        self.assertGreaterEqual(
+            timezone.now() - start, timedelta(milliseconds=80)
+        )
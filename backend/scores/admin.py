@@ -1,12 +1,25 @@
 from django.contrib import admin
 
-from main.admin import admin_site
+from main.admin import admin_site, PerformanceAdminMixin
 from .models import Score
 
 
 @admin.register(Score, site=admin_site)
-class ScoreAdmin(admin.ModelAdmin):
-    list_display = ('user', 'score', 'created_at')
-    list_filter = ('created_at',)
-    search_fields = ('user__email', 'score')
+class ScoreAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'score', 'status', 'created_at')
+    # Fixed date ranges on the `created_at` index; a date hierarchy would
+    # list the distinct dates of the whole table on every page
+    list_filter = ('status', 'created_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    search_fields = ('^user__email',)
     ordering = ('-score',)
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        # Numeric terms match a score exactly so the `-score` index is used
+        if search_term.isdigit():
+            results |= queryset.filter(score=int(search_term))
+        return results, may_have_duplicates
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ScoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scores'
+
+    def ready(self):
+        from main import warmup
+        from . import caches, leaderboards  # noqa: F401 - connect receivers
+        from .search import index
+        from .warmup import load_leaderboard
+
+        warmup.register('leaderboard', load_leaderboard)
+        warmup.register('player search', index.sync)
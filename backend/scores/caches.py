@@ -0,0 +1,73 @@
+'''
+This process's caches of leaderboards, kept fresh by invalidation events
+(see main/invalidation.py).
+
+A board is tagged `top` (the global board) or `group:<id>`, and
+`user:<id>` for each player on it. Saving or deleting a score invalidates
+`top` and its player (see `players_changed()`). Re-ranking a player in
+their groups invalidates those groups (see scores/leaderboards.py).
+Changing a user invalidates them (see users/authentication.py), which
+drops the boards that show their name.
+
+Bulk writes send no signals, so code that changes scores in bulk calls
+`players_changed()` itself.
+'''
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from main.invalidation import LocalCache, invalidate, user_tag
+
+from . import leaderboards
+from .models import Score
+from .serializers import ScoreSerializer
+
+User = get_user_model()
+
+boards = LocalCache('leaderboards')
+
+
+def leaderboard(group_id=None):
+    '''The serialized top 10 overall, or of a group's members.'''
+
+    def fill():
+        if group_id is None:
+            scores = list(
+                Score.objects.ranked()
+                .select_related('user')
+                .order_by('-score')[:10]
+            )
+            tag = 'top'
+        else:
+            scores = leaderboards.top(group_id)
+            tag = f'group:{group_id}'
+        tags = {tag} | {user_tag(score.user_id) for score in scores}
+        return ScoreSerializer(scores, many=True).data, tags
+
+    return boards.get(group_id, fill)
+
+
+def players_changed(user_ids):
+    '''Invalidate what shows these players' scores.'''
+    invalidate('top', *(user_tag(pk) for pk in user_ids))
+
+
+@receiver(post_save, sender=Score)
+def score_saved(sender, instance, **kwargs):
+    players_changed([instance.user_id])
+
+
+@receiver(post_delete, sender=Score)
+def score_deleted(sender, instance, origin, **kwargs):
+    # Deleting a user invalidates them once, not once per score
+    if isinstance(origin, Score) or (
+        isinstance(origin, QuerySet) and origin.model is Score
+    ):
+        players_changed([instance.user_id])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    players_changed([instance.pk])
@@ -0,0 +1,109 @@
+'''
+Everything the dashboard and game pages show about a player, in one
+response: their profile, best ranked score and its rank, their latest
+scores and the global top N.
+
+The pieces come from different places:
+
+- the profile is the authenticated user, so it costs no query
+- the rank and the top N are shared by every player, so they come from
+  the rank histogram (see scores/search.py) and the global leaderboard
+  cache, which score changes invalidate (see scores/caches.py)
+- the best score and the latest scores are two indexed queries
+
+The queries run concurrently on a small pool of threads, each with its own
+persistent connection. Inside a transaction they run in the request's
+thread instead, since other connections cannot see its writes.
+
+Those connections add up: with `CONN_MAX_AGE` at 600 seconds, each worker
+process holds up to `DASHBOARD_THREADS` of them on top of one per request
+thread, so PostgreSQL sees up to `workers * (GUNICORN_THREADS +
+DASHBOARD_THREADS)`. Size `max_connections` (or a pooler) for that.
+'''
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from . import caches, search
+from .models import Score
+from .serializers import ScoreSerializer
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DASHBOARD_THREADS,
+            thread_name_prefix='dashboard',
+        )
+    return _executor
+
+
+def _after_fork():
+    # The pool's threads stay in the parent
+    global _executor
+    _executor = None
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _in_pool(fn):
+    def run():
+        close_old_connections()
+        return fn()
+
+    return run
+
+
+def score_data(score, user):
+    score.user = user
+    return {**ScoreSerializer(score).data, 'status': score.status}
+
+
+def dashboard(user):
+    '''The dashboard response for `user`.'''
+
+    def best():
+        return (
+            Score.objects.ranked()
+            .filter(user=user)
+            .order_by('-score', 'pk')
+            .first()
+        )
+
+    def recent():
+        return list(
+            Score.objects.filter(user=user).order_by('-created_at', '-pk')[
+                : settings.DASHBOARD_RECENT_SIZE
+            ]
+        )
+
+    tasks = [best, recent, caches.leaderboard]
+    if connection.in_atomic_block:
+        results = [task() for task in tasks]
+    else:
+        futures = [executor().submit(_in_pool(task)) for task in tasks]
+        results = [future.result() for future in futures]
+    best_score, recent_scores, top = results
+
+    rank = None
+    if best_score is not None:
+        rank = search.rank(best_score.score)
+    return {
+        'profile': {
+            'id': user.pk,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+        },
+        'best': best_score and score_data(best_score, user),
+        'rank': rank,
+        'recent': [score_data(score, user) for score in recent_scores],
+        'top': top,
+    }
@@ -0,0 +1,127 @@
+'''
+Per-group leaderboards, maintained as scores and memberships change.
+
+Each member of a `Group` has one `GroupHighScore` row per group holding
+their best ranked score. A group's top N is then an index range scan of
+`(group, -points)`, however many groups there are or how many groups a
+user belongs to. No request joins scores against group membership.
+
+The receivers below update the rows as changes happen:
+
+- saving or deleting a `Score` re-ranks its player in each of their groups
+- joining groups adds the player's best score to them, and leaving drops it
+
+Each change invalidates the cached boards of the groups it touches (see
+scores/caches.py). Bulk updates send no signals. Code that changes scores
+in bulk (`verify_scores`) calls `refresh_users()` itself.
+'''
+
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from main.invalidation import invalidate
+
+from .models import GroupHighScore, Score
+
+User = get_user_model()
+Membership = User.groups.through
+
+
+def group_tags(group_ids):
+    return [f'group:{pk}' for pk in set(group_ids)]
+
+
+def top(group_id, limit=10):
+    '''The group's best `limit` scores, one per member.'''
+    return [
+        entry.score
+        for entry in GroupHighScore.objects.filter(group_id=group_id)
+        .select_related('score__user')
+        .order_by('-points', 'score')[:limit]
+    ]
+
+
+def refresh_users(user_ids):
+    '''Re-rank these users in every group they belong to.'''
+    memberships = list(
+        Membership.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'group_id'
+        )
+    )
+    if not memberships:
+        return
+    invalidate(*group_tags(group_id for _, group_id in memberships))
+
+    best = (
+        Score.objects.ranked()
+        .filter(user=OuterRef('pk'))
+        .order_by('-score', 'pk')
+    )
+    scores = {
+        pk: (score_id, points)
+        for pk, score_id, points in User.objects.filter(
+            pk__in={user_id for user_id, _ in memberships}
+        )
+        .annotate(
+            score_id=Subquery(best.values('pk')[:1]),
+            points=Subquery(best.values('score')[:1]),
+        )
+        .values_list('pk', 'score_id', 'points')
+    }
+    # An upsert, so concurrent refreshes of a user cannot collide
+    GroupHighScore.objects.bulk_create(
+        [
+            GroupHighScore(
+                group_id=group_id,
+                user_id=user_id,
+                score_id=scores[user_id][0],
+                points=scores[user_id][1],
+            )
+            for user_id, group_id in memberships
+            if scores[user_id][0] is not None
+        ],
+        update_conflicts=True,
+        unique_fields=['group', 'user'],
+        update_fields=['score', 'points'],
+    )
+    # Players whose only ranked scores were deleted or rejected
+    unranked = [pk for pk, (score_id, _) in scores.items() if score_id is None]
+    if unranked:
+        GroupHighScore.objects.filter(user_id__in=unranked).delete()
+
+
+@receiver(post_save, sender=Score)
+def score_saved(sender, instance, **kwargs):
+    refresh_users([instance.user_id])
+
+
+@receiver(post_delete, sender=Score)
+def score_deleted(sender, instance, origin, **kwargs):
+    # Deleting a user deletes their rows along with their scores
+    if isinstance(origin, Score) or (
+        isinstance(origin, QuerySet) and origin.model is Score
+    ):
+        refresh_users([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Membership)
+def membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # `reverse`: changed from the group's side, so `pk_set` holds users
+    if action == 'post_add':
+        refresh_users(pk_set if reverse else [instance.pk])
+    elif action == 'post_remove':
+        if reverse:
+            rows = {'group': instance, 'user_id__in': pk_set}
+            invalidate(*group_tags([instance.pk]))
+        else:
+            rows = {'user': instance, 'group_id__in': pk_set}
+            invalidate(*group_tags(pk_set))
+        GroupHighScore.objects.filter(**rows).delete()
+    elif action == 'post_clear':
+        rows = GroupHighScore.objects.filter(
+            **{'group' if reverse else 'user': instance}
+        )
+        invalidate(*group_tags(rows.values_list('group_id', flat=True)))
+        rows.delete()
@@ -0,0 +1,22 @@
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand, CommandError
+
+from scores import telemetry
+
+
+class Command(BaseCommand):
+    help = (
+        'Rewrite the .cts telemetry segments in the telemetry storage as '
+        'Parquet files. Needs pyarrow.'
+    )
+
+    def handle(self, *args, **options):
+        if telemetry.pyarrow is None:
+            raise CommandError('pyarrow is not installed.')
+        storage = storages['telemetry']
+        converted = 0
+        for name in telemetry.segment_names(storage):
+            if name.endswith('.cts'):
+                telemetry.convert_segment(storage, name)
+                converted += 1
+        self.stdout.write(f'Converted {converted} segments')
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scores.snapshots import Publisher, render, render_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Render leaderboard snapshots and upload the ones that changed to '
+        'the `leaderboards` storage for the CDN.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Publish every board once, then exit.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.LEADERBOARD_SNAPSHOT_INTERVAL,
+            help='Seconds between renders of the score boards.',
+        )
+        parser.add_argument(
+            '--stats-interval',
+            type=float,
+            default=settings.LEADERBOARD_SNAPSHOT_STATS_INTERVAL,
+            help='Seconds between renders of the stats.',
+        )
+
+    def handle(self, *args, **options):
+        publisher = Publisher()
+        stats_due = time.monotonic()
+        try:
+            while True:
+                boards = render()
+                if time.monotonic() >= stats_due:
+                    boards['stats'] = render_stats()
+                    stats_due = time.monotonic() + options['stats_interval']
+                changed = publisher.publish(boards)
+                if changed:
+                    self.stdout.write(f'Published {", ".join(changed)}')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scores.rankings import refresher, write
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the shared rankings file that every worker on this host '
+        'reads, waiting for any other writer to stop first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Write the file once, then exit.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.RANKINGS_REFRESH_INTERVAL,
+            help='Seconds between writes.',
+        )
+
+    def handle(self, *args, **options):
+        path = settings.RANKINGS_FILE
+        if not path:
+            raise CommandError('RANKINGS_FILE is not set.')
+        refresher.acquire(path, blocking=True)
+        try:
+            while True:
+                version = write(path)
+                if options['once']:
+                    self.stdout.write(f'Wrote rankings version {version}')
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
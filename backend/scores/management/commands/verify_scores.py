@@ -0,0 +1,151 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from scores.caches import players_changed
+from scores.leaderboards import refresh_users
+from scores.models import Replay, Score
+from scores.replay import verify_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay pending scores on a process pool, marking each verified or '
+        'rejected.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Verify the scores that are pending, then exit.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.REPLAY_BATCH_SIZE,
+            help='Pending scores claimed at a time.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Simulation processes; 0 replays in this process.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait when no scores are pending.',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        executor = ProcessPoolExecutor(workers) if workers else None
+        self.verified = self.rejected = 0
+        self.elapsed = 0.0
+        try:
+            while True:
+                if self.verify(executor, workers, options['batch_size']):
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        games = self.verified + self.rejected
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Verified {self.verified} scores ({self.rejected} rejected) '
+                f'in {self.elapsed:.1f}s'
+                + (f', {games / self.elapsed:.0f} games/s' if games else '')
+            )
+        )
+
+    def verify(self, executor, workers, batch_size):
+        '''Replay one batch of pending scores; return how many there were.'''
+        # Nothing can verify these; they were never ranked, so rejecting
+        # them changes no leaderboard
+        self.rejected += Score.objects.filter(
+            status=Score.Status.PENDING, replay__isnull=True
+        ).update(status=Score.Status.REJECTED)
+
+        # The claimed rows stay locked while they are replayed, so other
+        # verifiers skip them and a crash leaves them pending
+        with transaction.atomic():
+            scores = list(
+                Score.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(status=Score.Status.PENDING, replay__isnull=False)
+                .select_related('replay')
+                .order_by('pk')[:batch_size]
+            )
+            if not scores:
+                return 0
+
+            start = time.perf_counter()
+            games = [
+                (
+                    score.pk,
+                    score.replay.seed,
+                    score.replay.ticks,
+                    score.replay.inputs,
+                    score.score,
+                )
+                for score in scores
+            ]
+            if executor is None:
+                errors = dict(verify_batch(games))
+            else:
+                # One chunk per worker keeps IPC to a message per process
+                size = -(-len(games) // workers)
+                chunks = [
+                    games[i : i + size] for i in range(0, len(games), size)
+                ]
+                errors = {
+                    pk: error
+                    for results in executor.map(verify_batch, chunks)
+                    for pk, error in results
+                }
+            elapsed = time.perf_counter() - start
+
+            now = timezone.now()
+            for score in scores:
+                error = errors[score.pk]
+                score.status = (
+                    Score.Status.REJECTED if error else Score.Status.VERIFIED
+                )
+                score.replay.error = error or ''
+                score.replay.verified_at = now
+            Score.objects.bulk_update(scores, ['status'])
+            Replay.objects.bulk_update(
+                [score.replay for score in scores], ['error', 'verified_at']
+            )
+            # `bulk_update()` sends no signals to re-rank group members
+            # or invalidate cached boards
+            players_changed({score.user_id for score in scores})
+            refresh_users(
+                {
+                    score.user_id
+                    for score in scores
+                    if score.status == Score.Status.VERIFIED
+                }
+            )
+
+        rejected = sum(1 for error in errors.values() if error)
+        self.verified += len(scores) - rejected
+        self.rejected += rejected
+        self.elapsed += elapsed
+        self.stdout.write(
+            f'Replayed {len(scores)} scores ({rejected} rejected) in '
+            f'{elapsed * 1000:.0f} ms, {len(scores) / elapsed:.0f} games/s'
+        )
+        return len(scores)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-19 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0003_alter_score_options_alter_score_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['created_at'], name='scores_scor_created_61321e_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.3 on 2026-10-19 13:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scores', '0004_score_scores_scor_created_61321e_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Replay',
+            fields=[
+                ('score', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='replay', serialize=False, to='scores.score')),
+                ('seed', models.PositiveBigIntegerField(help_text='mulberry32 seed (u32)')),
+                ('ticks', models.PositiveIntegerField(help_text='Tick the game ended on')),
+                ('inputs', models.JSONField(default=list, help_text='[tick, direction] for every turn')),
+                ('verified_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='score',
+            name='status',
+            field=models.CharField(choices=[('unverified', 'Unverified'), ('pending', 'Pending'), ('verified', 'Verified'), ('rejected', 'Rejected')], default='unverified', help_text='Result of server-side replay verification', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='scores_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.3 on 2026-10-19 13:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_group_high_scores(apps, schema_editor):
+    '''Rank the existing members of every group.'''
+    Score = apps.get_model('scores', 'Score')
+    GroupHighScore = apps.get_model('scores', 'GroupHighScore')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Membership = User.groups.through
+
+    best = {}
+    for user_id, pk, points in (
+        Score.objects.exclude(status__in=['pending', 'rejected'])
+        .order_by('user_id', '-score', 'pk')
+        .values_list('user_id', 'pk', 'score')
+        .iterator()
+    ):
+        best.setdefault(user_id, (pk, points))
+
+    GroupHighScore.objects.bulk_create(
+        (
+            GroupHighScore(
+                group_id=group_id,
+                user_id=user_id,
+                score_id=best[user_id][0],
+                points=best[user_id][1],
+            )
+            for user_id, group_id in Membership.objects.values_list(
+                'user_id', 'group_id'
+            ).iterator()
+            if user_id in best
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('scores', '0005_score_status_replay'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0004_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupHighScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='high_scores', to='auth.group')),
+                ('score', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scores.score')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', '-points', 'score'], name='scores_group_rank_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='grouphighscore',
+            constraint=models.UniqueConstraint(fields=('group', 'user'), name='scores_group_user_uniq'),
+        ),
+        migrations.RunPython(fill_group_high_scores, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,33 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.core.validators import MinValueValidator
+from django.utils.translation import gettext_lazy as _
+
+
+class ScoreQuerySet(models.QuerySet):
+    def ranked(self):
+        '''Scores shown on leaderboards: not waiting for or failing replay.'''
+        return self.exclude(
+            status__in=[Score.Status.PENDING, Score.Status.REJECTED]
+        )
+
 
 class Score(models.Model):
     """
     Stores a player's high score record.
     
     A score is associated with a user and includes their numeric score,
-    the time played in seconds, and when the score was created.
+    the time played in seconds, and when the score was created. Scores
+    submitted with a replay stay pending until `verify_scores` replays it.
     """
+
+    class Status(models.TextChoices):
+        UNVERIFIED = 'unverified', _('Unverified')
+        PENDING = 'pending', _('Pending')
+        VERIFIED = 'verified', _('Verified')
+        REJECTED = 'rejected', _('Rejected')
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE,
@@ -28,6 +47,14 @@ class Score(models.Model):
         auto_now_add=True,
         help_text="When this score was recorded"
     )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.UNVERIFIED,
+        help_text="Result of server-side replay verification"
+    )
+
+    objects = ScoreQuerySet.as_manager()
     
     class Meta:
         ordering = ['-score']
@@ -36,7 +63,74 @@ class Score(models.Model):
         indexes = [
             models.Index(fields=['-score']),
             models.Index(fields=['user']),
+            models.Index(fields=['created_at']),
+            # The verifier's only query: scores waiting for their replay
+            models.Index(
+                fields=['id'],
+                condition=Q(status='pending'),
+                name='scores_pending_idx',
+            ),
         ]
     
     def __str__(self):
-        return f"{self.user.email}: {self.score} pts ({self.time_played}s)" 
\ No newline at end of file
+        return f"{self.user.email}: {self.score} pts ({self.time_played}s)"
+
+
+class Replay(models.Model):
+    '''
+    The seed and input log of the game that set a score, replayed by
+    `verify_scores` (see scores/replay.py).
+    '''
+
+    score = models.OneToOneField(
+        Score,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='replay',
+    )
+    seed = models.PositiveBigIntegerField(help_text='mulberry32 seed (u32)')
+    ticks = models.PositiveIntegerField(help_text='Tick the game ended on')
+    inputs = models.JSONField(
+        default=list, help_text='[tick, direction] for every turn'
+    )
+    verified_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'Replay of {self.score}'
+
+
+class GroupHighScore(models.Model):
+    '''
+    A group member's best ranked score, kept up to date by
+    scores/leaderboards.py so a group's leaderboard is a scan of the
+    `(group, -points)` index rather than a join against group membership.
+    '''
+
+    group = models.ForeignKey(
+        'auth.Group', on_delete=models.CASCADE, related_name='high_scores'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+'
+    )
+    score = models.ForeignKey(
+        Score, on_delete=models.CASCADE, related_name='+'
+    )
+    # Copy of `score.score`, so ranking needs no join
+    points = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'user'], name='scores_group_user_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['group', '-points', 'score'],
+                name='scores_group_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.group}: {self.points} pts'
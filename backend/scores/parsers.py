@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import BaseParser
+
+
+class TelemetryTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Telemetry batch is too large.')
+    default_code = 'telemetry_too_large'
+
+
+class TelemetryParser(BaseParser):
+    '''
+    Returns the raw body of a binary telemetry batch (see
+    scores/telemetry.py), at most `TELEMETRY_MAX_BATCH_BYTES` long.
+    '''
+
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return b''
+        limit = settings.TELEMETRY_MAX_BATCH_BYTES
+        body = stream.read(limit + 1)
+        if len(body) > limit:
+            raise TelemetryTooLarge()
+        return body
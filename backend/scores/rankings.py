@@ -0,0 +1,271 @@
+'''
+Rankings shared by every worker process on a host through one memory-mapped
+file.
+
+Without this, each gunicorn worker would build its own rank histogram, so
+the memory and the refresh queries would be multiplied by the number of
+workers, and workers could disagree with each other. Instead, one worker
+holds an exclusive lock on `<RANKINGS_FILE>.lock` and rewrites the file
+every `RANKINGS_REFRESH_INTERVAL` seconds. If that worker exits, another
+one takes the lock over. Every worker maps the file read-only, and ranks
+are looked up in it in place.
+
+The file holds a header, then the histogram (distinct ranked score values,
+ascending, and how many ranked scores are at or below each) as two int64
+arrays. The header's sequence number is odd while the writer is rewriting
+the file. A reader reads it before and after a lookup, and retries if it
+was odd or changed (a seqlock), so readers never wait for the writer or
+take a lock. The file only grows, and readers map it again when it outgrows
+their mapping.
+
+Readers ignore a snapshot that is older than `RANKINGS_MAX_AGE`, so a host
+whose writer is stuck falls back to the per-process data.
+'''
+
+import bisect
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+
+from .models import Score
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RNKS'
+LAYOUT = 2
+
+# magic, layout, sequence, version, built at (Unix time), ranked scores,
+# distinct values, file size
+HEADER = struct.Struct('<4sIQQdQQQ')
+SEQUENCE = struct.Struct('<Q')
+SEQUENCE_OFFSET = 8
+
+# Reads that keep overlapping a rewrite give up and fall back
+READ_ATTEMPTS = 100
+
+
+def histogram():
+    '''
+    Distinct ranked score values, ascending, and how many ranked scores
+    are at or below each.
+    '''
+    values = array('q')
+    at_or_below = array('q')
+    total = 0
+    for value, count in (
+        Score.objects.ranked()
+        .order_by('score')
+        .values('score')
+        .annotate(count=Count('pk'))
+        .values_list('score', 'count')
+    ):
+        total += count
+        values.append(value)
+        at_or_below.append(total)
+    return values, at_or_below
+
+
+def write(path):
+    '''Rewrite the rankings file at `path` from the database.'''
+    values, at_or_below = histogram()
+    size = HEADER.size + 16 * len(values)
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size < size:
+            # Room to grow, so readers seldom have to map it again
+            size += size // 4
+            os.ftruncate(fd, size)
+        else:
+            size = os.fstat(fd).st_size
+        with mmap.mmap(fd, size) as mapped:
+            magic, layout, sequence, version, *_ = HEADER.unpack_from(mapped)
+            if magic != MAGIC or layout != LAYOUT:
+                sequence = version = 0
+            SEQUENCE.pack_into(mapped, SEQUENCE_OFFSET, sequence + 1)
+
+            offset = HEADER.size
+            for data in (values.tobytes(), at_or_below.tobytes()):
+                mapped[offset : offset + len(data)] = data
+                offset += len(data)
+            HEADER.pack_into(
+                mapped,
+                0,
+                MAGIC,
+                LAYOUT,
+                sequence + 1,
+                version + 1,
+                time.time(),
+                at_or_below[-1] if at_or_below else 0,
+                len(values),
+                size,
+            )
+            SEQUENCE.pack_into(mapped, SEQUENCE_OFFSET, sequence + 2)
+    finally:
+        os.close(fd)
+    return version + 1
+
+
+class Reader:
+    '''This process's read-only mapping of the rankings file.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.path = None
+        self.mapped = None
+        self.arrays = None
+
+    def _map(self, path):
+        with self.lock:
+            # A thread still reading the old mapping keeps it alive
+            self.mapped = None
+            try:
+                with open(path, 'rb') as file:
+                    self.mapped = mmap.mmap(
+                        file.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+            except (FileNotFoundError, ValueError):
+                # Missing or still empty
+                return None
+            self.path = path
+            return self.mapped
+
+    def read(self, fn):
+        '''
+        `fn(mapped, header)` on a consistent snapshot, or None without a
+        fresh one.
+        '''
+        path = settings.RANKINGS_FILE
+        if not path:
+            return None
+        for _ in range(READ_ATTEMPTS):
+            mapped = self.mapped
+            if mapped is None or self.path != path:
+                mapped = self._map(path)
+                if mapped is None:
+                    return None
+            header = HEADER.unpack_from(mapped)
+            magic, layout, sequence, _, built_at, *_, size = header
+            if magic != MAGIC or layout != LAYOUT:
+                return None
+            if sequence & 1:
+                time.sleep(0)
+                continue
+            if size > len(mapped):
+                self._map(path)
+                continue
+            if time.time() - built_at > settings.RANKINGS_MAX_AGE:
+                # Mapped again on the next read, in case the file was
+                # replaced rather than rewritten
+                self.mapped = None
+                return None
+            result = fn(mapped, header)
+            if SEQUENCE.unpack_from(mapped, SEQUENCE_OFFSET)[0] == sequence:
+                return result
+        return None
+
+    def available(self):
+        return self.read(lambda mapped, header: True) is not None
+
+    def version(self):
+        return self.read(lambda mapped, header: header[3])
+
+    def rank(self, points):
+        '''1 + how many ranked scores are above `points`, or None.'''
+        return self.read(
+            lambda mapped, header: self._rank(mapped, header, points)
+        )
+
+    def _rank(self, mapped, header, points):
+        total, distinct = header[5], header[6]
+        if not distinct:
+            return 1
+        values, at_or_below = self._arrays(mapped, distinct)
+        i = bisect.bisect_right(values, points)
+        return 1 + total - (at_or_below[i - 1] if i else 0)
+
+    def _arrays(self, mapped, distinct):
+        # Views into the mapping, kept while the layout stays the same
+        arrays = self.arrays
+        if arrays is None or arrays[0] is not mapped or arrays[1] != distinct:
+            start = HEADER.size
+            with memoryview(mapped) as view:
+                arrays = self.arrays = (
+                    mapped,
+                    distinct,
+                    view[start : start + 8 * distinct].cast('q'),
+                    view[start + 8 * distinct : start + 16 * distinct].cast(
+                        'q'
+                    ),
+                )
+        return arrays[2:]
+
+
+reader = Reader()
+
+
+class Refresher:
+    '''
+    Rewrites the rankings file every `RANKINGS_REFRESH_INTERVAL` seconds
+    while this process holds the host's writer lock.
+    '''
+
+    def __init__(self):
+        self.thread = None
+        self.lock_fd = None
+
+    def acquire(self, path, blocking=False):
+        if self.lock_fd is not None:
+            return True
+        fd = os.open(f'{path}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.lock_fd = fd
+        return True
+
+    def start(self):
+        if not settings.RANKINGS_FILE or self.thread is not None:
+            return
+        self.thread = threading.Thread(
+            target=self._run, name='rankings-refresher', daemon=True
+        )
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            path = settings.RANKINGS_FILE
+            try:
+                if self.acquire(path):
+                    write(path)
+            except Exception:
+                logger.exception('Rankings refresh failed')
+            finally:
+                connections.close_all()
+            time.sleep(settings.RANKINGS_REFRESH_INTERVAL)
+
+
+refresher = Refresher()
+
+
+def _after_fork():
+    # Neither the refresher thread nor the lock is the child's
+    reader.lock = threading.Lock()
+    if refresher.lock_fd is not None:
+        os.close(refresher.lock_fd)
+    refresher.thread = None
+    refresher.lock_fd = None
+
+
+os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,167 @@
+'''
+Deterministic re-simulation of the snake rules in
+frontend/app/game/GameCanvas.js, used to verify submitted scores.
+
+A replay is the 32-bit seed of the game's `mulberry32` generator, the tick
+on which the game ended and the input log: `[tick, direction]` for every
+tick on which the snake turned. Food, power-ups and bombs (including how
+many ticks they last) all follow from the seed, so replaying the inputs
+must end the game on the same tick with the same score.
+
+The board is kept as flat cell indices with a per-cell segment count, so a
+tick costs a handful of integer operations however long the snake is.
+Nothing here uses Django: `verify_batch()` runs in worker processes.
+'''
+
+from collections import deque
+
+WIDTH = 25
+HEIGHT = 25
+START_LENGTH = 3
+FOOD_POINTS = 10
+POWER_UP_POINTS = 100
+POWER_UP_CHANCE = 0.01
+BOMB_SPAWN_CHANCE = 0.005
+MAX_BOMBS = 3
+# 10 and 8 seconds at the normal 68 ms tick
+POWER_UP_LIFETIME = 147
+BOMB_LIFETIME = 118
+
+DIRECTIONS = {
+    'up': (0, -1),
+    'down': (0, 1),
+    'left': (-1, 0),
+    'right': (1, 0),
+}
+OPPOSITES = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def mulberry32(seed):
+    '''Return the client's generator: floats in [0, 1) from a u32 seed.'''
+    state = seed & 0xFFFFFFFF
+
+    def random():
+        nonlocal state
+        state = (state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = ((state ^ (state >> 15)) * (state | 1)) & 0xFFFFFFFF
+        t ^= (t + ((t ^ (t >> 7)) * (t | 61))) & 0xFFFFFFFF
+        return (t ^ (t >> 14)) / 4294967296
+
+    return random
+
+
+def simulate(seed, inputs, max_ticks):
+    '''
+    Replay a game and return `(score, ticks)` at game over. Raises
+    `ReplayError` for input the client cannot produce, or when the game
+    is still running after `max_ticks`.
+    '''
+    random = mulberry32(seed)
+    grid = bytearray(WIDTH * HEIGHT)
+    snake = deque()
+    x, y = WIDTH // 2, HEIGHT // 2
+    for offset in range(START_LENGTH):
+        cell = y * WIDTH + x - offset
+        snake.append(cell)
+        grid[cell] += 1
+
+    def place(*avoid):
+        # Rejection sampling, drawing x then y exactly as the client does
+        while True:
+            cell = int(random() * WIDTH) + int(random() * HEIGHT) * WIDTH
+            if not grid[cell] and cell not in avoid:
+                return cell
+
+    score = 0
+    tick = 0
+    direction = 'right'
+    dx, dy = DIRECTIONS[direction]
+    power_up = None
+    power_up_expires = 0
+    bombs = {}
+
+    food = place()
+    if random() < POWER_UP_CHANCE:
+        power_up = place(food)
+        power_up_expires = POWER_UP_LIFETIME
+
+    turns = iter(inputs)
+    turn = next(turns, None)
+    while True:
+        tick += 1
+        if tick > max_ticks:
+            raise ReplayError(f'Game still running after {max_ticks} ticks')
+
+        if power_up is not None and power_up_expires <= tick:
+            power_up = None
+        if bombs:
+            bombs = {cell: end for cell, end in bombs.items() if end > tick}
+
+        if turn is not None and turn[0] == tick:
+            if turn[1] == OPPOSITES[direction]:
+                raise ReplayError(f'Snake reversed on tick {tick}')
+            direction = turn[1]
+            dx, dy = DIRECTIONS[direction]
+            turn = next(turns, None)
+
+        x += dx
+        y += dy
+        if not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+            break
+        head = y * WIDTH + x
+        # The tail moves out of the way, so running into it is allowed
+        if grid[head] - (head == snake[-1]) > 0 or head in bombs:
+            break
+
+        snake.appendleft(head)
+        grid[head] += 1
+        if head == food:
+            score += FOOD_POINTS
+            food = place()
+            if power_up is None and random() < POWER_UP_CHANCE:
+                power_up = place(food)
+                power_up_expires = tick + POWER_UP_LIFETIME
+        elif head == power_up:
+            score += POWER_UP_POINTS
+            while len(snake) > START_LENGTH:
+                grid[snake.pop()] -= 1
+            power_up = None
+        else:
+            grid[snake.pop()] -= 1
+
+        if power_up is None and random() < POWER_UP_CHANCE / 5:
+            power_up = place(food)
+            power_up_expires = tick + POWER_UP_LIFETIME
+        if random() < BOMB_SPAWN_CHANCE and len(bombs) < MAX_BOMBS:
+            bombs[place(food, power_up, *bombs)] = tick + BOMB_LIFETIME
+
+    if turn is not None:
+        raise ReplayError(f'Input on tick {turn[0]} after game over')
+    return score, tick
+
+
+def verify(seed, ticks, inputs, score):
+    '''Return why a replay does not reproduce `score`, or None if it does.'''
+    try:
+        replayed_score, replayed_ticks = simulate(seed, inputs, ticks)
+    except ReplayError as e:
+        return str(e)
+    if (replayed_score, replayed_ticks) != (score, ticks):
+        return (
+            f'Replay scored {replayed_score} in {replayed_ticks} ticks, '
+            f'not {score} in {ticks}'
+        )
+    return None
+
+
+def verify_batch(games):
+    '''
+    Verify `(id, seed, ticks, inputs, score)` tuples; return `(id, error)`
+    pairs. Games are sent to worker processes in batches like this one so
+    pickling and IPC are paid per batch rather than per game.
+    '''
+    return [(id, verify(*game)) for id, *game in games]
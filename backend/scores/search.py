@@ -0,0 +1,229 @@
+'''
+Player search by name prefix, with each hit's best score and rank.
+
+Names are matched by prefix against the first name, last name and
+"first last". Emails are not matched, and only returned to signed-in
+callers, so the search cannot be used to list players' addresses. On
+PostgreSQL the `UPPER(...) text_pattern_ops` indexes from
+users/migrations/0003 serve the match. Other databases have no such index,
+so each process keeps a sorted list of lowercased names for players on the
+board, and a prefix is a `bisect` into it.
+
+A short prefix can match tens of thousands of players, and finding each
+one's best score is a query of its own. So only the first
+`PLAYER_SEARCH_CANDIDATES` matching players are ranked: on PostgreSQL
+whichever the prefix indexes yield first, elsewhere the first in
+alphabetical order. With more matches than that, a better player can be
+left out; a longer query finds them.
+
+A rank is 1 + the number of ranked scores above the player's best, as on
+the global leaderboard. Counting those in the database reads the score
+index from the top down to the player, which for low-ranked players at a
+million scores is far over budget. So each process keeps a histogram of
+ranked scores (distinct values and how many scores are at or below each),
+and a rank is a `bisect` into that too.
+
+Both structures are rebuilt in the background every
+`PLAYER_SEARCH_REFRESH_INTERVAL` seconds, and requests keep using the old
+ones until the rebuild is done. Ranks and the fallback name list can
+therefore be that many seconds out of date. Best scores are read fresh
+for every search.
+
+When the host's shared rankings (see scores/rankings.py) are fresh, ranks
+come from their histogram instead, and processes skip building their own.
+'''
+
+import bisect
+import os
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.models import Exists, OuterRef, Q, Subquery
+
+from . import rankings
+from .models import Score
+
+User = get_user_model()
+
+
+def normalize(query):
+    return ' '.join(query.lower().split())
+
+
+class SearchIndex:
+    '''This process's score histogram and, off PostgreSQL, name list.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (values, at_or_below, names, user_ids), replaced whole on rebuild
+        self.state = None
+        self.has_histogram = False
+        self.built_at = 0
+        self.refreshing = False
+
+    def sync(self, force=False):
+        '''Build the index if missing; start a rebuild if it is stale.'''
+        if force or self.state is None:
+            with self.lock:
+                if force or self.state is None:
+                    self._rebuild()
+            return
+        if (
+            time.monotonic() - self.built_at
+            < settings.PLAYER_SEARCH_REFRESH_INTERVAL
+        ):
+            return
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(
+            target=self._rebuild_in_background,
+            name='player-search-index',
+            daemon=True,
+        ).start()
+
+    def _rebuild_in_background(self):
+        try:
+            self._rebuild()
+        finally:
+            self.refreshing = False
+            connections.close_all()
+
+    def _rebuild(self, histogram_needed=False):
+        shared = not histogram_needed and rankings.reader.available()
+        if shared:
+            values, at_or_below = array('q'), array('q')
+        else:
+            values, at_or_below = rankings.histogram()
+
+        names, user_ids = [], array('q')
+        if connection.vendor != 'postgresql':
+            entries = []
+            for pk, first, last in (
+                User.objects.filter(
+                    Exists(Score.objects.ranked().filter(user=OuterRef('pk')))
+                )
+                .values_list('pk', 'first_name', 'last_name')
+                .iterator()
+            ):
+                for name in {first, last, f'{first} {last}'}:
+                    if name := normalize(name):
+                        entries.append((name, pk))
+            entries.sort()
+            names = [name for name, _ in entries]
+            user_ids.extend(pk for _, pk in entries)
+
+        self.state = (values, at_or_below, names, user_ids)
+        self.has_histogram = not shared
+        self.built_at = time.monotonic()
+
+    def rank(self, points):
+        '''1 + how many ranked scores are above `points`.'''
+        values, at_or_below, _, _ = self.state
+        if not at_or_below:
+            return 1
+        i = bisect.bisect_right(values, points)
+        return 1 + at_or_below[-1] - (at_or_below[i - 1] if i else 0)
+
+    def user_ids(self, prefix, limit):
+        '''Up to `limit` distinct players with a name starting `prefix`.'''
+        _, _, names, user_ids = self.state
+        found = {}
+        i = bisect.bisect_left(names, prefix)
+        while (
+            i < len(names)
+            and len(found) < limit
+            and names[i].startswith(prefix)
+        ):
+            found[user_ids[i]] = None
+            i += 1
+        return list(found)
+
+
+index = SearchIndex()
+
+
+def _after_fork():
+    # A lock held by another thread at fork would never be released
+    index.lock = threading.Lock()
+    index.refreshing = False
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def rank(points):
+    '''1 + how many ranked scores are above `points`.'''
+    shared = rankings.reader.rank(points)
+    if shared is not None:
+        return shared
+    index.sync()
+    if not index.has_histogram:
+        # Built while the shared rankings were fresh; they no longer are
+        with index.lock:
+            if not index.has_histogram:
+                index._rebuild(histogram_needed=True)
+    return index.rank(points)
+
+
+def search(query, limit, emails=False):
+    '''
+    Players whose name starts with `query`, best first, as dicts with the
+    id, score and rank of their best ranked score, and their email as
+    `username` if `emails`. Only `PLAYER_SEARCH_CANDIDATES` matches are
+    considered.
+    '''
+    prefix = normalize(query)
+    index.sync()
+
+    if connection.vendor == 'postgresql':
+        match = Q(first_name__istartswith=prefix) | Q(
+            last_name__istartswith=prefix
+        )
+        first, _, last = prefix.partition(' ')
+        if last:
+            match |= Q(first_name__istartswith=first) & Q(
+                last_name__istartswith=last
+            )
+        on_board = Exists(Score.objects.ranked().filter(user=OuterRef('pk')))
+        candidates = list(
+            User.objects.filter(match, on_board).values_list('pk', flat=True)[
+                : settings.PLAYER_SEARCH_CANDIDATES
+            ]
+        )
+    else:
+        candidates = index.user_ids(prefix, settings.PLAYER_SEARCH_CANDIDATES)
+    players = User.objects.filter(pk__in=candidates)
+
+    best = (
+        Score.objects.ranked()
+        .filter(user=OuterRef('pk'))
+        .order_by('-score', 'pk')
+    )
+    hits = []
+    for email, first, last, score_id, points in (
+        players.annotate(
+            score_id=Subquery(best.values('pk')[:1]),
+            points=Subquery(best.values('score')[:1]),
+        )
+        .filter(score_id__isnull=False)
+        .order_by('-points', 'first_name', 'last_name', 'pk')
+        .values_list('email', 'first_name', 'last_name', 'score_id', 'points')[
+            :limit
+        ]
+    ):
+        hit = {
+            'id': score_id,
+            'score': points,
+            'name': f'{first} {last}'.strip(),
+            'rank': rank(points),
+        }
+        if emails:
+            hit['username'] = email
+        hits.append(hit)
+    return hits
@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Score
+from .models import Replay, Score
+from .replay import DIRECTIONS
 
 class ScoreSerializer(serializers.ModelSerializer):
     username = serializers.SerializerMethodField()
@@ -10,4 +12,42 @@ class ScoreSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
     
     def get_username(self, obj):
-        return obj.user.email 
\ No newline at end of file
+        return obj.user.email
+
+
+class ReplaySerializer(serializers.ModelSerializer):
+    '''
+    Checks a replay's shape only; whether it reproduces the score is up to
+    the `verify_scores` worker.
+    '''
+
+    seed = serializers.IntegerField(min_value=0, max_value=2**32 - 1)
+    ticks = serializers.IntegerField(min_value=1)
+    inputs = serializers.ListField(child=serializers.ListField())
+
+    class Meta:
+        model = Replay
+        fields = ['seed', 'ticks', 'inputs']
+
+    def validate_ticks(self, value):
+        if value > settings.REPLAY_MAX_TICKS:
+            raise serializers.ValidationError(
+                f'Replays are limited to {settings.REPLAY_MAX_TICKS} ticks.'
+            )
+        return value
+
+    def validate(self, attrs):
+        previous = 0
+        for turn in attrs['inputs']:
+            if (
+                len(turn) != 2
+                or type(turn[0]) is not int
+                or not previous < turn[0] <= attrs['ticks']
+                or type(turn[1]) is not str
+                or turn[1] not in DIRECTIONS
+            ):
+                raise serializers.ValidationError(
+                    {'inputs': 'Expected [tick, direction] in tick order.'}
+                )
+            previous = turn[0]
+        return attrs
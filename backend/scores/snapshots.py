@@ -0,0 +1,145 @@
+'''
+Pre-rendered leaderboard snapshots for anonymous clients, served by the CDN.
+
+`publish_leaderboards` renders these boards:
+
+- `top`: the top scores overall
+- `today`: the top scores since midnight UTC
+- `week`: the top scores since Monday UTC
+- `stats`: totals
+
+Each board is JSON that includes a `version`, the hash of its content. It
+is written to the `leaderboards` storage twice:
+
+- `<board>/<version>.json`, never changed again and cached for a year
+- `<board>/latest.json`, overwritten in one PUT (or rename), so readers see
+  either the old snapshot or the new one
+
+A board whose content has not changed since its last publication is not
+uploaded. The publisher remembers the version it last published, and
+after a restart it reads the version back from `latest.json`.
+
+Once a version has been replaced for `LEADERBOARD_SNAPSHOT_RETENTION`
+seconds, its file is deleted by the next publication that prunes the board,
+at most once per that period. A version was replaced when the next one's
+file was written, so a board that changes back to an earlier version
+uploads that file again.
+'''
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from .models import Score
+from .serializers import ScoreSerializer
+
+
+def top_scores(scores):
+    scores = scores.select_related('user').order_by('-score', 'pk')
+    return ScoreSerializer(
+        scores[: settings.LEADERBOARD_SNAPSHOT_SIZE], many=True
+    ).data
+
+
+def render():
+    '''The `top`, `today` and `week` boards.'''
+    ranked = Score.objects.ranked()
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    week = today - timedelta(days=today.weekday())
+    return {
+        'top': {'scores': top_scores(ranked)},
+        'today': {
+            'since': today,
+            'scores': top_scores(ranked.filter(created_at__gte=today)),
+        },
+        'week': {
+            'since': week,
+            'scores': top_scores(ranked.filter(created_at__gte=week)),
+        },
+    }
+
+
+def render_stats():
+    '''The `stats` board: a full pass over ranked scores.'''
+    stats = Score.objects.ranked().aggregate(
+        scores=Count('pk'),
+        players=Count('user', distinct=True),
+        high_score=Max('score'),
+        average_score=Avg('score'),
+    )
+    if stats['average_score'] is not None:
+        stats['average_score'] = round(stats['average_score'], 1)
+    return stats
+
+
+def dumps(data):
+    # Stable output, so equal boards hash equally
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':')
+    ).encode()
+
+
+class Publisher:
+    def __init__(self, storage=None):
+        self.storage = storage or storages['leaderboards']
+        # Board name: version in its `latest.json`
+        self.published = {}
+        # Board name: when its old versions are next pruned (monotonic)
+        self.prune_due = {}
+
+    def latest_version(self, board):
+        name = f'{board}/latest.json'
+        if not self.storage.exists(name):
+            return None
+        with self.storage.open(name) as file:
+            return json.load(file).get('version')
+
+    def publish(self, boards):
+        '''Upload the boards that changed; return their names.'''
+        changed = []
+        for board, data in boards.items():
+            version = hashlib.sha256(dumps(data)).hexdigest()[:16]
+            if board not in self.published:
+                self.published[board] = self.latest_version(board)
+            if self.published[board] == version:
+                continue
+
+            content = dumps({'version': version, **data})
+            self.storage.save(f'{board}/{version}.json', ContentFile(content))
+            self.storage.save(f'{board}/latest.json', ContentFile(content))
+            self.published[board] = version
+            changed.append(board)
+
+            if time.monotonic() >= self.prune_due.get(board, 0):
+                self.prune(board)
+        return changed
+
+    def prune(self, board):
+        '''Delete the versions of `board` replaced before the retention.'''
+        self.prune_due[board] = (
+            time.monotonic() + settings.LEADERBOARD_SNAPSHOT_RETENTION
+        )
+        _, files = self.storage.listdir(board)
+        versions = sorted(
+            (
+                (self.storage.get_modified_time(f'{board}/{file}'), file)
+                for file in files
+                if file != 'latest.json'
+            ),
+            reverse=True,
+        )
+        cutoff = timezone.now() - timedelta(
+            seconds=settings.LEADERBOARD_SNAPSHOT_RETENTION
+        )
+        # Each version was replaced when the next newer one was written
+        for (replaced_at, _), (_, file) in zip(versions, versions[1:]):
+            if replaced_at < cutoff:
+                self.storage.delete(f'{board}/{file}')
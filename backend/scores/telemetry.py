@@ -0,0 +1,353 @@
+'''
+Gameplay telemetry: a compact binary wire format, a per-process buffer and
+columnar segment files written through the `telemetry` storage.
+
+A request body is one or more length-prefixed frames, all little-endian:
+
+    frame   = u32 length | header | event * count
+    header  = 16 bytes game UUID | u32 count
+    event   = u32 t (ms since game start) | u8 kind | u8 (reserved)
+              | i16 x | i16 y | u16 snake length
+
+Events have a fixed size, so each column is cut out of a frame with a
+handful of strided slice copies (one per byte of the field) instead of
+unpacking events one at a time. Columns accumulate in memory and are
+flushed to one segment file per `TELEMETRY_FLUSH_EVENTS` events, or once
+the oldest buffered event has waited `TELEMETRY_FLUSH_INTERVAL` seconds
+(checked by a timer thread, so quiet workers flush too), partitioned by
+hour:
+
+    events/date=2024-05-01/hour=13/<host>-<pid>-<sequence>.parquet
+
+With pyarrow installed, a segment is a Parquet file with one row per event:
+the game (dictionary encoded), the user and the event columns. Without it,
+segments are `.cts` files: `b'CTS1'`, a u32 header length, a JSON header
+(event count, column layout and `[game, user, first event, event count]`
+runs) and then each column's bytes back to back. `convert_telemetry`
+rewrites those as Parquet once pyarrow is installed.
+
+Segments are encoded on the flush thread, not while holding the buffer.
+'''
+
+import array
+import atexit
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.utils import timezone
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+FRAME_LENGTH = struct.Struct('<I')
+FRAME_HEADER = struct.Struct('<16sI')
+EVENT = struct.Struct('<IBxhhH')
+SEGMENT_MAGIC = b'CTS1'
+
+# (name, `array` type code, offset in an event); widths follow the codes
+COLUMNS = (
+    ('t', 'I', 0),
+    ('kind', 'B', 4),
+    ('x', 'h', 6),
+    ('y', 'h', 8),
+    ('length', 'H', 10),
+)
+
+# Parquet column types for the `array` type codes
+ARROW_TYPES = {'I': 'uint32', 'B': 'uint8', 'h': 'int16', 'H': 'uint16'}
+
+MOVE = 0
+FOOD = 1
+POWER_UP = 2
+BOMB = 3
+GAME_OVER = 4
+
+
+class TelemetryError(ValueError):
+    pass
+
+
+def encode(game, events):
+    '''Encode one frame; `events` are `(t, kind, x, y, length)` tuples.'''
+    body = FRAME_HEADER.pack(game.bytes, len(events)) + b''.join(
+        EVENT.pack(*event) for event in events
+    )
+    return FRAME_LENGTH.pack(len(body)) + body
+
+
+def split_columns(events, count):
+    '''Return `{name: bytes}` for `count` packed events in `events`.'''
+    columns = {}
+    for name, code, offset in COLUMNS:
+        width = array.array(code).itemsize
+        column = bytearray(width * count)
+        for byte in range(width):
+            column[byte::width] = events[offset + byte :: EVENT.size]
+        columns[name] = column
+    return columns
+
+
+def parse(body):
+    '''
+    Yield `(game UUID, count, columns)` for each frame in `body`, raising
+    `TelemetryError` for malformed input.
+    '''
+    view = memoryview(body).cast('B')
+    position = 0
+    while position < len(view):
+        if len(view) - position < FRAME_LENGTH.size:
+            raise TelemetryError('Truncated frame length')
+        (length,) = FRAME_LENGTH.unpack_from(view, position)
+        position += FRAME_LENGTH.size
+        frame = view[position : position + length]
+        if len(frame) != length or length < FRAME_HEADER.size:
+            raise TelemetryError('Truncated frame')
+        game, count = FRAME_HEADER.unpack_from(frame)
+        events = frame[FRAME_HEADER.size :]
+        if len(events) != count * EVENT.size:
+            raise TelemetryError('Frame length does not match event count')
+        position += length
+        if count:
+            yield uuid.UUID(bytes=game), count, split_columns(events, count)
+
+
+class TelemetryBuffer:
+    '''This process's unflushed events, appended column by column.'''
+
+    def __init__(self):
+        # Guards the buffered events
+        self.lock = threading.Lock()
+        # Held while a flush waits for or makes a write, one at a time
+        self.write_lock = threading.Lock()
+        self._executor = None
+        self._pending = None
+        self._timer = None
+        self.sequence = 0
+        self.reset()
+
+    def reset(self):
+        self.columns = {name: bytearray() for name, _, _ in COLUMNS}
+        self.games = []
+        self.count = 0
+        self.started = time.monotonic()
+
+    def append(self, user_id, frames):
+        '''Buffer parsed frames; return how many events were added.'''
+        added = 0
+        with self.lock:
+            if not self.count:
+                self.started = time.monotonic()
+            for game, count, columns in frames:
+                self.games.append([game.hex, user_id, self.count, count])
+                for name, column in columns.items():
+                    self.columns[name] += column
+                self.count += count
+                added += count
+            due = self.count >= settings.TELEMETRY_FLUSH_EVENTS
+            if self.count and self._timer is None:
+                self._timer = threading.Thread(
+                    target=self._flush_forever,
+                    name='telemetry-flush-timer',
+                    daemon=True,
+                )
+                self._timer.start()
+        if due:
+            self.flush(wait=False)
+        return added
+
+    def flush_if_due(self):
+        '''
+        Flush if the oldest buffered event has waited
+        `TELEMETRY_FLUSH_INTERVAL` seconds; return the seconds until the
+        next check.
+        '''
+        interval = settings.TELEMETRY_FLUSH_INTERVAL
+        with self.lock:
+            if not self.count:
+                return interval
+            wait = self.started + interval - time.monotonic()
+        if wait > 0:
+            return wait
+        self.flush(wait=False)
+        return interval
+
+    def _flush_forever(self):
+        while True:
+            try:
+                wait = self.flush_if_due()
+            except Exception:
+                logger.exception('Flushing telemetry failed')
+                wait = settings.TELEMETRY_FLUSH_INTERVAL
+            time.sleep(wait)
+
+    def flush(self, wait=True):
+        '''
+        Write buffered events to a new segment. With `wait=False` the write
+        runs on a background thread, but never more than one at a time.
+        Events keep being buffered while a flush waits for a write.
+        '''
+        with self.write_lock:
+            if self._pending is not None:
+                # Backpressure: storage is slower than ingestion
+                pending, self._pending = self._pending, None
+                try:
+                    pending.result()
+                except Exception:
+                    # Its events are lost; these ones may still be written
+                    logger.exception('Writing a telemetry segment failed')
+
+            with self.lock:
+                if not self.count:
+                    return None
+                batch = (self.count, self.columns, self.games)
+                self.sequence += 1
+                name = segment_name(self.sequence)
+                self.reset()
+
+            if wait:
+                return write_segment(name, *batch)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    1, thread_name_prefix='telemetry-flush'
+                )
+            self._pending = self._executor.submit(write_segment, name, *batch)
+            return name
+
+
+def segment_name(sequence):
+    now = timezone.now()
+    suffix = 'cts' if pyarrow is None else 'parquet'
+    return (
+        f'events/date={now:%Y-%m-%d}/hour={now:%H}/'
+        f'{socket.gethostname()}-{os.getpid()}-{sequence:06d}.{suffix}'
+    )
+
+
+def segment_bytes(count, columns, games):
+    header = {
+        'events': count,
+        'columns': [
+            [name, code, len(columns[name])] for name, code, _ in COLUMNS
+        ],
+        'games': games,
+    }
+    encoded = json.dumps(header, separators=(',', ':')).encode()
+    return b''.join(
+        [SEGMENT_MAGIC, FRAME_LENGTH.pack(len(encoded)), encoded]
+        + [columns[name] for name, _, _ in COLUMNS]
+    )
+
+
+def parquet_bytes(count, columns, games):
+    '''Encode buffered events as a Parquet file; needs pyarrow.'''
+    runs = array.array('i')
+    for index, (_, _, _, events) in enumerate(games):
+        runs.extend(array.array('i', [index]) * events)
+    indices = pyarrow.Array.from_buffers(
+        pyarrow.int32(), count, [None, pyarrow.py_buffer(runs)]
+    )
+    table = {
+        'game': pyarrow.DictionaryArray.from_arrays(
+            indices, pyarrow.array([game for game, _, _, _ in games])
+        ),
+        'user': pyarrow.array(
+            [user for _, user, _, _ in games], pyarrow.int64()
+        ).take(indices),
+    }
+    for name, code, _ in COLUMNS:
+        table[name] = pyarrow.Array.from_buffers(
+            pyarrow.type_for_alias(ARROW_TYPES[code]),
+            count,
+            [None, pyarrow.py_buffer(columns[name])],
+        )
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(pyarrow.table(table), sink)
+    return sink.getvalue().to_pybytes()
+
+
+def write_segment(name, count, columns, games):
+    if name.endswith('.parquet'):
+        segment = parquet_bytes(count, columns, games)
+    else:
+        segment = segment_bytes(count, columns, games)
+    return storages['telemetry'].save(name, ContentFile(segment))
+
+
+def read_segment(file):
+    '''Return `(header, {name: array})` for a segment file object.'''
+    data = file.read()
+    if data[:4] != SEGMENT_MAGIC:
+        raise TelemetryError('Not a telemetry segment')
+    (length,) = FRAME_LENGTH.unpack_from(data, 4)
+    header = json.loads(data[8 : 8 + length])
+    position = 8 + length
+    columns = {}
+    for name, code, size in header['columns']:
+        column = array.array(code)
+        column.frombytes(data[position : position + size])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        columns[name] = column
+        position += size
+    return header, columns
+
+
+def segment_names(storage, path='events'):
+    '''Every file under `path` in `storage`.'''
+    try:
+        directories, files = storage.listdir(path)
+    except FileNotFoundError:
+        return
+    for directory in directories:
+        yield from segment_names(storage, f'{path}/{directory}')
+    for file in files:
+        yield f'{path}/{file}'
+
+
+def convert_segment(storage, name):
+    '''Rewrite the `.cts` segment `name` as Parquet; return the new name.'''
+    with storage.open(name) as file:
+        header, columns = read_segment(file)
+    segment = parquet_bytes(
+        header['events'],
+        {key: column.tobytes() for key, column in columns.items()},
+        header['games'],
+    )
+    converted = storage.save(
+        os.path.splitext(name)[0] + '.parquet', ContentFile(segment)
+    )
+    storage.delete(name)
+    return converted
+
+
+buffer = TelemetryBuffer()
+
+
+def _after_fork():
+    # Events and threads belong to the parent; start empty
+    buffer.lock = threading.Lock()
+    buffer.write_lock = threading.Lock()
+    buffer._executor = None
+    buffer._pending = None
+    buffer._timer = None
+    buffer.reset()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+atexit.register(buffer.flush)
@@ -0,0 +1,65 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from main.admin import EstimatedCountPaginator
+from scores.models import Score
+
+User = get_user_model()
+
+
+class ScoreAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='staff@example.com', password='adminpass'
+        )
+        self.client.force_login(self.admin)
+
+    def create_scores(self, count, start=0):
+        for i in range(start, start + count):
+            user = User.objects.create_user(
+                email=f'player{i}@example.com', password='pass'
+            )
+            Score.objects.create(user=user, score=i * 10)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.create_scores(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/admin/scores/score/')
+
+        self.create_scores(10, start=2)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/admin/scores/score/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(few), len(many))
+
+    def test_changelist_does_not_list_distinct_dates(self):
+        self.create_scores(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/admin/scores/score/', {'created_at__gte': '2000-01-01'}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+        self.assertFalse(any('DISTINCT' in query['sql'] for query in queries))
+
+    def test_search_matches_email_prefix_and_exact_score(self):
+        self.create_scores(3)
+
+        response = self.client.get('/admin/scores/score/', {'q': 'player1'})
+        self.assertEqual(
+            [s.score for s in response.context['cl'].result_list], [10]
+        )
+
+        response = self.client.get('/admin/scores/score/', {'q': '20'})
+        self.assertEqual(
+            [s.score for s in response.context['cl'].result_list], [20]
+        )
+
+    def test_paginator_uses_exact_count_outside_postgresql(self):
+        self.create_scores(3)
+        paginator = EstimatedCountPaginator(Score.objects.all(), 100)
+        self.assertEqual(paginator.count, 3)
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from scores.models import Score
@@ -6,6 +6,7 @@ from scores.models import Score
 User = get_user_model()
 
 
+@override_settings(REPLAY_REQUIRED=False)
 class ScoreAPITests(TestCase):
     def setUp(self):
         self.client = APIClient()
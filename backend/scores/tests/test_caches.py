@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from main import invalidation
+from scores.models import Score
+from scores.warmup import load_leaderboard
+
+User = get_user_model()
+
+
+@override_settings(SCORE_CACHE_SIZE=100, RATE_LIMIT_SYNC_INTERVAL=0)
+class CachedReadsTests(TransactionTestCase):
+    def setUp(self):
+        invalidation.evict_all()
+        self.addCleanup(invalidation.evict_all)
+        publish = mock.patch.object(invalidation.bus, 'publish')
+        self.publish = publish.start()
+        self.addCleanup(publish.stop)
+
+        self.ada = User.objects.create_user(email='ada@example.com')
+        self.grace = User.objects.create_user(email='grace@example.com')
+        self.group = Group.objects.create(name='Analysts')
+        self.ada.groups.add(self.group)
+        Score.objects.create(user=self.ada, score=500)
+        Score.objects.create(user=self.grace, score=300)
+        self.client = APIClient()
+
+    def board(self, group=None):
+        query = '' if group is None else f'?group={group.pk}'
+        response = self.client.get(f'/api/scores/leaderboard/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [(row['username'], row['score']) for row in response.json()]
+
+    def test_leaderboard_is_cached_until_a_score_changes(self):
+        self.board()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.board(),
+                [('ada@example.com', 500), ('grace@example.com', 300)],
+            )
+
+        self.publish.reset_mock()
+        Score.objects.create(user=self.grace, score=900)
+
+        self.publish.assert_called_once_with(('top', f'user:{self.grace.pk}'))
+        self.assertEqual(self.board()[0], ('grace@example.com', 900))
+
+    def test_warmup_fills_the_leaderboard_cache(self):
+        load_leaderboard()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.board()[0], ('ada@example.com', 500))
+
+    def test_group_board_is_evicted_by_its_members_scores(self):
+        self.assertEqual(self.board(self.group), [('ada@example.com', 500)])
+        self.grace.groups.add(self.group)
+        self.assertEqual(
+            self.board(self.group),
+            [('ada@example.com', 500), ('grace@example.com', 300)],
+        )
+
+        # A score outside the group leaves its board cached
+        outsider = User.objects.create_user(email='outsider@example.com')
+        Score.objects.create(user=outsider, score=1000)
+        # (the query checks that the group exists)
+        with self.assertNumQueries(1):
+            self.board(self.group)
+
+        Score.objects.create(user=self.ada, score=700)
+        self.assertEqual(self.board(self.group)[0], ('ada@example.com', 700))
+
+    def test_boards_showing_a_user_are_evicted_when_they_change(self):
+        self.board()
+        self.grace.last_login = timezone.now()
+        self.grace.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.board()
+
+        self.grace.email = 'hopper@example.com'
+        self.grace.save()
+        self.assertEqual(self.board()[1], ('hopper@example.com', 300))
+
+    def test_authenticated_user_is_cached_until_they_change(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.ada)}'
+        )
+        self.assertEqual(self.client.get('/users/me/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.client.get('/users/me/').json()['email'],
+                'ada@example.com',
+            )
+
+        self.ada.is_active = False
+        self.ada.save()
+
+        self.assertEqual(self.client.get('/users/me/').status_code, 401)
@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from main import invalidation
+from scores import caches, search
+from scores.models import Score
+
+User = get_user_model()
+
+
+class DashboardTestMixin:
+    def setUp(self):
+        super().setUp()
+        invalidation.evict_all()
+        self.addCleanup(invalidation.evict_all)
+        self.ada = User.objects.create_user(
+            email='ada@example.com', first_name='Ada', last_name='Lovelace'
+        )
+        self.grace = User.objects.create_user(email='grace@example.com')
+        Score.objects.create(user=self.ada, score=500)
+        Score.objects.create(user=self.ada, score=300)
+        Score.objects.create(user=self.ada, score=9000, status='pending')
+        Score.objects.create(user=self.grace, score=900)
+        search.index.sync(force=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.ada)
+
+    def get(self):
+        response = self.client.get('/api/scores/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assert_dashboard(self, data):
+        self.assertEqual(
+            data['profile'],
+            {
+                'id': self.ada.pk,
+                'email': 'ada@example.com',
+                'first_name': 'Ada',
+                'last_name': 'Lovelace',
+            },
+        )
+        self.assertEqual(data['best']['score'], 500)
+        self.assertEqual(data['rank'], 2)
+        self.assertEqual(
+            [(s['score'], s['status']) for s in data['recent']],
+            [(9000, 'pending'), (300, 'unverified'), (500, 'unverified')],
+        )
+        self.assertEqual(
+            [(s['username'], s['score']) for s in data['top']],
+            [
+                ('grace@example.com', 900),
+                ('ada@example.com', 500),
+                ('ada@example.com', 300),
+            ],
+        )
+
+
+@override_settings(RANKINGS_FILE='')
+class DashboardTests(DashboardTestMixin, TestCase):
+    def test_dashboard(self):
+        self.assert_dashboard(self.get())
+
+    def test_player_without_ranked_scores(self):
+        self.client.force_authenticate(
+            User.objects.create_user(email='new@example.com')
+        )
+
+        data = self.get()
+
+        self.assertIsNone(data['best'])
+        self.assertIsNone(data['rank'])
+        self.assertEqual(data['recent'], [])
+        self.assertEqual(len(data['top']), 3)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/scores/dashboard/')
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(RANKINGS_FILE='', RATE_LIMIT_SYNC_INTERVAL=0)
+class ConcurrentDashboardTests(DashboardTestMixin, TransactionTestCase):
+    def setUp(self):
+        # Background writers would contend for SQLite's table locks
+        publish = mock.patch.object(invalidation.bus, 'publish')
+        publish.start()
+        self.addCleanup(publish.stop)
+        super().setUp()
+
+    def test_queries_run_on_the_pool(self):
+        self.assert_dashboard(self.get())
+
+    @override_settings(SCORE_CACHE_SIZE=100)
+    def test_top_scores_are_cached_until_a_score_changes(self):
+        self.get()
+        hits = caches.boards.hits
+        self.assertEqual(self.get()['top'][0]['score'], 900)
+        self.assertEqual(caches.boards.hits, hits + 1)
+
+        Score.objects.create(user=self.grace, score=1000)
+        self.assertEqual(self.get()['top'][0]['score'], 1000)
@@ -0,0 +1,125 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from scores.models import GroupHighScore, Replay, Score
+
+from .test_replay import GAMES, replay_data
+
+User = get_user_model()
+
+
+class GroupLeaderboardTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.course = Group.objects.create(name='CIS 376')
+        self.club = Group.objects.create(name='Snake club')
+        self.alice, self.bob, self.carol = (
+            User.objects.create_user(email=f'{name}@example.com')
+            for name in ('alice', 'bob', 'carol')
+        )
+        self.alice.groups.add(self.course, self.club)
+        self.bob.groups.add(self.course)
+
+    def leaderboard(self, group):
+        response = self.client.get(
+            '/api/scores/leaderboard/', {'group': group.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [(entry['username'], entry['score']) for entry in response.data]
+
+    def test_ranks_each_members_best_score(self):
+        Score.objects.create(user=self.alice, score=100)
+        Score.objects.create(user=self.alice, score=300)
+        Score.objects.create(user=self.bob, score=200)
+        Score.objects.create(user=self.carol, score=900)
+
+        self.assertEqual(
+            self.leaderboard(self.course),
+            [('alice@example.com', 300), ('bob@example.com', 200)],
+        )
+        self.assertEqual(
+            self.leaderboard(self.club), [('alice@example.com', 300)]
+        )
+
+    def test_reads_no_membership_or_sorts_scores(self):
+        Score.objects.create(user=self.alice, score=100)
+        with CaptureQueriesContext(connection) as queries:
+            self.leaderboard(self.course)
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('auth_user_groups', sql)
+        self.assertNotIn('ORDER BY "scores_score"', sql)
+
+    def test_follows_membership_changes(self):
+        Score.objects.create(user=self.carol, score=500)
+        self.course.user_set.add(self.carol)
+        self.assertEqual(self.leaderboard(self.course)[0][1], 500)
+
+        self.carol.groups.remove(self.course)
+        self.assertEqual(self.leaderboard(self.course), [])
+
+        Score.objects.create(user=self.alice, score=50)
+        self.club.user_set.clear()
+        self.assertEqual(self.leaderboard(self.club), [])
+        self.assertEqual(
+            self.leaderboard(self.course), [('alice@example.com', 50)]
+        )
+
+    def test_deleted_and_rejected_scores_fall_back(self):
+        low = Score.objects.create(user=self.bob, score=100)
+        high = Score.objects.create(user=self.bob, score=400)
+
+        high.delete()
+        self.assertEqual(self.leaderboard(self.course)[0][1], 100)
+
+        low.status = Score.Status.REJECTED
+        low.save()
+        self.assertEqual(self.leaderboard(self.course), [])
+
+        self.bob.delete()
+        self.assertFalse(GroupHighScore.objects.exists())
+
+    def test_verified_replays_are_ranked(self):
+        score = Score.objects.create(
+            user=self.bob, score=GAMES[0]['score'], status='pending'
+        )
+        Replay.objects.create(score=score, **replay_data(GAMES[0]))
+        self.assertEqual(self.leaderboard(self.course), [])
+
+        call_command('verify_scores', once=True, workers=0, stdout=StringIO())
+
+        self.assertEqual(
+            self.leaderboard(self.course),
+            [('bob@example.com', GAMES[0]['score'])],
+        )
+
+    def test_admin_group_form_updates_membership(self):
+        Score.objects.create(user=self.carol, score=700)
+        self.carol.is_staff = True
+        self.carol.save()
+        admin = User.objects.create_superuser(
+            email='teacher@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+
+        response = self.client.post(
+            f'/admin/auth/group/{self.club.pk}/change/',
+            {'name': self.club.name, 'users': [self.carol.pk]},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            self.leaderboard(self.club), [('carol@example.com', 700)]
+        )
+
+    def test_unknown_group(self):
+        response = self.client.get('/api/scores/leaderboard/', {'group': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/scores/leaderboard/', {'group': 999})
+        self.assertEqual(response.status_code, 404)
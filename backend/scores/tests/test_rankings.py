@@ -0,0 +1,107 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from scores import rankings, search
+from scores.models import Score
+
+User = get_user_model()
+
+
+class RankingsTestMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'rankings')
+        settings = override_settings(RANKINGS_FILE=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.ada = User.objects.create_user(email='ada@example.com')
+        self.grace = User.objects.create_user(email='grace@example.com')
+        for points in (100, 300, 300, 900):
+            Score.objects.create(user=self.ada, score=points)
+        Score.objects.create(user=self.grace, score=500)
+        Score.objects.create(user=self.grace, score=5000, status='pending')
+
+
+class RankingsTests(RankingsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.reader = rankings.Reader()
+
+    def test_ranks_match_the_database(self):
+        self.assertIsNone(self.reader.rank(300))
+        rankings.write(self.path)
+
+        self.assertEqual(
+            [self.reader.rank(points) for points in (5000, 900, 500, 300, 1)],
+            [1, 1, 2, 3, 6],
+        )
+
+    def test_rewrites_are_picked_up(self):
+        self.assertEqual(rankings.write(self.path), 1)
+        self.assertEqual(self.reader.rank(500), 2)
+        size = os.path.getsize(self.path)
+        Score.objects.bulk_create(
+            Score(user=self.grace, score=1000 + i) for i in range(50)
+        )
+
+        self.assertEqual(rankings.write(self.path), 2)
+
+        self.assertGreater(os.path.getsize(self.path), size)
+        self.assertEqual(self.reader.version(), 2)
+        self.assertEqual(self.reader.rank(500), 52)
+
+    def test_stale_snapshots_are_ignored(self):
+        rankings.write(self.path)
+
+        with override_settings(RANKINGS_MAX_AGE=-1):
+            self.assertIsNone(self.reader.rank(500))
+        self.assertEqual(self.reader.rank(500), 2)
+
+    def test_gives_up_while_the_writer_is_busy(self):
+        rankings.write(self.path)
+        with open(self.path, 'r+b') as file:
+            file.seek(rankings.SEQUENCE_OFFSET)
+            file.write(rankings.SEQUENCE.pack(3))
+
+        self.assertIsNone(self.reader.rank(500))
+
+    def test_one_writer_per_host(self):
+        first, second = rankings.Refresher(), rankings.Refresher()
+        self.assertTrue(first.acquire(self.path))
+        self.addCleanup(os.close, first.lock_fd)
+        self.assertFalse(second.acquire(self.path))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('refresh_rankings', '--once', stdout=out)
+        os.close(rankings.refresher.lock_fd)
+        rankings.refresher.lock_fd = None
+
+        self.assertEqual(out.getvalue(), 'Wrote rankings version 1\n')
+        self.assertEqual(self.reader.rank(900), 1)
+
+
+class SharedRankingsUseTests(RankingsTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        rankings.write(self.path)
+        # Built again, with its histogram, when next used
+        self.addCleanup(setattr, search.index, 'state', None)
+
+    def test_search_index_skips_its_histogram(self):
+        search.index.sync(force=True)
+
+        self.assertFalse(search.index.has_histogram)
+        self.assertEqual(search.rank(500), 2)
+
+        with override_settings(RANKINGS_MAX_AGE=-1):
+            self.assertEqual(search.rank(500), 2)
+        self.assertTrue(search.index.has_histogram)
@@ -0,0 +1,200 @@
+import json
+import os
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from scores import replay
+from scores.models import Replay, Score
+
+User = get_user_model()
+
+# Games recorded by running GameCanvas.js with a scripted player
+with open(os.path.join(os.path.dirname(__file__), 'replays.json')) as file:
+    GAMES = json.load(file)
+
+
+def replay_data(game):
+    return {key: game[key] for key in ('seed', 'ticks', 'inputs')}
+
+
+class SimulatorTests(SimpleTestCase):
+    def test_generator_matches_client(self):
+        # Math.imul-based mulberry32 output from the browser
+        random = replay.mulberry32(0)
+        values = [random() for _ in range(1000)]
+        self.assertEqual(values[-1], 0.3279780091252178)
+        self.assertEqual(replay.mulberry32(2**32 - 1)(), 0.8964226141106337)
+
+    def test_recorded_games_reproduce_their_score(self):
+        for game in GAMES:
+            with self.subTest(score=game['score']):
+                self.assertEqual(
+                    replay.simulate(game['seed'], game['inputs'], 10**6),
+                    (game['score'], game['ticks']),
+                )
+
+    def test_verify_explains_mismatches(self):
+        game = GAMES[0]
+        self.assertIsNone(
+            replay.verify(*replay_data(game).values(), game['score'])
+        )
+        self.assertEqual(
+            replay.verify(game['seed'], game['ticks'], game['inputs'], 10),
+            f'Replay scored {game["score"]} in {game["ticks"]} ticks, '
+            f'not 10 in {game["ticks"]}',
+        )
+
+    def test_rejects_input_the_client_cannot_produce(self):
+        with self.assertRaisesMessage(replay.ReplayError, 'reversed'):
+            replay.simulate(1, [[2, 'left']], 100)
+        with self.assertRaisesMessage(replay.ReplayError, 'after game over'):
+            replay.simulate(1, [[50, 'up']], 100)
+        with self.assertRaisesMessage(replay.ReplayError, 'still running'):
+            replay.simulate(1, [], 5)
+
+
+class SubmitReplayTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='replayer@example.com', password='pass'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def submit(self, game, **replay_fields):
+        return self.client.post(
+            '/api/scores/submit/',
+            {
+                'score': game['score'],
+                'time_played': 60,
+                'replay': {**replay_data(game), **replay_fields},
+            },
+            format='json',
+        )
+
+    def test_score_with_replay_is_pending_and_unranked(self):
+        response = self.submit(GAMES[0])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], 'pending')
+        score = Score.objects.get(user=self.user)
+        self.assertEqual(score.replay.seed, GAMES[0]['seed'])
+        self.assertEqual(
+            self.client.get('/api/scores/leaderboard/').json(), []
+        )
+
+    def test_malformed_replay_is_refused(self):
+        for fields in (
+            {'seed': -1},
+            {'inputs': [[5, 'up'], [3, 'left']]},
+            {'inputs': [[1, 'sideways']]},
+            {'inputs': [[1, ['up']]]},
+            {'inputs': [[10**6, 'up']]},
+        ):
+            with self.subTest(fields=fields):
+                response = self.submit(GAMES[0], **fields)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['error'], 'invalid_replay')
+        self.assertFalse(Score.objects.exists())
+
+    @override_settings(REPLAY_MAX_TICKS=100)
+    def test_long_replay_is_refused(self):
+        self.assertEqual(self.submit(GAMES[0]).status_code, 400)
+
+    @override_settings(REPLAY_REQUIRED=True)
+    def test_high_score_without_replay_is_refused_when_required(self):
+        response = self.client.post(
+            '/api/scores/submit/', {'score': 500, 'time_played': 60}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'replay_required')
+        self.assertFalse(Score.objects.exists())
+        self.assertEqual(self.submit(GAMES[0]).status_code, 201)
+
+    def test_rejected_score_does_not_block_new_high_scores(self):
+        Score.objects.create(
+            user=self.user, score=5000, status=Score.Status.REJECTED
+        )
+        self.assertEqual(self.submit(GAMES[0]).status_code, 201)
+
+    def test_pending_score_does_not_block_lower_scores(self):
+        Score.objects.create(
+            user=self.user, score=5000, status=Score.Status.PENDING
+        )
+        self.assertEqual(self.submit(GAMES[0]).status_code, 201)
+        self.assertEqual(Score.objects.filter(user=self.user).count(), 2)
+
+
+class VerifyScoresCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='verifier@example.com', password='pass'
+        )
+
+    def pending(self, game, score=None):
+        score = Score.objects.create(
+            user=self.user,
+            score=game['score'] if score is None else score,
+            status=Score.Status.PENDING,
+        )
+        Replay.objects.create(score=score, **replay_data(game))
+        return score
+
+    def verify_scores(self, **options):
+        out = StringIO()
+        call_command('verify_scores', once=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_marks_scores_verified_or_rejected(self):
+        honest = [self.pending(game) for game in GAMES]
+        inflated = self.pending(GAMES[1], score=GAMES[1]['score'] + 100)
+
+        output = self.verify_scores(workers=0, batch_size=2)
+
+        self.assertIn('Verified 3 scores (1 rejected)', output)
+        for score in honest:
+            score.refresh_from_db()
+            self.assertEqual(score.status, Score.Status.VERIFIED)
+            self.assertIsNotNone(score.replay.verified_at)
+        inflated.refresh_from_db()
+        self.assertEqual(inflated.status, Score.Status.REJECTED)
+        self.assertIn('Replay scored', inflated.replay.error)
+        self.assertEqual(
+            [
+                entry['score']
+                for entry in self.client.get('/api/scores/leaderboard/').json()
+            ],
+            sorted((game['score'] for game in GAMES), reverse=True),
+        )
+
+    def test_pending_scores_without_a_replay_are_rejected(self):
+        orphan = Score.objects.create(
+            user=self.user, score=10**6, status=Score.Status.PENDING
+        )
+        honest = self.pending(GAMES[0])
+
+        output = self.verify_scores(workers=0)
+
+        self.assertIn('Verified 1 scores (1 rejected)', output)
+        orphan.refresh_from_db()
+        self.assertEqual(orphan.status, Score.Status.REJECTED)
+        honest.refresh_from_db()
+        self.assertEqual(honest.status, Score.Status.VERIFIED)
+
+    def test_replays_on_a_process_pool(self):
+        scores = [self.pending(game) for game in GAMES]
+
+        self.verify_scores(workers=2)
+
+        self.assertEqual(
+            Score.objects.filter(
+                pk__in=[score.pk for score in scores],
+                status=Score.Status.VERIFIED,
+            ).count(),
+            len(scores),
+        )
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from main.ratelimit import limiter
+from scores import search
+from scores.models import Score
+
+User = get_user_model()
+
+
+# Ranks come from the database, not this host's shared rankings
+@override_settings(RANKINGS_FILE='')
+class PlayerSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.ada = User.objects.create_user(
+            email='ada@example.com', first_name='Ada', last_name='Lovelace'
+        )
+        self.alan = User.objects.create_user(
+            email='turing@example.com', first_name='Alan', last_name='Turing'
+        )
+        self.grace = User.objects.create_user(
+            email='grace@example.com', first_name='Grace', last_name='Hopper'
+        )
+        Score.objects.create(user=self.ada, score=100)
+        Score.objects.create(user=self.ada, score=500)
+        Score.objects.create(user=self.alan, score=300)
+        Score.objects.create(user=self.grace, score=900)
+        Score.objects.create(user=self.grace, score=5000, status='pending')
+        search.index.sync(force=True)
+
+    def search(self, query):
+        response = self.client.get('/api/scores/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [
+            (hit['name'], hit['score'], hit['rank']) for hit in response.json()
+        ]
+
+    def test_matches_name_prefixes(self):
+        self.assertEqual(self.search('ad'), [('Ada Lovelace', 500, 2)])
+        self.assertEqual(self.search('lovel'), [('Ada Lovelace', 500, 2)])
+        self.assertEqual(self.search('tur'), [('Alan Turing', 300, 3)])
+        self.assertEqual(self.search('grace h'), [('Grace Hopper', 900, 1)])
+        self.assertEqual(self.search('hopper'), self.search('  HOP '))
+        self.assertEqual(self.search('zz'), [])
+
+    def test_emails_are_neither_matched_nor_shown_anonymously(self):
+        self.assertEqual(self.search('turing@'), [])
+        response = self.client.get('/api/scores/search/', {'q': 'ada'})
+        self.assertNotIn('username', response.json()[0])
+
+    def test_returns_the_best_score_with_its_rank(self):
+        self.client.force_authenticate(self.grace)
+        response = self.client.get('/api/scores/search/', {'q': 'ada'})
+        best = Score.objects.get(user=self.ada, score=500)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    'id': best.pk,
+                    'score': 500,
+                    'name': 'Ada Lovelace',
+                    'rank': 2,
+                    'username': 'ada@example.com',
+                }
+            ],
+        )
+
+    def test_only_players_on_the_board(self):
+        User.objects.create_user(email='adam@example.com', first_name='Adam')
+        Score.objects.filter(user=self.alan).update(status='rejected')
+        search.index.sync(force=True)
+        self.assertEqual(self.search('ad'), [('Ada Lovelace', 500, 2)])
+        self.assertEqual(self.search('al'), [])
+
+    def test_database_match_keeps_the_best_players_within_the_limit(self):
+        for n in range(3):
+            user = User.objects.create_user(
+                email=f'a{n}@example.com', first_name=f'A{n}'
+            )
+            Score.objects.create(user=user, score=1000 + n)
+        with mock.patch('scores.search.connection') as connection:
+            connection.vendor = 'postgresql'
+            hits = search.search('a', limit=2)
+        self.assertEqual([hit['name'] for hit in hits], ['A2', 'A1'])
+
+    @override_settings(PLAYER_SEARCH_CANDIDATES=2)
+    def test_ranks_a_bounded_number_of_matches(self):
+        for n in range(3):
+            user = User.objects.create_user(
+                email=f'a{n}@example.com', first_name=f'A{n}'
+            )
+            Score.objects.create(user=user, score=1000 + n)
+        search.index.sync(force=True)
+
+        # The first two names alphabetically, best first
+        self.assertEqual(
+            [hit['name'] for hit in search.search('a', limit=10)],
+            ['A1', 'A0'],
+        )
+        with mock.patch('scores.search.connection') as connection:
+            connection.vendor = 'postgresql'
+            self.assertEqual(len(search.search('a', limit=10)), 2)
+
+    def test_ranks_count_scores_above(self):
+        index = search.index
+        self.assertEqual(
+            [index.rank(points) for points in (5000, 900, 500, 400, 0)],
+            [1, 1, 2, 3, 5],
+        )
+
+    @override_settings(PLAYER_SEARCH_REFRESH_INTERVAL=0)
+    def test_stale_index_is_rebuilt_in_the_background(self):
+        with mock.patch('scores.search.threading.Thread') as thread:
+            self.search('ada')
+            self.search('ada')
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+
+    @override_settings(RATE_LIMITS={'search': {'ip': '1/min'}})
+    def test_limited_by_ip(self):
+        limiter.clear()
+        self.addCleanup(limiter.clear)
+        self.search('ada')
+        response = self.client.get('/api/scores/search/', {'q': 'ada'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_short_queries_are_refused(self):
+        response = self.client.get('/api/scores/search/', {'q': ' a '})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'query_too_short')
@@ -0,0 +1,153 @@
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from scores.models import Score
+from scores.snapshots import Publisher, render, render_stats
+
+User = get_user_model()
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage = override_settings(
+            STORAGES={
+                'leaderboards': {
+                    'BACKEND': 'main.storages.LocalSnapshotStorage',
+                    'OPTIONS': {'location': directory.name},
+                }
+            }
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.storage = storages['leaderboards']
+        self.user = User.objects.create_user(email='snap@example.com')
+
+    def read(self, name):
+        with self.storage.open(name) as file:
+            return json.load(file)
+
+    def publish(self, publisher=None):
+        publisher = publisher or Publisher()
+        with mock.patch.object(
+            self.storage, 'save', wraps=self.storage.save
+        ) as save:
+            changed = publisher.publish(render())
+        return changed, [call.args[0] for call in save.call_args_list]
+
+    def test_publishes_versioned_files_and_latest_pointers(self):
+        Score.objects.create(user=self.user, score=300)
+        Score.objects.create(user=self.user, score=999, status='pending')
+
+        changed, saved = self.publish()
+
+        self.assertEqual(changed, ['top', 'today', 'week'])
+        latest = self.read('top/latest.json')
+        self.assertEqual(
+            [
+                (entry['username'], entry['score'])
+                for entry in latest['scores']
+            ],
+            [('snap@example.com', 300)],
+        )
+        self.assertIn(f'top/{latest["version"]}.json', saved)
+        self.assertEqual(self.read(f'top/{latest["version"]}.json'), latest)
+
+    def test_unchanged_boards_are_not_uploaded_again(self):
+        Score.objects.create(user=self.user, score=300)
+        publisher = Publisher()
+        self.publish(publisher)
+
+        self.assertEqual(self.publish(publisher), ([], []))
+        # A restarted publisher reads what was published last
+        self.assertEqual(self.publish(Publisher()), ([], []))
+
+        score = Score.objects.create(user=self.user, score=400)
+        changed, saved = self.publish(publisher)
+        self.assertEqual(changed, ['top', 'today', 'week'])
+        self.assertEqual(len(saved), 6)
+
+        # Back to a version that was uploaded before, which is uploaded
+        # again so that pruning counts its age from now
+        score.delete()
+        changed, saved = self.publish(publisher)
+        self.assertEqual(len(saved), 6)
+        self.assertEqual(
+            self.read('top/latest.json')['scores'][0]['score'], 300
+        )
+
+    def test_replaced_versions_are_pruned_after_the_retention(self):
+        versions = []
+        for points in (300, 400, 500):
+            Score.objects.create(user=self.user, score=points)
+            self.publish()
+            versions.append(self.read('top/latest.json')['version'])
+            if points == 400:
+                # The first two versions were written long ago
+                for version in versions:
+                    path = self.storage.path(f'top/{version}.json')
+                    os.utime(path, (time.time() - 1000,) * 2)
+
+        _, files = self.storage.listdir('top')
+        # The second was only replaced now; the first long ago
+        self.assertCountEqual(
+            files,
+            ['latest.json', f'{versions[1]}.json', f'{versions[2]}.json'],
+        )
+
+    def test_windowed_boards(self):
+        old = Score.objects.create(user=self.user, score=900)
+        Score.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=8)
+        )
+        Score.objects.create(user=self.user, score=100)
+
+        boards = render()
+
+        self.assertEqual(
+            [entry['score'] for entry in boards['top']['scores']], [900, 100]
+        )
+        self.assertEqual(
+            [entry['score'] for entry in boards['today']['scores']], [100]
+        )
+        self.assertEqual(
+            [entry['score'] for entry in boards['week']['scores']], [100]
+        )
+        self.assertEqual(boards['week']['since'].weekday(), 0)
+
+    def test_stats(self):
+        other = User.objects.create_user(email='other@example.com')
+        Score.objects.create(user=self.user, score=100)
+        Score.objects.create(user=self.user, score=200)
+        Score.objects.create(user=other, score=600)
+        Score.objects.create(user=other, score=50, status='rejected')
+
+        self.assertEqual(
+            render_stats(),
+            {
+                'scores': 3,
+                'players': 2,
+                'high_score': 600,
+                'average_score': 300.0,
+            },
+        )
+
+    def test_command_publishes_once(self):
+        Score.objects.create(user=self.user, score=300)
+        out = StringIO()
+        call_command('publish_leaderboards', once=True, stdout=out)
+
+        self.assertIn('Published top, today, week, stats', out.getvalue())
+        self.assertEqual(self.read('stats/latest.json')['players'], 1)
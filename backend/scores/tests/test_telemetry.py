@@ -0,0 +1,227 @@
+import io
+import os
+import tempfile
+import uuid
+from concurrent.futures import wait
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from main.ratelimit import limiter
+from scores import telemetry
+
+User = get_user_model()
+
+GAME = uuid.UUID('12345678-1234-5678-1234-567812345678')
+EVENTS = [
+    (0, telemetry.MOVE, 13, 12, 3),
+    (68, telemetry.MOVE, 14, 12, 3),
+    (136, telemetry.FOOD, 15, 12, 4),
+    (204, telemetry.GAME_OVER, -1, 12, 4),
+]
+
+
+class TelemetryFormatTests(SimpleTestCase):
+    def test_parse_splits_frames_into_columns(self):
+        other = uuid.uuid4()
+        body = telemetry.encode(GAME, EVENTS) + telemetry.encode(
+            other, EVENTS[:1]
+        )
+
+        frames = list(telemetry.parse(body))
+
+        self.assertEqual(
+            [(g, n) for g, n, _ in frames], [(GAME, 4), (other, 1)]
+        )
+        _, _, columns = frames[0]
+        header, decoded = telemetry.read_segment(
+            io.BytesIO(telemetry.segment_bytes(4, columns, []))
+        )
+        self.assertEqual(header['events'], 4)
+        self.assertEqual(list(decoded['t']), [0, 68, 136, 204])
+        self.assertEqual(list(decoded['kind']), [0, 0, 1, 4])
+        self.assertEqual(list(decoded['x']), [13, 14, 15, -1])
+        self.assertEqual(list(decoded['y']), [12, 12, 12, 12])
+        self.assertEqual(list(decoded['length']), [3, 3, 4, 4])
+
+    def test_rejects_malformed_batches(self):
+        body = telemetry.encode(GAME, EVENTS)
+        cases = {
+            'truncated length': body[:2],
+            'truncated frame': body[:-1],
+            'count mismatch': body[:4]
+            + GAME.bytes
+            + (5).to_bytes(4, 'little')
+            + body[24:],
+        }
+        for label, case in cases.items():
+            with self.subTest(label), self.assertRaises(
+                telemetry.TelemetryError
+            ):
+                list(telemetry.parse(case))
+
+
+class TelemetryViewTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.location = tmp.name
+        storage = override_settings(
+            STORAGES={
+                'telemetry': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': tmp.name},
+                },
+            }
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        telemetry.buffer.reset()
+        self.addCleanup(telemetry.buffer.reset)
+        self.user = User.objects.create_user(
+            email='player@example.com', password='password123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, body):
+        return self.client.post(
+            '/api/scores/telemetry/',
+            body,
+            content_type='application/octet-stream',
+        )
+
+    def segments(self):
+        return [
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.location)
+            for name in names
+        ]
+
+    def test_events_are_buffered_and_flushed_to_a_segment(self):
+        response = self.post(telemetry.encode(GAME, EVENTS))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['accepted'], 4)
+
+        with mock.patch.object(telemetry, 'pyarrow', None):
+            name = telemetry.buffer.flush()
+        self.assertTrue(name.endswith('.cts'))
+        with storages['telemetry'].open(name) as file:
+            header, columns = telemetry.read_segment(file)
+        self.assertEqual(header['games'], [[GAME.hex, self.user.pk, 0, 4]])
+        self.assertEqual(list(columns['x']), [13, 14, 15, -1])
+
+    @skipUnless(telemetry.pyarrow, 'pyarrow is not installed')
+    def test_segments_are_parquet_with_pyarrow(self):
+        other = uuid.uuid4()
+        self.post(
+            telemetry.encode(GAME, EVENTS)
+            + telemetry.encode(other, EVENTS[:1])
+        )
+
+        name = telemetry.buffer.flush()
+
+        self.assertTrue(name.endswith('.parquet'))
+        self.assertEqual(self.read_parquet(name), self.expected_rows(other))
+
+    @skipUnless(telemetry.pyarrow, 'pyarrow is not installed')
+    def test_converts_cts_segments_to_parquet(self):
+        other = uuid.uuid4()
+        self.post(
+            telemetry.encode(GAME, EVENTS)
+            + telemetry.encode(other, EVENTS[:1])
+        )
+        with mock.patch.object(telemetry, 'pyarrow', None):
+            telemetry.buffer.flush()
+
+        out = io.StringIO()
+        call_command('convert_telemetry', stdout=out)
+
+        self.assertEqual(out.getvalue().strip(), 'Converted 1 segments')
+        [path] = self.segments()
+        self.assertTrue(path.endswith('.parquet'))
+        name = os.path.relpath(path, self.location)
+        self.assertEqual(self.read_parquet(name), self.expected_rows(other))
+
+    def read_parquet(self, name):
+        with storages['telemetry'].open(name) as file:
+            return telemetry.pyarrow.parquet.read_table(file).to_pylist()
+
+    def expected_rows(self, other):
+        columns = ['game', 'user', 't', 'kind', 'x', 'y', 'length']
+        events = [(GAME, event) for event in EVENTS] + [(other, EVENTS[0])]
+        return [
+            dict(zip(columns, [game.hex, self.user.pk, *event]))
+            for game, event in events
+        ]
+
+    @override_settings(TELEMETRY_FLUSH_EVENTS=6)
+    def test_flushes_in_the_background_once_full(self):
+        self.post(telemetry.encode(GAME, EVENTS))
+        self.assertEqual(self.segments(), [])
+
+        self.post(telemetry.encode(GAME, EVENTS))
+        telemetry.buffer._pending.result()
+
+        self.assertEqual(len(self.segments()), 1)
+        self.assertEqual(telemetry.buffer.count, 0)
+
+    def test_flushes_old_events_without_new_requests(self):
+        self.post(telemetry.encode(GAME, EVENTS))
+        self.assertTrue(telemetry.buffer._timer.is_alive())
+
+        self.assertGreater(telemetry.buffer.flush_if_due(), 0)
+        self.assertEqual(self.segments(), [])
+
+        telemetry.buffer.started -= settings.TELEMETRY_FLUSH_INTERVAL
+        telemetry.buffer.flush_if_due()
+        telemetry.buffer._pending.result()
+
+        self.assertEqual(len(self.segments()), 1)
+        self.assertEqual(telemetry.buffer.count, 0)
+
+    @override_settings(TELEMETRY_FLUSH_EVENTS=4)
+    def test_a_failed_write_does_not_fail_later_requests(self):
+        with mock.patch.object(
+            telemetry, 'write_segment', side_effect=OSError('disk full')
+        ):
+            self.post(telemetry.encode(GAME, EVENTS))
+            wait([telemetry.buffer._pending])
+
+        with self.assertLogs('scores.telemetry', 'ERROR'):
+            response = self.post(telemetry.encode(GAME, EVENTS))
+        telemetry.buffer._pending.result()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(self.segments()), 1)
+
+    def test_rejects_malformed_and_oversized_batches(self):
+        self.assertEqual(self.post(b'\x01').status_code, 400)
+        with override_settings(TELEMETRY_MAX_BATCH_BYTES=16):
+            response = self.post(telemetry.encode(GAME, EVENTS))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(telemetry.buffer.count, 0)
+
+    @override_settings(RATE_LIMITS={'telemetry': {'user': '1/min'}})
+    def test_limited_by_user(self):
+        limiter.clear()
+        self.addCleanup(limiter.clear)
+        self.post(telemetry.encode(GAME, EVENTS))
+
+        response = self.post(telemetry.encode(GAME, EVENTS))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(telemetry.buffer.count, 4)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.post(telemetry.encode(GAME, EVENTS))
+
+        self.assertEqual(response.status_code, 401)
@@ -1,8 +1,17 @@
 from django.urls import path
 
-from .views import SubmitScoreView, LeaderboardView
+from .views import (
+    SubmitScoreView,
+    LeaderboardView,
+    PlayerSearchView,
+    TelemetryView,
+    DashboardView,
+)
 
 urlpatterns = [
     path('submit/', SubmitScoreView.as_view(), name='submit-score'),
     path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('search/', PlayerSearchView.as_view(), name='player-search'),
+    path('telemetry/', TelemetryView.as_view(), name='telemetry'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
 ]
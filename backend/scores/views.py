@@ -1,31 +1,44 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from .models import Score
-from .serializers import ScoreSerializer
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.db import transaction
+from main.idempotency import idempotent
+from . import caches, dashboard, search, telemetry
+from .models import Replay, Score
+from .parsers import TelemetryParser
+from .serializers import ReplaySerializer
 import logging
 
-# Set up logger
+# Set up loggers; leaderboard hits are sampled (see LOGGING in settings)
 logger = logging.getLogger(__name__)
+leaderboard_logger = logging.getLogger(__name__ + '.leaderboard')
 
 class SubmitScoreView(APIView):
     """
     API endpoint to submit a new high score.
     POST /api/scores/submit/
+
+    Retries sent with the same `Idempotency-Key` header get the original
+    response back instead of submitting the score again. A score sent with
+    a `replay` (seed, ticks and inputs) is saved as pending and only ranked
+    once `verify_scores` has replayed it. Only ranked scores count as the
+    player's high score. With `REPLAY_REQUIRED`, a new high score without
+    one is refused.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'submit'
     
+    @idempotent
     def post(self, request):
         """Process high score submission"""
-        user_email = request.user.email
-        
-        # Log the request
-        logger.info(f"High score submission from {user_email}")
+        user_id = request.user.pk
         
         # Validate score data
         score = request.data.get('score')
         if not score:
-            logger.warning(f"Score submission missing score data: {request.data}")
+            logger.warning("Score submission without a score", extra={'user_id': user_id})
             return Response({
                 'success': False,
                 'error': 'missing_score',
@@ -34,16 +47,36 @@ class SubmitScoreView(APIView):
         
         # Get time_played or default to 0
         time_played = request.data.get('time_played', 0)
+
+        # Validate the optional replay
+        replay = None
+        if request.data.get('replay') is not None:
+            replay = ReplaySerializer(data=request.data['replay'])
+            if not replay.is_valid():
+                logger.warning("Invalid replay", extra={'user_id': user_id, 'errors': replay.errors})
+                return Response({
+                    'success': False,
+                    'error': 'invalid_replay',
+                    'message': 'Replay is malformed',
+                    'details': replay.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
             # Convert score to integer
             score_value = int(score)
             
-            # Check if user already has a higher score
-            existing_high_score = Score.objects.filter(user=request.user).order_by('-score').first()
+            # Check if user already has a higher ranked score; a pending
+            # one may still be rejected, so lower scores are kept meanwhile
+            existing_high_score = Score.objects.ranked().filter(
+                user=request.user
+            ).order_by('-score').first()
             
             if existing_high_score and existing_high_score.score >= score_value:
-                logger.info(f"User {user_email} already has a higher score ({existing_high_score.score}), not saving new score ({score_value})")
+                logger.info("Existing high score retained", extra={
+                    'user_id': user_id,
+                    'score': score_value,
+                    'high_score': existing_high_score.score
+                })
                 return Response({
                     'success': True,
                     'message': 'Existing high score retained',
@@ -51,29 +84,48 @@ class SubmitScoreView(APIView):
                     'score': existing_high_score.score
                 }, status=status.HTTP_200_OK)
             
-            # Create new high score record
-            score_obj = Score.objects.create(
-                user=request.user,
-                score=score_value,
-                time_played=time_played
-            )
-            logger.info(f"New high score created for {user_email}: {score_value}")
+            # Unverified scores are ranked, so only trusted clients may
+            # skip the replay
+            if replay is None and settings.REPLAY_REQUIRED:
+                logger.warning("High score without a replay", extra={'user_id': user_id, 'score': score_value})
+                return Response({
+                    'success': False,
+                    'error': 'replay_required',
+                    'message': 'New high scores must include a replay'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Create new high score record, pending if it has a replay
+            with transaction.atomic():
+                score_obj = Score.objects.create(
+                    user=request.user,
+                    score=score_value,
+                    time_played=time_played,
+                    status=Score.Status.PENDING if replay else Score.Status.UNVERIFIED
+                )
+                if replay:
+                    Replay.objects.create(score=score_obj, **replay.validated_data)
+            logger.info("New high score", extra={
+                'user_id': user_id,
+                'score': score_value,
+                'status': score_obj.status
+            })
             
             return Response({
                 'success': True,
                 'message': 'High score saved successfully',
                 'id': score_obj.id,
-                'score': score_obj.score
+                'score': score_obj.score,
+                'status': score_obj.status
             }, status=status.HTTP_201_CREATED)
         except ValueError:
-            logger.warning(f"Invalid score value: {score}")
+            logger.warning("Invalid score value", extra={'user_id': user_id, 'score': score})
             return Response({
                 'success': False,
                 'error': 'invalid_score',
                 'message': 'Score must be a valid number'
             }, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            logger.error(f"Error processing score submission: {str(e)}")
+        except Exception:
+            logger.exception("Error processing score submission")
             return Response({
                 'success': False,
                 'error': 'server_error',
@@ -84,28 +136,123 @@ class LeaderboardView(APIView):
     """
     API endpoint to retrieve the top scores.
     GET /api/scores/leaderboard/
+
+    With `?group=<id>`, ranks the best score of each member of that group
+    (see scores/leaderboards.py). Boards are cached in each process until a
+    score changes (see scores/caches.py).
     """
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'leaderboard'
     
     def get(self, request):
         """Get leaderboard data"""
+        group = request.query_params.get('group')
+        if group is not None:
+            if not group.isdigit():
+                return Response({
+                    'success': False,
+                    'error': 'invalid_group',
+                    'message': 'Group must be a group id'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if not Group.objects.filter(pk=group).exists():
+                return Response({
+                    'success': False,
+                    'error': 'group_not_found',
+                    'message': 'Group not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+
         try:
-            # Log the request
-            client_ip = request.META.get('REMOTE_ADDR', 'unknown')
-            logger.info(f"Leaderboard request from {client_ip}")
-            
             # Get top 10 scores
-            scores = Score.objects.all().order_by('-score')[:10]
-            serializer = ScoreSerializer(scores, many=True)
+            data = caches.leaderboard(None if group is None else int(group))
             
-            # Log success
-            logger.info(f"Returning {len(scores)} scores for leaderboard")
+            # Log the request (sampled)
+            leaderboard_logger.info("Leaderboard request", extra={
+                'client_ip': request.META.get('REMOTE_ADDR'),
+                'group': group,
+                'scores': len(data)
+            })
             
-            return Response(serializer.data)
+            return Response(data)
         except Exception as e:
-            logger.error(f"Error fetching leaderboard: {str(e)}")
+            logger.exception("Error fetching leaderboard")
             return Response({
                 'success': False,
                 'error': 'server_error',
                 'message': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
+
+
+class PlayerSearchView(APIView):
+    """
+    API endpoint to find players on the leaderboard.
+    GET /api/scores/search/?q=<prefix>
+
+    Matches the start of a player's first name, last name or full name,
+    and returns each hit's best score and rank (see scores/search.py).
+    Emails are only included for signed-in callers.
+    """
+    permission_classes = [permissions.AllowAny]
+    throttle_scope = 'search'
+
+    def get(self, request):
+        """Search players by name prefix"""
+        query = request.query_params.get('q', '').strip()
+        if len(query) < settings.PLAYER_SEARCH_MIN_LENGTH:
+            return Response({
+                'success': False,
+                'error': 'query_too_short',
+                'message': f'Search for at least {settings.PLAYER_SEARCH_MIN_LENGTH} characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(search.search(
+            query,
+            settings.PLAYER_SEARCH_RESULTS,
+            emails=request.user.is_authenticated,
+        ))
+
+
+class TelemetryView(APIView):
+    """
+    API endpoint to ingest gameplay telemetry.
+    POST /api/scores/telemetry/
+
+    The body is a binary batch of events (see scores/telemetry.py). Events
+    are buffered and written to columnar files, not the database.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [TelemetryParser]
+    throttle_scope = 'telemetry'
+
+    def post(self, request):
+        """Buffer a batch of telemetry events"""
+        try:
+            frames = list(telemetry.parse(request.data))
+        except telemetry.TelemetryError as e:
+            return Response({
+                'success': False,
+                'error': 'invalid_telemetry',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        accepted = telemetry.buffer.append(request.user.pk, frames)
+        return Response({
+            'success': True,
+            'accepted': accepted
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class DashboardView(APIView):
+    """
+    API endpoint with everything the dashboard shows about the player.
+    GET /api/scores/dashboard/
+
+    Returns the player's profile, best ranked score and its rank, latest
+    scores and the global top scores in one response (see
+    scores/dashboard.py).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'dashboard'
+
+    def get(self, request):
+        """Get the player's dashboard"""
+        return Response(dashboard.dashboard(request.user))
@@ -0,0 +1,14 @@
+from main.invalidation import bus
+
+from . import caches
+
+# Seconds to wait for the invalidation listener to subscribe
+LISTENER_TIMEOUT = 5
+
+
+def load_leaderboard():
+    '''Fill this process's cache of the global leaderboard.'''
+    # The listener evicts everything cached before it subscribes
+    if bus.listener is not None:
+        bus.listening.wait(LISTENER_TIMEOUT)
+    caches.leaderboard()
@@ -1,13 +1,18 @@
+from django.apps import apps
 from django.contrib import admin
 from django.contrib.auth.admin import (
     UserAdmin as DefaultUserAdmin,
     GroupAdmin as DefaultGroupAdmin,
 )
+from django.contrib.auth import get_permission_codename
 from django.contrib.auth.models import Group
+from django.utils.html import format_html
+from django.utils.text import capfirst
 from django.utils.translation import gettext_lazy as _
 from social_django.models import Association, Nonce, UserSocialAuth
 
-from main.admin import admin_site
+from main.admin import admin_site, PerformanceAdminMixin
+from main.purge import Purge, purge_users
 from .forms import GroupAdminForm
 from .models import User
 
@@ -17,7 +22,7 @@ admin_site.register(UserSocialAuth, site=admin_site)
 
 
 @admin.register(User, site=admin_site)
-class UserAdmin(DefaultUserAdmin):
+class UserAdmin(PerformanceAdminMixin, DefaultUserAdmin):
     '''
     https://github.com/django/django/blob/master/django/contrib/auth/admin.py#L44
     '''
@@ -55,9 +60,39 @@ class UserAdmin(DefaultUserAdmin):
         "is_active",
         "is_staff",
     )
-    search_fields = ("email" "first_name", "last_name")
+    # Prefix searches are backed by the UPPER(...) text_pattern_ops indexes
+    search_fields = ("^email", "^first_name", "^last_name")
     ordering = ("email",)
 
+    def get_deleted_objects(self, objs, request):
+        '''
+        Row counts for the confirmation page, from the same queries the
+        purge makes, instead of collecting every related object.
+        '''
+        users = self.model.objects.filter(pk__in=[obj.pk for obj in objs])
+        counts = Purge().count(users)
+        perms_needed = set()
+        model_count = {}
+        for label, count in counts.items():
+            model = apps.get_model(label)
+            opts = model._meta
+            if not count or opts.auto_created:
+                continue
+            model_count[opts.verbose_name_plural] = count
+            permission = get_permission_codename('delete', opts)
+            if self.admin_site.is_registered(model) and not (
+                request.user.has_perm(f'{opts.app_label}.{permission}')
+            ):
+                perms_needed.add(opts.verbose_name)
+        deleted_objects = [
+            format_html('{}: {}', capfirst(self.opts.verbose_name), obj)
+            for obj in objs
+        ]
+        return deleted_objects, model_count, perms_needed, []
+
+    def delete_queryset(self, request, queryset):
+        purge_users(queryset, duty_cycle=1)
+
 
 admin.site.unregister(Group)
 
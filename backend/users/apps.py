@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from main import warmup
+        from . import authentication  # noqa: F401 - connects its receivers
+        from .revocation import revocations
+
+        warmup.register(
+            'token revocations', lambda: revocations.sync(force=True)
+        )
@@ -1,7 +1,23 @@
+import copy
+
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from rest_framework_simplejwt.authentication import (
     JWTAuthentication as DefaultJWTAuthentication,
 )
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from main.invalidation import LocalCache, invalidate, user_tag
+
+from .revocation import is_revoked
+
+User = get_user_model()
+
+# Authenticated users by id; see main/invalidation.py
+users = LocalCache('users')
 
 
 class JWTAuthentication(DefaultJWTAuthentication):
@@ -19,6 +35,36 @@ class JWTAuthentication(DefaultJWTAuthentication):
                 return None
 
             validated_token = self.get_validated_token(raw_token)
+            if is_revoked(validated_token['jti']):
+                raise InvalidToken()
             return self.get_user(validated_token), validated_token
         except:
             return None
+
+    def get_user(self, validated_token):
+        '''
+        The token's user, which passed the active check when it was
+        cached; changing the user evicts it.
+        '''
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        def fill():
+            user = super(JWTAuthentication, self).get_user(validated_token)
+            return user, [user_tag(user.pk)]
+
+        # A copy, so a request changing its user leaves the cache alone
+        return copy.copy(users.get(user_id, fill))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields, **kwargs):
+    # Every login saves `last_login`, which nothing cached shows
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        invalidate(user_tag(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate(user_tag(instance.pk))
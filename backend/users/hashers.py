@@ -0,0 +1,128 @@
+'''
+Password hashing on a dedicated, size-limited worker pool.
+
+PBKDF2 (and the other Django hashers) spend hundreds of milliseconds of CPU
+per call inside C code that releases the GIL, so a small thread pool is
+enough to cap how many cores sign-in traffic can occupy. Work beyond the
+pool's queue is rejected with a 503 instead of piling up behind the
+leaderboard and score endpoints.
+
+https://github.com/django/django/blob/main/django/contrib/auth/hashers.py
+'''
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many sign-in requests, please try again shortly.')
+    default_code = 'password_hashing_busy'
+    # Picked up by DRF's exception handler as the `Retry-After` header
+    wait = 1
+
+
+class BoundedExecutor:
+    '''
+    Thread pool that accepts at most `max_workers + queue_size` pending
+    calls and raises `PasswordHashingBusy` rather than queueing more.
+    '''
+
+    def __init__(self, max_workers, queue_size):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='password-hashing'
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Created lazily so each forked worker process gets its own threads
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BoundedExecutor(
+                    settings.PASSWORD_HASHING_WORKERS,
+                    settings.PASSWORD_HASHING_QUEUE_SIZE,
+                )
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(*, setting, **kwargs):
+    global _pool
+    if setting in ('PASSWORD_HASHING_WORKERS', 'PASSWORD_HASHING_QUEUE_SIZE'):
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
+
+
+def make_password(password, salt=None, hasher='default'):
+    if password is None:
+        # Unusable passwords are a random string, not a hash
+        return hashers.make_password(None)
+    future = get_pool().submit(hashers.make_password, password, salt, hasher)
+    return future.result()
+
+
+async def amake_password(password, salt=None, hasher='default'):
+    if password is None:
+        return hashers.make_password(None)
+    return await asyncio.wrap_future(
+        get_pool().submit(hashers.make_password, password, salt, hasher)
+    )
+
+
+def check_password(password, encoded, setter=None, preferred='default'):
+    '''
+    Pooled `django.contrib.auth.hashers.check_password()`. The setter, which
+    rehashes outdated encodings, runs on the calling thread so it can use
+    that thread's database connection.
+    '''
+    future = get_pool().submit(
+        hashers.verify_password, password, encoded, preferred
+    )
+    is_correct, must_update = future.result()
+    if setter and is_correct and must_update:
+        setter(password)
+    return is_correct
+
+
+async def acheck_password(password, encoded, setter=None, preferred='default'):
+    '''See check_password().'''
+    is_correct, must_update = await asyncio.wrap_future(
+        get_pool().submit(
+            hashers.verify_password, password, encoded, preferred
+        )
+    )
+    if setter and is_correct and must_update:
+        await setter(password)
+    return is_correct
@@ -0,0 +1,173 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+User = get_user_model()
+
+
+def read_rows(path, file_format):
+    '''Yield one dict per input record without loading the whole file.'''
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def hash_passwords(passwords):
+    # Runs in a worker process; an empty password becomes unusable
+    return [make_password(password or None) for password in passwords]
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk create users from a CSV or JSON Lines file with email, '
+        'password, first_name and last_name fields.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'jsonl'),
+            help='Input format (default: guessed from the file extension).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Users hashed and inserted per batch.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Hashing processes; 0 hashes in this process.',
+        )
+        parser.add_argument(
+            '--update-existing',
+            action='store_true',
+            help='Overwrite users whose email already exists.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        batches = batched(
+            self.clean_rows(read_rows(path, file_format)),
+            options['batch_size'],
+        )
+
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.start = time.perf_counter()
+        update_existing = options['update_existing']
+
+        if options['workers'] == 0:
+            for batch in batches:
+                hashes = hash_passwords([row['password'] for row in batch])
+                self.insert(batch, hashes, update_existing)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=django.setup
+            ) as executor:
+                for batch, hashes in self.hash_batches(
+                    executor, batches, options['workers']
+                ):
+                    self.insert(batch, hashes, update_existing)
+
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {self.inserted} users, updated {self.updated}, '
+                f'skipped {self.skipped} in {elapsed:.1f}s'
+            )
+        )
+
+    def clean_rows(self, rows):
+        for row in rows:
+            email = (row.get('email') or '').strip()
+            if not email:
+                self.skipped += 1
+                continue
+            yield {
+                'email': User.objects.normalize_email(email),
+                'password': row.get('password') or '',
+                'first_name': row.get('first_name') or '',
+                'last_name': row.get('last_name') or '',
+            }
+
+    def hash_batches(self, executor, batches, workers):
+        '''
+        Yield `(batch, hashes)` in input order, keeping at most two batches
+        per worker in flight so memory stays flat for any input size.
+        '''
+        pending = deque()
+        for batch in batches:
+            passwords = [row['password'] for row in batch]
+            pending.append((batch, executor.submit(hash_passwords, passwords)))
+            if len(pending) >= workers * 2:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        for batch, future in pending:
+            yield batch, future.result()
+
+    def insert(self, batch, hashes, update_existing):
+        # The last row wins when an email repeats inside one batch, which
+        # PostgreSQL requires for ON CONFLICT DO UPDATE
+        users = {
+            row['email']: User(
+                email=row['email'],
+                password=encoded,
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+            )
+            for row, encoded in zip(batch, hashes)
+        }
+        # bulk_create() doesn't say which rows hit a conflict
+        existing = User.objects.filter(email__in=list(users)).count()
+        self.inserted += len(users) - existing
+        # Repeated emails
+        self.skipped += len(batch) - len(users)
+        if update_existing:
+            User.objects.bulk_create(
+                users.values(),
+                update_conflicts=True,
+                unique_fields=['email'],
+                update_fields=['password', 'first_name', 'last_name'],
+            )
+            self.updated += existing
+        else:
+            User.objects.bulk_create(users.values(), ignore_conflicts=True)
+            self.skipped += existing
+
+        self.processed += len(batch)
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(
+            f'{self.processed} users processed '
+            f'({self.processed / elapsed:.0f} users/s)'
+        )
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Backs the admin `^field` searches, which PostgreSQL runs as
+# `UPPER(field::text) LIKE UPPER('term%')`.
+PREFIX_INDEXES = {
+    'users_user_email_prefix_idx': 'email',
+    'users_user_first_name_prefix_idx': 'first_name',
+    'users_user_last_name_prefix_idx': 'last_name',
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PREFIX_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON users_user '
+            f'(UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20240320_1714'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
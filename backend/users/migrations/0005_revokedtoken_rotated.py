@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-19 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='revokedtoken',
+            name='rotated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,11 +1,18 @@
-from django.contrib.auth.hashers import make_password
 from django.db import models
 from django.contrib.auth.models import (
     AbstractUser,
     UserManager as DefaultUserManager,
 )
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .hashers import (
+    acheck_password,
+    amake_password,
+    check_password,
+    make_password,
+)
+
 
 class UserManager(DefaultUserManager):
     '''
@@ -21,7 +28,7 @@ class UserManager(DefaultUserManager):
         email = self.normalize_email(email)
 
         user = self.model(email=email, **extra_fields)
-        user.password = make_password(password)
+        user.set_password(password)
         user.save(using=self._db)
         return user
 
@@ -57,3 +64,47 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.get_full_name() or self.email
+
+    # Hashing and verification run on the bounded pool in `users.hashers`
+
+    def set_password(self, raw_password):
+        self.password = make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return check_password(raw_password, self.password, setter)
+
+    async def acheck_password(self, raw_password):
+        async def setter(raw_password):
+            self.password = await amake_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=["password"])
+
+        return await acheck_password(raw_password, self.password, setter)
+
+
+class RevokedToken(models.Model):
+    '''
+    A JWT, by `jti`, that must not be accepted again before it expires.
+
+    Checked through the per-process filter in `users.revocation`.
+    '''
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Replaced by a refresh, rather than revoked by a logout
+    rotated = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = 'Revoked token'
+        verbose_name_plural = 'Revoked tokens'
+
+    def __str__(self):
+        return self.jti
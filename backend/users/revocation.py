@@ -0,0 +1,195 @@
+'''
+Revoked JWTs, checked without a query for tokens that were never revoked.
+
+Revocations are rows in `RevokedToken`. Each process mirrors their `jti`s
+in a Bloom filter, which has no false negatives: a token missing from the
+filter is accepted without touching the database, and only filter hits
+(revoked tokens plus a `TOKEN_REVOCATION_ERROR_RATE` share of the rest)
+are confirmed with a lookup. The filter picks up other processes'
+revocations every `TOKEN_REVOCATION_SYNC_INTERVAL` seconds and is rebuilt
+from scratch when it fills up or pruned rows should leave it.
+'''
+
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+# Rows are stamped before their transaction commits, so each sync re-reads
+# this far back to catch rows that became visible late
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    '''
+    Set membership in a fixed bit array. Holding up to `capacity` items,
+    `in` answers wrongly (never for added items) at about `error_rate`.
+    '''
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationFilter:
+    '''This process's Bloom filter of revoked `jti`s and its sync state.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.built_at = 0
+        self.checked_at = 0
+        self.synced_until = None
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if (
+            not force
+            and self.filter is not None
+            and now - self.checked_at < settings.TOKEN_REVOCATION_SYNC_INTERVAL
+        ):
+            return
+        with self.lock:
+            if (
+                force
+                or self.filter is None
+                or self.filter.count > self.filter.capacity
+                or now - self.built_at
+                > settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+            ):
+                self._rebuild()
+            elif now - self.checked_at >= (
+                settings.TOKEN_REVOCATION_SYNC_INTERVAL
+            ):
+                self._update()
+            self.checked_at = now
+
+    def _active(self):
+        return RevokedToken.objects.filter(expires_at__gt=timezone.now())
+
+    def _rebuild(self):
+        started = timezone.now()
+        jtis = list(self._active().values_list('jti', flat=True))
+        bloom = BloomFilter(
+            max(settings.TOKEN_REVOCATION_CAPACITY, 2 * len(jtis)),
+            settings.TOKEN_REVOCATION_ERROR_RATE,
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        self.filter = bloom
+        self.built_at = time.monotonic()
+        self.synced_until = started
+
+    def _update(self):
+        started = timezone.now()
+        jtis = self._active().filter(
+            revoked_at__gte=self.synced_until - SYNC_OVERLAP
+        )
+        for jti in jtis.values_list('jti', flat=True):
+            if jti not in self.filter:
+                self.filter.add(jti)
+        self.synced_until = started
+
+    def add(self, jti):
+        self.sync()
+        with self.lock:
+            self.filter.add(jti)
+
+    def __contains__(self, jti):
+        self.sync()
+        return jti in self.filter
+
+
+revocations = RevocationFilter()
+
+
+def _after_fork():
+    # A lock held by another thread at fork would never be released
+    revocations.lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def is_revoked(jti):
+    '''Return whether `jti` was revoked; queries only on filter hits.'''
+    if jti not in revocations:
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke(token, rotated=False):
+    '''
+    Revoke a simplejwt token until it expires. Returns False if it was
+    already revoked, which makes revoking a safe single-use check.
+    `rotated` marks a refresh token replaced by a refresh, which stays
+    usable for `TOKEN_ROTATION_GRACE` seconds (see `rotated_recently()`).
+    '''
+    jti = token['jti']
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=jti, expires_at=expires_at, rotated=rotated
+            )
+    except IntegrityError:
+        if not rotated:
+            # A logout ends the grace period of a token just rotated
+            RevokedToken.objects.filter(jti=jti).update(rotated=False)
+        return False
+    revocations.add(jti)
+    return True
+
+
+def rotated_recently(jti):
+    '''
+    Return whether `jti` was replaced by a refresh less than
+    `TOKEN_ROTATION_GRACE` seconds ago, so that concurrent refreshes with
+    the same token (two tabs, or a retried request) all succeed.
+    '''
+    return RevokedToken.objects.filter(
+        jti=jti,
+        rotated=True,
+        revoked_at__gt=timezone.now()
+        - timedelta(seconds=settings.TOKEN_ROTATION_GRACE),
+    ).exists()
+
+
+def prune_expired(batch_size=10000):
+    '''Delete expired revocations in batches; return how many were removed.'''
+    expired = RevokedToken.objects.filter(expires_at__lte=timezone.now())
+    deleted = 0
+    while pks := list(expired.values_list('pk', flat=True)[:batch_size]):
+        deleted += RevokedToken.objects.filter(pk__in=pks).delete()[0]
+    return deleted
@@ -0,0 +1,45 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as DefaultTokenRefreshSerializer,
+    TokenVerifySerializer as DefaultTokenVerifySerializer,
+)
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from .revocation import is_revoked, revoke, rotated_recently
+
+REVOKED = _('Token has been revoked')
+
+
+class TokenRefreshSerializer(DefaultTokenRefreshSerializer):
+    '''
+    Rotates refresh tokens: the presented token is revoked as a new one is
+    issued, so each refresh token works once, plus any other refreshes
+    within `TOKEN_ROTATION_GRACE` seconds of the first.
+    '''
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        jti = refresh['jti']
+        if is_revoked(jti) and not rotated_recently(jti):
+            raise InvalidToken(REVOKED)
+
+        data = super().validate(attrs)
+        # A concurrent refresh with the same token may have rotated it
+        if not revoke(refresh, rotated=True) and not rotated_recently(jti):
+            raise InvalidToken(REVOKED)
+
+        # simplejwt's own ROTATE_REFRESH_TOKENS needs its blacklist app
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data['refresh'] = str(refresh)
+        return data
+
+
+class TokenVerifySerializer(DefaultTokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        if 'jti' in token and is_revoked(token['jti']):
+            raise InvalidToken(REVOKED)
+        return {}
@@ -0,0 +1,144 @@
+'''
+Connection-pooled HTTP for python-social-auth backends.
+
+`social_core` sends every token exchange and profile lookup through a bare
+`requests.request()`, which opens (and TLS-handshakes) a new connection per
+call. `PooledHTTPMixin` routes them through one keep-alive session per
+process instead, and keeps anonymous `GET` responses such as OpenID
+discovery documents and JWKS for as long as their `Cache-Control` allows.
+
+https://github.com/python-social-auth/social-core/blob/master/social_core/backends/base.py
+'''
+
+import copy
+import os
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from social_core.backends.google import GoogleOAuth2 as DefaultGoogleOAuth2
+from social_core.exceptions import AuthFailed
+from social_core.utils import user_agent
+from urllib3.util.retry import Retry
+
+_session = None
+_session_lock = threading.Lock()
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_session():
+    '''Return this process's shared `requests.Session`.'''
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.SOCIAL_AUTH_HTTP_POOL_SIZE,
+                    pool_maxsize=settings.SOCIAL_AUTH_HTTP_POOL_SIZE,
+                    # Retries a connection the provider closed while idle;
+                    # requests that reached the provider are not resent
+                    max_retries=Retry(
+                        total=1, read=0, status=0, allowed_methods=None
+                    ),
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def reset():
+    '''Close the session and empty the cache.'''
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+    with _cache_lock:
+        _cache.clear()
+
+
+def _after_fork():
+    # Pooled sockets must not be shared between a gunicorn master and its
+    # workers, and a lock held by another thread at fork is never released
+    global _session, _session_lock, _cache_lock
+    _session = None
+    _session_lock = threading.Lock()
+    _cache_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def max_age(response):
+    '''
+    Seconds a shared cache may keep `response`, or 0 if it may not be
+    stored. `s-maxage` wins over `max-age`; time already spent in upstream
+    caches (`Age`) is subtracted.
+    '''
+    cache_control = response.headers.get('Cache-Control', '').lower()
+    if re.search(r'\b(no-store|no-cache|private)\b', cache_control):
+        return 0
+    match = re.search(r'\bs-maxage=(\d+)', cache_control) or re.search(
+        r'\bmax-age=(\d+)', cache_control
+    )
+    if not match:
+        return 0
+    age = response.headers.get('Age', '0')
+    return max(int(match[1]) - (int(age) if age.isdigit() else 0), 0)
+
+
+class PooledHTTPMixin:
+    '''Sends a social auth backend's requests through `get_session()`.'''
+
+    def request(self, url, method='GET', *args, **kwargs):
+        kwargs.setdefault('headers', {})
+        if self.setting('PROXIES') is not None:
+            kwargs.setdefault('proxies', self.setting('PROXIES'))
+        if self.setting('VERIFY_SSL') is not None:
+            kwargs.setdefault('verify', self.setting('VERIFY_SSL'))
+        kwargs.setdefault('timeout', self.setting('REQUESTS_TIMEOUT'))
+        if self.SEND_USER_AGENT and 'User-Agent' not in kwargs['headers']:
+            kwargs['headers']['User-Agent'] = (
+                self.setting('USER_AGENT') or user_agent()
+            )
+
+        try:
+            response = get_session().request(method, url, *args, **kwargs)
+        except requests.ConnectionError as err:
+            raise AuthFailed(self, str(err))
+        response.raise_for_status()
+        return response
+
+    def get_json(self, url, *args, **kwargs):
+        method = kwargs.get('method', 'GET')
+        # Only anonymous GETs are shared; anything with a token or a body
+        # is specific to one login
+        cacheable = (
+            method == 'GET'
+            and not args
+            and 'Authorization' not in kwargs.get('headers', {})
+            and not kwargs.get('params')
+        )
+        if cacheable:
+            with _cache_lock:
+                expires, data = _cache.get(url, (0, None))
+            if expires > time.monotonic():
+                return copy.deepcopy(data)
+
+        response = self.request(url, *args, **kwargs)
+        data = response.json()
+        if cacheable and (ttl := max_age(response)):
+            with _cache_lock:
+                _cache[url] = (time.monotonic() + ttl, copy.deepcopy(data))
+        return data
+
+
+class GoogleOAuth2(PooledHTTPMixin, DefaultGoogleOAuth2):
+    pass
@@ -0,0 +1,129 @@
+'''
+A local OAuth2 provider standing in for Google in tests and benchmarks.
+'''
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from users.social import GoogleOAuth2
+
+
+class StubOAuth2(GoogleOAuth2):
+    '''
+    `GoogleOAuth2` pointed at a `StubProvider`; configure it with the
+    `SOCIAL_AUTH_STUB_OAUTH2_URL`, `_KEY` and `_SECRET` settings.
+    '''
+
+    name = 'stub-oauth2'
+
+    def authorization_url(self):
+        return self.setting('URL') + '/auth'
+
+    def access_token_url(self):
+        return self.setting('URL') + '/token'
+
+    def user_data(self, access_token, *args, **kwargs):
+        return self.get_json(
+            self.setting('URL') + '/userinfo',
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+
+
+class StubProvider:
+    '''
+    Serves `/token`, `/userinfo` and a cacheable `/certs` on 127.0.0.1.
+
+    Every new connection is delayed by `handshake_delay` seconds, roughly
+    what a TLS handshake to a remote provider costs, and counted in
+    `connections`.
+    '''
+
+    def __init__(self, handshake_delay=0, email='player@example.com'):
+        self.handshake_delay = handshake_delay
+        self.email = email
+        self.connections = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def __enter__(self):
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes on a kept-alive socket
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with provider._lock:
+                    provider.connections += 1
+                time.sleep(provider.handshake_delay)
+
+            def do_GET(self):
+                provider.requests.append(('GET', self.path))
+                if self.path == '/certs':
+                    self.send_json(
+                        {'keys': [{'kid': 'stub', 'kty': 'RSA'}]},
+                        {'Cache-Control': 'public, max-age=3600'},
+                    )
+                elif self.path == '/userinfo' and self.headers.get(
+                    'Authorization', ''
+                ).startswith('Bearer '):
+                    self.send_json(
+                        {
+                            'sub': '1234567890',
+                            'email': provider.email,
+                            'email_verified': True,
+                            'name': 'Stub Player',
+                            'given_name': 'Stub',
+                            'family_name': 'Player',
+                        }
+                    )
+                else:
+                    self.send_json({'error': 'not_found'}, status=404)
+
+            def do_POST(self):
+                provider.requests.append(('POST', self.path))
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                if self.path == '/token' and form.get('code'):
+                    self.send_json(
+                        {
+                            'access_token': f'token-{form["code"][0]}',
+                            'token_type': 'Bearer',
+                            'expires_in': 3600,
+                        }
+                    )
+                else:
+                    self.send_json({'error': 'invalid_grant'}, status=400)
+
+            def send_json(self, data, headers=None, status=200):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
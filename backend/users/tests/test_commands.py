@@ -0,0 +1,87 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+User = get_user_model()
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class ImportUsersCommandTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.tmp.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def import_users(self, path, **options):
+        stdout = StringIO()
+        call_command('import_users', path, stdout=stdout, **options)
+        return stdout.getvalue().splitlines()[-1]
+
+    def test_imports_csv_in_batches(self):
+        path = self.write(
+            'users.csv',
+            'email,password,first_name,last_name\n'
+            'one@example.com,pass-one,One,Player\n'
+            'two@example.com,pass-two,Two,Player\n'
+            'three@example.com,,Three,Player\n',
+        )
+
+        summary = self.import_users(path, batch_size=2, workers=0)
+
+        self.assertIn('Imported 3 users, updated 0, skipped 0 ', summary)
+        self.assertEqual(User.objects.count(), 4)  # includes dev superuser
+        one = User.objects.get(email='one@example.com')
+        self.assertEqual(one.first_name, 'One')
+        self.assertTrue(one.check_password('pass-one'))
+        self.assertFalse(
+            User.objects.get(email='three@example.com').has_usable_password()
+        )
+
+    def test_imports_jsonl_with_process_pool(self):
+        rows = [
+            {'email': f'player{i}@example.com', 'password': f'pass-{i}'}
+            for i in range(5)
+        ]
+        path = self.write(
+            'users.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+
+        self.import_users(path, batch_size=2, workers=2)
+
+        user = User.objects.get(email='player3@example.com')
+        self.assertTrue(user.check_password('pass-3'))
+
+    def test_existing_emails_are_ignored_unless_updating(self):
+        User.objects.create_user(
+            email='taken@example.com', password='original'
+        )
+        path = self.write(
+            'users.csv',
+            'email,password,first_name\ntaken@example.com,replaced,New\n',
+        )
+
+        summary = self.import_users(path, workers=0)
+        self.assertTrue(
+            summary.startswith('Imported 0 users, updated 0, skipped 1 ')
+        )
+        user = User.objects.get(email='taken@example.com')
+        self.assertTrue(user.check_password('original'))
+
+        summary = self.import_users(path, workers=0, update_existing=True)
+        self.assertTrue(
+            summary.startswith('Imported 0 users, updated 1, skipped 0 ')
+        )
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('replaced'))
+        self.assertEqual(user.first_name, 'New')
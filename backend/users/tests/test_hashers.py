@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password as django_make_password
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.hashers import (
+    PasswordHashingBusy,
+    acheck_password,
+    check_password,
+    get_pool,
+    make_password,
+)
+
+User = get_user_model()
+
+
+class PasswordHashingPoolTests(TestCase):
+    def test_make_and_check_password_round_trip(self):
+        encoded = make_password('goblue12345!!')
+
+        self.assertTrue(check_password('goblue12345!!', encoded))
+        self.assertFalse(check_password('wrong', encoded))
+        self.assertTrue(asyncio.run(acheck_password('goblue12345!!', encoded)))
+
+    @override_settings(
+        PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_SIZE=0
+    )
+    def test_full_pool_rejects_new_work(self):
+        release = threading.Event()
+        blocker = get_pool().submit(release.wait)
+        try:
+            with self.assertRaises(PasswordHashingBusy):
+                make_password('goblue12345!!')
+        finally:
+            release.set()
+            blocker.result()
+
+        self.assertTrue(make_password('goblue12345!!'))
+
+
+class PooledLoginTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com', password='password123'
+        )
+
+    @override_settings(
+        PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_SIZE=0
+    )
+    def test_login_sheds_load_when_pool_is_full(self):
+        release = threading.Event()
+        blocker = get_pool().submit(release.wait)
+        try:
+            response = self.client.post(
+                '/jwt/create/',
+                {'email': 'test@example.com', 'password': 'password123'},
+            )
+        finally:
+            release.set()
+            blocker.result()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    @override_settings(
+        PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_SIZE=0
+    )
+    def test_admin_login_sheds_load_when_pool_is_full(self):
+        release = threading.Event()
+        blocker = get_pool().submit(release.wait)
+        try:
+            response = self.client.post(
+                '/admin/login/',
+                {'username': 'test@example.com', 'password': 'password123'},
+            )
+        finally:
+            release.set()
+            blocker.result()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_login_rehashes_outdated_password(self):
+        self.user.password = django_make_password(
+            'password123', hasher='pbkdf2_sha1'
+        )
+        self.user.save()
+
+        response = self.client.post(
+            '/jwt/create/',
+            {'email': 'test@example.com', 'password': 'password123'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
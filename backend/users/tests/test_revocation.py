@@ -0,0 +1,160 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import RevokedToken
+from users.revocation import BloomFilter, is_revoked, revocations, revoke
+
+User = get_user_model()
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [uuid.uuid4().hex for _ in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate_at_capacity(self):
+        for error_rate in (0.01, 0.001):
+            with self.subTest(error_rate=error_rate):
+                bloom = BloomFilter(10000, error_rate)
+                for _ in range(10000):
+                    bloom.add(uuid.uuid4().hex)
+
+                trials = 100000
+                hits = sum(uuid.uuid4().hex in bloom for _ in range(trials))
+                self.assertLess(hits / trials, error_rate * 1.5)
+
+    def test_sizing(self):
+        bloom = BloomFilter(100000, 0.001)
+
+        # ~14.4 bits and 10 hashes per item
+        self.assertEqual(bloom.hashes, 10)
+        self.assertLess(len(bloom.bits), 200 * 1024)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class RefreshRotationTests(TestCase):
+    def setUp(self):
+        revocations.sync(force=True)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com', password='pass'
+        )
+        self.client.post(
+            '/jwt/create/', {'email': 'test@example.com', 'password': 'pass'}
+        )
+
+    def refresh(self, token=None):
+        if token is not None:
+            self.client.cookies['refresh'] = token
+        return self.client.post('/jwt/refresh/', {})
+
+    def test_refresh_rotates_token(self):
+        first = self.client.cookies['refresh'].value
+
+        response = self.refresh()
+
+        self.assertEqual(response.status_code, 200)
+        second = response.cookies['refresh'].value
+        self.assertNotEqual(second, first)
+        with self.settings(TOKEN_ROTATION_GRACE=0):
+            self.assertEqual(self.refresh(first).status_code, 401)
+        self.assertEqual(self.refresh(second).status_code, 200)
+
+    def test_rotated_token_works_during_the_grace_period(self):
+        first = self.client.cookies['refresh'].value
+        self.assertEqual(self.refresh().status_code, 200)
+
+        # Another tab still holds the first token
+        response = self.refresh(first)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.cookies['refresh'].value, first)
+        RevokedToken.objects.update(
+            revoked_at=timezone.now() - timedelta(seconds=11)
+        )
+        self.assertEqual(self.refresh(first).status_code, 401)
+
+    def test_logout_ends_the_grace_period(self):
+        first = self.client.cookies['refresh'].value
+        self.assertEqual(self.refresh().status_code, 200)
+
+        self.client.cookies['refresh'] = first
+        self.client.post('/logout/')
+
+        self.assertEqual(self.refresh(first).status_code, 401)
+
+    def test_valid_token_is_checked_without_a_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.refresh().status_code, 200)
+
+        lookups = [
+            query['sql']
+            for query in queries
+            if query['sql'].startswith('SELECT')
+            and 'users_revokedtoken' in query['sql']
+        ]
+        self.assertEqual(lookups, [])
+
+    def test_logout_revokes_cookies(self):
+        access = self.client.cookies['access'].value
+        refresh = self.client.cookies['refresh'].value
+
+        self.client.post('/logout/')
+
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        self.client.cookies['access'] = access
+        response = self.client.post(
+            '/api/scores/submit/', {'score': 100, 'time_played': 20}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+    def test_other_workers_revocations_are_synced(self):
+        token = RefreshToken.for_user(self.user)
+        RevokedToken.objects.create(
+            jti=token['jti'],
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+        self.assertFalse(token['jti'] in revocations)
+        revocations.checked_at = 0  # the sync interval has passed
+        self.assertTrue(is_revoked(token['jti']))
+
+    def test_revoke_is_single_use(self):
+        token = RefreshToken.for_user(self.user)
+
+        self.assertTrue(revoke(token))
+        self.assertFalse(revoke(token))
+
+    def test_prune_deletes_only_expired_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            RevokedToken(jti=f'expired-{i}', expires_at=now - timedelta(1))
+            for i in range(5)
+        )
+        RevokedToken.objects.create(
+            jti='active', expires_at=now + timedelta(days=1)
+        )
+
+        call_command('prune_revoked_tokens', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(
+            list(RevokedToken.objects.values_list('jti', flat=True)),
+            ['active'],
+        )
@@ -0,0 +1,113 @@
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users import social
+from .stub_provider import StubOAuth2, StubProvider
+
+User = get_user_model()
+
+REDIRECT_URI = 'http://localhost:3000/auth/stub'
+
+
+class SocialTestMixin:
+    def setUp(self):
+        super().setUp()
+        social.reset()
+        self.addCleanup(social.reset)
+        self.provider = StubProvider().__enter__()
+        self.addCleanup(self.provider.__exit__)
+        settings = override_settings(
+            SOCIAL_AUTH_STUB_OAUTH2_URL=self.provider.url
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def backend(self):
+        return StubOAuth2(strategy=mock.Mock(setting=self.setting))
+
+    def setting(self, name, default=None, backend=None):
+        return {
+            'URL': self.provider.url,
+            'REQUESTS_TIMEOUT': 5,
+        }.get(name, default)
+
+
+class PooledHTTPTests(SocialTestMixin, SimpleTestCase):
+    def test_requests_reuse_one_connection(self):
+        backend = self.backend()
+        for i in range(3):
+            backend.user_data(f'token-{i}')
+
+        self.assertEqual(self.provider.connections, 1)
+
+    def test_cacheable_responses_are_reused(self):
+        backend = self.backend()
+        first = backend.get_json(self.provider.url + '/certs')
+        first['keys'].clear()  # callers can't corrupt the cached copy
+        second = backend.get_json(self.provider.url + '/certs')
+
+        self.assertEqual(second['keys'][0]['kid'], 'stub')
+        self.assertEqual(self.provider.requests, [('GET', '/certs')])
+
+    def test_authorized_responses_are_not_cached(self):
+        backend = self.backend()
+        backend.user_data('token-1')
+        backend.user_data('token-1')
+
+        self.assertEqual(len(self.provider.requests), 2)
+
+    def test_max_age(self):
+        def response(**headers):
+            return mock.Mock(headers=headers)
+
+        cases = [
+            ({'Cache-Control': 'public, max-age=600'}, 600),
+            ({'Cache-Control': 'max-age=600, s-maxage=60'}, 60),
+            ({'Cache-Control': 'max-age=600', 'Age': '100'}, 500),
+            ({'Cache-Control': 'private, max-age=600'}, 0),
+            ({'Cache-Control': 'no-store'}, 0),
+            ({}, 0),
+        ]
+        for headers, expected in cases:
+            with self.subTest(headers=headers):
+                self.assertEqual(social.max_age(response(**headers)), expected)
+
+
+@override_settings(
+    AUTHENTICATION_BACKENDS=[
+        'users.tests.stub_provider.StubOAuth2',
+        'django.contrib.auth.backends.ModelBackend',
+    ],
+    SOCIAL_AUTH_STUB_OAUTH2_KEY='client-id',
+    SOCIAL_AUTH_STUB_OAUTH2_SECRET='client-secret',
+    DJOSER={
+        'LOGIN_FIELD': 'email',
+        'SOCIAL_AUTH_ALLOWED_REDIRECT_URIS': [REDIRECT_URI],
+    },
+)
+class ProviderAuthViewTests(SocialTestMixin, TestCase):
+    def test_login_through_stub_provider(self):
+        client = APIClient()
+        response = client.get(
+            '/o/stub-oauth2/', {'redirect_uri': REDIRECT_URI}
+        )
+        query = parse_qs(urlparse(response.data['authorization_url']).query)
+
+        response = client.post(
+            '/o/stub-oauth2/?' f'code=abc&state={query["state"][0]}',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('access', response.cookies)
+        self.assertTrue(
+            User.objects.filter(email='player@example.com').exists()
+        )
+        self.assertEqual(
+            self.provider.requests,
+            [('POST', '/token'), ('GET', '/userinfo')],
+        )
+        self.assertEqual(self.provider.connections, 1)
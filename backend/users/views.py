@@ -3,14 +3,20 @@ from djoser.social.views import ProviderAuthView as DefaultProviderAuthView
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework_simplejwt.views import (
     TokenObtainPairView as DefaultTokenObtainPairView,
     TokenRefreshView as DefaultTokenRefreshView,
     TokenVerifyView as DefaultTokenVerifyView,
 )
 
+from .revocation import revoke
+
 
 class TokenObtainPairView(DefaultTokenObtainPairView):
+    throttle_scope = 'login'
+
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
 
@@ -41,6 +47,8 @@ class TokenObtainPairView(DefaultTokenObtainPairView):
 
 
 class TokenRefreshView(DefaultTokenRefreshView):
+    throttle_scope = 'refresh'
+
     def post(self, request, *args, **kwargs):
         refresh_token = request.COOKIES.get('refresh')
 
@@ -53,6 +61,8 @@ class TokenRefreshView(DefaultTokenRefreshView):
 
         if response.status_code == 200:
             access_token = response.data.get('access')
+            # Rotated: the refresh token just used is now revoked
+            refresh_token = response.data.get('refresh')
 
             response.set_cookie(
                 'access',
@@ -63,6 +73,15 @@ class TokenRefreshView(DefaultTokenRefreshView):
                 samesite=settings.AUTH_COOKIE_SAMESITE,
                 secure=settings.AUTH_COOKIE_SECURE,
             )
+            response.set_cookie(
+                'refresh',
+                refresh_token,
+                httponly=True,
+                max_age=settings.AUTH_COOKIE_MAX_AGE,
+                path=settings.AUTH_COOKIE_PATH,
+                samesite=settings.AUTH_COOKIE_SAMESITE,
+                secure=settings.AUTH_COOKIE_SECURE,
+            )
 
         return response
 
@@ -83,6 +102,18 @@ class LogoutView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
+        # Revoked, not just deleted, so copies of the cookies stop working
+        for name, token_class in (
+            ('refresh', RefreshToken),
+            ('access', AccessToken),
+        ):
+            raw_token = request.COOKIES.get(name)
+            if raw_token:
+                try:
+                    revoke(token_class(raw_token))
+                except TokenError:
+                    pass
+
         response = Response(status=status.HTTP_204_NO_CONTENT)
         response.delete_cookie('access')
         response.delete_cookie('refresh')
@@ -90,6 +121,8 @@ class LogoutView(APIView):
 
 
 class ProviderAuthView(DefaultProviderAuthView):
+    throttle_scope = 'login'
+
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
 
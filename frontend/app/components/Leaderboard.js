@@ -1,7 +1,6 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { getLeaderboard } from '../game/GameAPI';
 import { Box, Typography, Paper, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, CircularProgress } from '@mui/material';
 
 // Configuration
@@ -21,7 +20,7 @@ const dummyScores = [
   { id: 10, username: 'SolarFlare', score: 300 },
 ];
 
-export default function Leaderboard() {
+export default function Leaderboard({ top }) {
   const [scores, setScores] = useState([]);
   const [loading, setLoading] = useState(true);
 
@@ -36,40 +35,28 @@ export default function Leaderboard() {
     }
   }, []);
 
-  // Fetch leaderboard data when component mounts
+  // Show the top scores from the dashboard response once it has loaded
   useEffect(() => {
-    const fetchLeaderboard = async () => {
-      setLoading(true);
-      try {
-        // Fetch data from API
-        const data = await getLeaderboard();
-        
-        if (!USE_DUMMY_DATA && Array.isArray(data) && data.length > 0) {
-          // Use real API data in production
-          setScores(data);
-        } else {
-          // Development mode or fallback if API returns no data
-          let leaderboardData = [...dummyScores];
-          
-          // Add user's high score if available
-          const userHighScore = getUserHighScore();
-          if (userHighScore > 0) {
-            // Create combined leaderboard with user score
-            leaderboardData = addUserScoreToLeaderboard(leaderboardData, userHighScore);
-          }
-          
-          setScores(leaderboardData);
-        }
-      } catch (error) {
-        // Fallback to dummy data on error
-        setScores(dummyScores);
-      } finally {
-        setLoading(false);
-      }
-    };
+    if (top === undefined) return;
 
-    fetchLeaderboard();
-  }, []);
+    if (!USE_DUMMY_DATA && Array.isArray(top) && top.length > 0) {
+      // Use real API data in production
+      setScores(top);
+    } else {
+      // Development mode or fallback if the dashboard has no scores
+      let leaderboardData = [...dummyScores];
+      
+      // Add user's high score if available
+      const userHighScore = getUserHighScore();
+      if (userHighScore > 0) {
+        // Create combined leaderboard with user score
+        leaderboardData = addUserScoreToLeaderboard(leaderboardData, userHighScore);
+      }
+      
+      setScores(leaderboardData);
+    }
+    setLoading(false);
+  }, [top]);
 
   // Helper function to get user's high score from localStorage
   const getUserHighScore = () => {
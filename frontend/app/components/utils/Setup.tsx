@@ -1,16 +1,19 @@
 'use client';
 
 import 'react-toastify/dist/ReactToastify.css';
+import { usePathname } from 'next/navigation';
 import { ToastContainer } from 'react-toastify';
 
-import { useRetrieveUser, useVerify } from '@/hooks';
+import { DASHBOARD_PAGES, useRetrieveUser, useVerify } from '@/hooks';
 
 export default function Setup() {
   const token =
     typeof window !== 'undefined' ? localStorage.getItem('access') : null;
+  // Those pages' dashboard request checks the session and loads the user
+  const onDashboardPage = DASHBOARD_PAGES.includes(usePathname());
 
-  useVerify();
-  useRetrieveUser();
+  useVerify(onDashboardPage);
+  useRetrieveUser(onDashboardPage);
 
   return <ToastContainer />;
 }
@@ -1,6 +1,7 @@
 'use client';
 
 import { RequireAuth } from '@/app/components/utils';
+import { useDashboard } from '@/hooks';
 import {
   Box,
   Typography,
@@ -78,6 +79,10 @@ export default function Page() {
     }
   }, []);
 
+  // Profile, best score and top scores, in one request
+  const dashboard = useDashboard();
+  const bestScore = Math.max(localHighScore, dashboard?.best?.score ?? 0);
+
   return (
     <Container
       maxWidth='lg'
@@ -176,7 +181,7 @@ export default function Page() {
           >
             YOUR BEST SCORE:{' '}
             <span style={{ color: '#30cfd0', fontWeight: 'bold' }}>
-              {localHighScore}
+              {bestScore}
             </span>
           </Typography>
         </Box>
@@ -195,7 +200,7 @@ export default function Page() {
         }}
       >
         {/* Use the new Leaderboard component */}
-        <Leaderboard />
+        <Leaderboard top={dashboard === null ? [] : dashboard?.top} />
       </Paper>
     </Container>
   );
@@ -21,41 +21,111 @@ const debugLog = (message, data) => {
   }
 };
 
+// Telemetry event kinds, matching scores/telemetry.py in the backend
+export const TELEMETRY = {
+  MOVE: 0,
+  FOOD: 1,
+  POWER_UP: 2,
+  BOMB: 3,
+  GAME_OVER: 4,
+};
+
+const TELEMETRY_HEADER_SIZE = 20; // 16 byte game UUID + u32 event count
+const TELEMETRY_EVENT_SIZE = 12; // u32 t, u8 kind, u8 reserved, i16 x, i16 y, u16 length
+
+/**
+ * Send gameplay events as one length-prefixed binary frame
+ * @param {string} gameId - UUID identifying the game
+ * @param {Array<Array<number>>} events - [t, kind, x, y, length] tuples
+ * @returns {Promise<void>}
+ */
+export const submitTelemetry = async (gameId, events) => {
+  if (events.length === 0) return;
+
+  const frameSize = TELEMETRY_HEADER_SIZE + events.length * TELEMETRY_EVENT_SIZE;
+  const buffer = new ArrayBuffer(4 + frameSize);
+  const view = new DataView(buffer);
+  view.setUint32(0, frameSize, true);
+  const hex = gameId.replace(/-/g, '');
+  for (let i = 0; i < 16; i++) {
+    view.setUint8(4 + i, parseInt(hex.substr(i * 2, 2), 16));
+  }
+  view.setUint32(20, events.length, true);
+  events.forEach(([t, kind, x, y, length], i) => {
+    const offset = 4 + TELEMETRY_HEADER_SIZE + i * TELEMETRY_EVENT_SIZE;
+    view.setUint32(offset, t, true);
+    view.setUint8(offset + 4, kind);
+    view.setInt16(offset + 6, x, true);
+    view.setInt16(offset + 8, y, true);
+    view.setUint16(offset + 10, length, true);
+  });
+
+  try {
+    await fetch('/api/scores/telemetry/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/octet-stream',
+      },
+      body: buffer,
+      credentials: 'include',
+      // Lets the last batch finish if the player leaves the page
+      keepalive: buffer.byteLength < 64 * 1024,
+    });
+    debugLog('Telemetry sent', events.length);
+  } catch (error) {
+    console.warn('[GameAPI] Telemetry upload failed:', error);
+  }
+};
+
 /**
  * Submit the user's high score to the server
  * @param {number} score - The player's high score
  * @param {number} timePlayed - Time played in seconds
+ * @param {Object|null} replay - The game's seed, ticks and inputs, if it set the score
+ * @param {string} idempotencyKey - Reuse the same key when retrying a submission
  * @returns {Promise<Object>} - Response with success status and optional error
  */
-export const submitScore = async (score, timePlayed = 0) => {
+export const submitScore = async (
+  score,
+  timePlayed = 0,
+  replay = null,
+  idempotencyKey = crypto.randomUUID()
+) => {
+  const post = () => fetch('/api/scores/submit/', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      // Lets the server replay its response instead of saving a duplicate
+      'Idempotency-Key': idempotencyKey,
+    },
+    body: JSON.stringify({ 
+      score, 
+      time_played: timePlayed,
+      // Seed and inputs for server-side verification (see GameCanvas.js)
+      ...(replay && { replay }),
+    }),
+    credentials: 'include',
+  });
+
   try {
     debugLog('Submitting high score', { score, timePlayed });
     
-    // First, refresh the token to ensure we have a valid session
-    try {
-      await fetch('/jwt/refresh/', {
+    let response = await post();
+    
+    // Refresh only when the access token has expired: every refresh
+    // rotates the refresh token, so refreshing before each submission
+    // would race with other tabs
+    if (response.status === 401) {
+      const refreshed = await fetch('/jwt/refresh/', {
         method: 'POST',
         credentials: 'include',
       });
-      debugLog('Token refreshed successfully');
-    } catch (refreshError) {
-      console.warn('[GameAPI] Token refresh failed:', refreshError);
-      // Continue with score submission anyway
+      debugLog('Token refresh status', refreshed.status);
+      if (refreshed.ok) {
+        response = await post();
+      }
     }
     
-    // Submit the score
-    const response = await fetch('/api/scores/submit/', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({ 
-        score, 
-        time_played: timePlayed 
-      }),
-      credentials: 'include',
-    });
-    
     debugLog('Score submission response status', `${response.status} ${response.statusText}`);
     
     // Handle response status
@@ -91,53 +161,33 @@ export const submitScore = async (score, timePlayed = 0) => {
 };
 
 /**
- * Get the leaderboard data
- * @returns {Promise<Array>} - Array of high scores
+ * Get the player's profile, best score and rank, latest scores and the
+ * global top scores, in one request
+ * @returns {Promise<Object>} - The dashboard; rejects if it can't be loaded
  */
-export const getLeaderboard = async () => {
-  try {
-    // Add a random query parameter to prevent caching issues
-    const timestamp = new Date().getTime();
-    const url = `/api/scores/leaderboard/?_=${timestamp}`;
-    
-    debugLog('Fetching leaderboard', url);
-    
-    const response = await fetch(url, {
-      method: 'GET',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+export const getDashboard = async () => {
+  const get = () => fetch('/api/scores/dashboard/', {
+    credentials: 'include',
+  });
+
+  let response = await get();
+
+  // As in submitScore: refresh only once the access token has expired
+  if (response.status === 401) {
+    const refreshed = await fetch('/jwt/refresh/', {
+      method: 'POST',
       credentials: 'include',
-      // Use manual redirect handling for debugging
-      redirect: 'follow',
     });
-    
-    // Log redirects for debugging
-    if (response.status === 301 || response.status === 302) {
-      debugLog('Redirect detected', response.headers.get('Location'));
-    }
-    
-    // Check response status
-    if (!response.ok) {
-      console.error(`[GameAPI] Leaderboard request failed: ${response.status} ${response.statusText}`);
-      return [];
+    debugLog('Token refresh status', refreshed.status);
+    if (refreshed.ok) {
+      response = await get();
     }
-    
-    // Parse the response as text first to debug any issues
-    const text = await response.text();
-    
-    try {
-      // Try to parse the text as JSON
-      const data = JSON.parse(text);
-      debugLog('Leaderboard data received', { count: data.length });
-      return data;
-    } catch (parseError) {
-      console.error('[GameAPI] Error parsing leaderboard JSON:', parseError);
-      debugLog('Response text', text);
-      return [];
-    }
-  } catch (error) {
-    console.error('[GameAPI] Error fetching leaderboard:', error);
-    return [];
   }
-}; 
\ No newline at end of file
+
+  if (!response.ok) {
+    throw new Error(`Dashboard request failed: ${response.status}`);
+  }
+  const dashboard = await response.json();
+  debugLog('Dashboard received', { top: dashboard.top.length });
+  return dashboard;
+};
@@ -1,6 +1,16 @@
 ﻿'use client';
 
 import { useEffect, useRef, useState } from 'react';
+import { TELEMETRY, submitTelemetry } from './GameAPI';
+
+// Seeded generator (mulberry32) so the server can replay a game from its
+// seed and inputs; mirrored by backend/scores/replay.py
+const createRandom = (seed) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), seed | 1);
+  t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
 
 export default function GameCanvas({
   gameStarted,
@@ -23,6 +33,8 @@ export default function GameCanvas({
   const nextDirectionRef = useRef('right');
   const [ctx, setCtx] = useState(null);
   const previousGameOverRef = useRef(false);
+  const telemetryRef = useRef({ gameId: null, startedAt: 0, events: [] });
+  const replayRef = useRef({ seed: 0, tick: 0, inputs: [], random: Math.random });
 
   // Game configuration
   const GRID_SIZE = 25; // Size of each grid cell in pixels
@@ -36,7 +48,9 @@ export default function GameCanvas({
   const POWER_UP_CHANCE = 0.01; // 1% chance per update to spawn a power-up when none exists
   const BOMB_SPAWN_CHANCE = 0.005; // 0.5% chance per update to spawn a bomb
   const MAX_BOMBS = 3; // Maximum number of bombs that can exist at once
-  const BOMB_LIFETIME = 8000; // Bombs disappear after 8 seconds
+  const POWER_UP_LIFETIME = 147; // Power-ups disappear after 147 ticks (10 seconds at normal speed)
+  const BOMB_LIFETIME = 118; // Bombs disappear after 118 ticks (8 seconds at normal speed)
+  const TELEMETRY_BATCH_SIZE = 2000; // Events sent per telemetry request
 
   // Get current game speed based on time warp status
   const getCurrentGameSpeed = () => {
@@ -181,8 +195,38 @@ export default function GameCanvas({
     };
   }, [ctx, gameStarted, gameOver, isPaused, isTimeWarpActive]);
 
+  // Record a gameplay event for balancing and anti-cheat analysis
+  const recordEvent = (kind, position) => {
+    const telemetry = telemetryRef.current;
+    if (!telemetry.gameId) return;
+
+    telemetry.events.push([
+      Math.round(performance.now() - telemetry.startedAt),
+      kind,
+      position.x,
+      position.y,
+      snakeRef.current.length,
+    ]);
+    if (telemetry.events.length >= TELEMETRY_BATCH_SIZE) {
+      submitTelemetry(telemetry.gameId, telemetry.events.splice(0));
+    }
+  };
+
   // Initialize game
   const initializeGame = () => {
+    telemetryRef.current = {
+      gameId: crypto.randomUUID(),
+      startedAt: performance.now(),
+      events: [],
+    };
+    const seed = crypto.getRandomValues(new Uint32Array(1))[0];
+    replayRef.current = {
+      seed,
+      tick: 0,
+      inputs: [],
+      random: createRandom(seed),
+    };
+
     // Create initial snake (3 segments at the center)
     const centerX = Math.floor(GRID_WIDTH / 2);
     const centerY = Math.floor(GRID_HEIGHT / 2);
@@ -197,6 +241,10 @@ export default function GameCanvas({
     directionRef.current = 'right';
     nextDirectionRef.current = 'right';
 
+    // Clear the previous game's power-up and bombs
+    powerUpRef.current = null;
+    bombsRef.current = [];
+
     // Create initial food
     createFood();
 
@@ -206,14 +254,15 @@ export default function GameCanvas({
 
   // Create food at random position
   const createFood = () => {
+    const { random } = replayRef.current;
     let position;
     let overlapsSnake;
 
     // Keep generating positions until we find one that doesn't overlap with the snake
     do {
       position = {
-        x: Math.floor(Math.random() * GRID_WIDTH),
-        y: Math.floor(Math.random() * GRID_HEIGHT),
+        x: Math.floor(random() * GRID_WIDTH),
+        y: Math.floor(random() * GRID_HEIGHT),
       };
 
       overlapsSnake = snakeRef.current.some(
@@ -224,13 +273,14 @@ export default function GameCanvas({
     foodRef.current = position;
 
     // Chance to spawn a power-up if none exists
-    if (!powerUpRef.current && Math.random() < POWER_UP_CHANCE) {
+    if (!powerUpRef.current && random() < POWER_UP_CHANCE) {
       createPowerUp();
     }
   };
 
   // Create a power-up at a random position
   const createPowerUp = () => {
+    const { random, tick } = replayRef.current;
     let position;
     let overlapsSnake;
     let overlapsFood;
@@ -238,8 +288,8 @@ export default function GameCanvas({
     // Keep generating positions until we find one that doesn't overlap with the snake or food
     do {
       position = {
-        x: Math.floor(Math.random() * GRID_WIDTH),
-        y: Math.floor(Math.random() * GRID_HEIGHT),
+        x: Math.floor(random() * GRID_WIDTH),
+        y: Math.floor(random() * GRID_HEIGHT),
       };
 
       overlapsSnake = snakeRef.current.some(
@@ -252,24 +302,18 @@ export default function GameCanvas({
         foodRef.current.y === position.y;
     } while (overlapsSnake || overlapsFood);
 
-    powerUpRef.current = position;
+    // Power-ups disappear after POWER_UP_LIFETIME ticks
+    powerUpRef.current = { ...position, expiresAt: tick + POWER_UP_LIFETIME };
     powerUpTypeRef.current = 'reset'; // Currently only have reset type
 
     console.log('Power-up spawned: Reset Length');
-
-    // Power-ups disappear after 10 seconds
-    setTimeout(() => {
-      if (powerUpRef.current) {
-        powerUpRef.current = null;
-        console.log('Power-up disappeared');
-      }
-    }, 10000);
   };
 
   // Create a bomb at a random position
   const createBomb = () => {
     if (bombsRef.current.length >= MAX_BOMBS) return;
 
+    const { random, tick } = replayRef.current;
     let position;
     let overlapsSnake;
     let overlapsFood;
@@ -279,8 +323,8 @@ export default function GameCanvas({
     // Keep generating positions until we find one that doesn't overlap with anything
     do {
       position = {
-        x: Math.floor(Math.random() * GRID_WIDTH),
-        y: Math.floor(Math.random() * GRID_HEIGHT),
+        x: Math.floor(random() * GRID_WIDTH),
+        y: Math.floor(random() * GRID_HEIGHT),
       };
 
       overlapsSnake = snakeRef.current.some(
@@ -302,26 +346,36 @@ export default function GameCanvas({
       );
     } while (overlapsSnake || overlapsFood || overlapsPowerUp || overlapsBomb);
 
-    // Add the bomb to the bombs array with a timestamp
+    // Add the bomb to the bombs array; it disappears after BOMB_LIFETIME ticks
     const bomb = {
       x: position.x,
       y: position.y,
-      createdAt: Date.now(),
+      expiresAt: tick + BOMB_LIFETIME,
     };
 
     bombsRef.current.push(bomb);
     console.log('Bomb spawned at', position.x, position.y);
-
-    // Schedule bomb to disappear
-    setTimeout(() => {
-      bombsRef.current = bombsRef.current.filter((b) => b !== bomb);
-      console.log('Bomb disappeared');
-    }, BOMB_LIFETIME);
   };
 
   // Update game state
   const updateGame = () => {
-    // Update direction from the next direction
+    const replay = replayRef.current;
+    const { random } = replay;
+    replay.tick += 1;
+
+    // Remove expired power-ups and bombs
+    if (powerUpRef.current && powerUpRef.current.expiresAt <= replay.tick) {
+      powerUpRef.current = null;
+      console.log('Power-up disappeared');
+    }
+    bombsRef.current = bombsRef.current.filter(
+      (bomb) => bomb.expiresAt > replay.tick,
+    );
+
+    // Update direction from the next direction, logging turns for the replay
+    if (nextDirectionRef.current !== directionRef.current) {
+      replay.inputs.push([replay.tick, nextDirectionRef.current]);
+    }
     directionRef.current = nextDirectionRef.current;
 
     // Get current head position
@@ -391,6 +445,7 @@ export default function GameCanvas({
 
     if (collidesWithBomb) {
       // Game over if hitting a bomb
+      recordEvent(TELEMETRY.BOMB, head);
       endGame();
       return;
     }
@@ -412,6 +467,8 @@ export default function GameCanvas({
         return newScore;
       });
 
+      recordEvent(TELEMETRY.FOOD, head);
+
       // Create new food (snake grows by keeping tail - don't remove last segment)
       createFood();
     } else if (collidesWithPowerUp && powerUpTypeRef.current === 'reset') {
@@ -428,19 +485,23 @@ export default function GameCanvas({
 
       // Clear the power-up
       powerUpRef.current = null;
+
+      recordEvent(TELEMETRY.POWER_UP, head);
     } else {
       // Remove the tail if no food was eaten
       snakeRef.current.pop();
+
+      recordEvent(TELEMETRY.MOVE, head);
     }
 
     // Chance to spawn a power-up if none exists
-    if (!powerUpRef.current && Math.random() < POWER_UP_CHANCE / 5) {
+    if (!powerUpRef.current && random() < POWER_UP_CHANCE / 5) {
       createPowerUp();
     }
 
     // Chance to spawn a bomb
     if (
-      Math.random() < BOMB_SPAWN_CHANCE &&
+      random() < BOMB_SPAWN_CHANCE &&
       bombsRef.current.length < MAX_BOMBS
     ) {
       createBomb();
@@ -450,7 +511,18 @@ export default function GameCanvas({
   // End the game
   const endGame = () => {
     cancelAnimationFrame(requestRef.current);
-    setGameOver(true);
+
+    // Send the rest of this game's telemetry
+    const telemetry = telemetryRef.current;
+    if (telemetry.gameId) {
+      recordEvent(TELEMETRY.GAME_OVER, snakeRef.current[0]);
+      submitTelemetry(telemetry.gameId, telemetry.events.splice(0));
+      telemetry.gameId = null;
+    }
+
+    // Seed and inputs let the server verify the score
+    const { seed, tick, inputs } = replayRef.current;
+    setGameOver({ seed, ticks: tick, inputs });
     previousGameOverRef.current = true;
   };
 
@@ -782,8 +854,8 @@ export default function GameCanvas({
       const bombRadius = GRID_SIZE / 2 - 3;
 
       // Calculate pulse based on time remaining (faster pulse as time runs out)
-      const timeElapsed = Date.now() - bomb.createdAt;
-      const timeRemaining = BOMB_LIFETIME - timeElapsed;
+      const timeRemaining = bomb.expiresAt - replayRef.current.tick;
+      const timeElapsed = (BOMB_LIFETIME - timeRemaining) * NORMAL_GAME_SPEED;
       const pulseSpeed = Math.max(100, 500 - timeElapsed / 20); // Pulse faster as time runs out
       const pulsePhase = (Date.now() % pulseSpeed) / pulseSpeed;
 
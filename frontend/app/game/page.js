@@ -9,6 +9,7 @@ import { Grid, Paper } from '@mui/material';
 import Link from 'next/link';
 import ArrowBackIcon from '@mui/icons-material/ArrowBack';
 import { RequireAuth } from '../components/utils';
+import { useDashboard } from '@/hooks';
 import { submitScore } from './GameAPI';
 
 // Create a client-side only component for the game canvas
@@ -27,6 +28,8 @@ export default function GamePage() {
   const [scoreSubmitted, setScoreSubmitted] = useState(false);
   const [submitError, setSubmitError] = useState(null);
   const timerRef = useRef(null);
+  // Also checks the session and loads the profile for this page
+  const dashboard = useDashboard();
 
   // Check for client-side rendering and load high score
   useEffect(() => {
@@ -39,6 +42,13 @@ export default function GamePage() {
     }
   }, []);
 
+  // The best score saved on the server, if higher than this browser's
+  useEffect(() => {
+    if (dashboard?.best) {
+      setHighScore((saved) => Math.max(saved, dashboard.best.score));
+    }
+  }, [dashboard]);
+
   useEffect(() => {
     // Start timer when game starts
     if (gameStarted && !isPaused && !gameOver) {
@@ -151,7 +161,7 @@ export default function GamePage() {
     }
   };
 
-  const handleGameOver = () => {
+  const handleGameOver = (replay = null) => {
     setGameOver(true);
     setScoreSubmitted(false);
     setSubmitError(null);
@@ -171,7 +181,8 @@ export default function GamePage() {
     if (scoreToSubmit > 0) {
       console.log(`Submitting ${isNewHighScore ? 'new' : 'existing'} high score: ${scoreToSubmit}, Time played: ${gameTime}s`);
       
-      submitScore(scoreToSubmit, gameTime)
+      // Only this game's replay can verify a new high score
+      submitScore(scoreToSubmit, gameTime, isNewHighScore ? replay : null)
         .then(response => {
           if (!response.success) {
             // Handle specific error cases
@@ -1,3 +1,4 @@
+export { default as useDashboard, DASHBOARD_PAGES } from './use-dashboard';
 export { default as useLogin } from './use-login';
 export { default as useRegister } from './use-register';
 export { default as useResetPassword } from './use-reset-password';
@@ -0,0 +1,51 @@
+import { useEffect, useState } from 'react';
+
+import { getDashboard } from '@/app/game/GameAPI';
+import { useAppDispatch } from '@/redux/hooks';
+import {
+  setAuthenticated,
+  setUser,
+  finishInitialLoad,
+  logout,
+} from '@/redux/features/authSlice';
+import { Dashboard } from '@/redux/features/types';
+
+// Pages that load the dashboard take the session and profile from it, so
+// `Setup` neither verifies the token nor fetches the user for them
+export const DASHBOARD_PAGES = ['/dashboard', '/game'];
+
+/**
+ * The player's dashboard: undefined while loading, null if it failed.
+ */
+export default function useDashboard() {
+  const dispatch = useAppDispatch();
+  const [dashboard, setDashboard] = useState<Dashboard | null>();
+
+  useEffect(() => {
+    const token = localStorage.getItem('access');
+    if (!token) {
+      dispatch(logout());
+      dispatch(finishInitialLoad());
+      setDashboard(null);
+      return;
+    }
+
+    getDashboard()
+      .then((data) => {
+        dispatch(setAuthenticated());
+        dispatch(setUser(data.profile));
+        setDashboard(data);
+      })
+      .catch(() => {
+        localStorage.removeItem('access');
+        localStorage.removeItem('refresh');
+        dispatch(logout());
+        setDashboard(null);
+      })
+      .finally(() => {
+        dispatch(finishInitialLoad());
+      });
+  }, [dispatch]);
+
+  return dashboard;
+}
@@ -3,24 +3,17 @@ import { useRetrieveUserQuery } from '@/redux/features/authApiSlice';
 import { useAppDispatch, useAppSelector } from '@/redux/hooks';
 import { setUser } from '@/redux/features/authSlice';
 
-export default function useRetrieveUser() {
+export default function useRetrieveUser(skip = false) {
   const dispatch = useAppDispatch();
   const { isAuthenticated } = useAppSelector((state) => state.auth);
 
   const { data, isSuccess } = useRetrieveUserQuery(undefined, {
-    skip: !isAuthenticated,
+    skip: skip || !isAuthenticated,
   });
 
   useEffect(() => {
     if (!isSuccess || !data) return;
 
-    const user = {
-      ...data,
-      display_name:
-        [data.first_name, data.last_name].filter(Boolean).join(' ').trim() ||
-        data.email,
-    };
-
-    dispatch(setUser(user));
+    dispatch(setUser(data));
   }, [isSuccess, data, dispatch]);
 }
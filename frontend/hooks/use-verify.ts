@@ -8,11 +8,13 @@ import {
   logout,
 } from '@/redux/features/authSlice';
 
-export default function useVerify() {
+export default function useVerify(skip = false) {
   const dispatch = useAppDispatch();
   const [verify] = useVerifyMutation();
 
   useEffect(() => {
+    if (skip) return;
+
     const token = localStorage.getItem('access');
     if (!token) {
       dispatch(logout());
@@ -35,5 +37,5 @@ export default function useVerify() {
       .finally(() => {
         dispatch(finishInitialLoad());
       });
-  }, [dispatch, verify]);
+  }, [dispatch, verify, skip]);
 }
@@ -27,7 +27,13 @@ const authSlice = createSlice({
       state.isLoading = false;
     },
     setUser: (state, action) => {
-      state.user = action.payload;
+      const user = action.payload;
+      state.user = {
+        ...user,
+        display_name:
+          [user.first_name, user.last_name].filter(Boolean).join(' ').trim() ||
+          user.email,
+      };
     },
   },
 });
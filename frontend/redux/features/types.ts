@@ -5,3 +5,20 @@ export interface User {
   last_name?: string;
   display_name?: string;
 }
+
+export interface Score {
+  id: number;
+  score: number;
+  time_played: number;
+  created_at: string;
+  username: string;
+  status?: string;
+}
+
+export interface Dashboard {
+  profile: User;
+  best: Score | null;
+  rank: number | null;
+  recent: Score[];
+  top: Score[];
+}